@@ -0,0 +1,175 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark of the admission control of BigQuery jobs under a training burst.
+
+Simulates a project that runs at most `--max_concurrent` jobs at once. One
+session starts `--training_jobs` BigQuery ML jobs of `--training_seconds` at
+once, while `--sessions` other sessions each run `--queries` interactive
+queries of `--query_seconds`, one after the other. Jobs only sleep, so no
+BigQuery quota is used. Two policies are compared:
+
+-   `fifo`: jobs run in arrival order, like BigQuery's own queue of queries
+    over the concurrency quota.
+-   `admission`: `AdmissionController` with its priority classes, at most
+    `--max_session_jobs` jobs per session and `--max_training_jobs` training
+    jobs.
+
+Run from the `data-science` directory:
+
+    python -m benchmarks.admission_control --training_jobs=12
+"""
+
+import threading
+import time
+
+from absl import app, flags
+
+from benchmarks import common
+
+common.set_default_env()
+
+# pylint: disable=g-import-not-at-top,wrong-import-position
+import numpy as np
+from tabulate import tabulate
+
+from data_science.sub_agents.bigquery import admission
+
+# pylint: enable=g-import-not-at-top,wrong-import-position
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_integer("max_concurrent", 4, "Jobs the project runs at once.")
+flags.DEFINE_integer("max_session_jobs", 4, "Jobs of a session at once.")
+flags.DEFINE_integer("max_training_jobs", 2, "Training jobs at once.")
+flags.DEFINE_integer("training_jobs", 12, "Training jobs started at once.")
+flags.DEFINE_float("training_seconds", 1.0, "Duration of a training job.")
+flags.DEFINE_integer("sessions", 4, "Sessions running interactive queries.")
+flags.DEFINE_integer("queries", 10, "Interactive queries per session.")
+flags.DEFINE_float("query_seconds", 0.05, "Duration of an interactive query.")
+flags.DEFINE_string("output", None, "Path of the JSON report.")
+
+
+def _simulate(controller, fifo, config):
+    """Runs the workload; returns the job latencies per priority class."""
+    latencies = {admission.INTERACTIVE: [], admission.TRAINING: []}
+    lock = threading.Lock()
+
+    def run_job(session, priority, seconds):
+        start = time.perf_counter()
+        # Without priorities, every job queues in the same class.
+        with controller.admit(
+            session, admission.INTERACTIVE if fifo else priority, timeout=3600
+        ):
+            time.sleep(seconds)
+        with lock:
+            latencies[priority].append(time.perf_counter() - start)
+
+    def run_session(session):
+        for _ in range(config["queries"]):
+            run_job(session, admission.INTERACTIVE, config["query_seconds"])
+
+    threads = [
+        threading.Thread(
+            target=run_job,
+            args=("training", admission.TRAINING, config["training_seconds"]),
+        )
+        for _ in range(config["training_jobs"])
+    ]
+    for thread in threads:
+        thread.start()
+    # The interactive sessions start once the burst has filled the queue.
+    time.sleep(0.01)
+    sessions = [
+        threading.Thread(target=run_session, args=(f"user-{i}",))
+        for i in range(config["sessions"])
+    ]
+    for thread in sessions:
+        thread.start()
+    for thread in threads + sessions:
+        thread.join()
+    return latencies
+
+
+def run_benchmark(config):
+    """Simulates the workload under both policies; returns the report."""
+    results = []
+    for policy in ("fifo", "admission"):
+        if policy == "fifo":
+            controller = admission.AdmissionController(
+                config["max_concurrent"], max_per_session=0
+            )
+        else:
+            controller = admission.AdmissionController(
+                config["max_concurrent"],
+                max_per_session=config["max_session_jobs"],
+                max_per_priority={admission.TRAINING: config["max_training_jobs"]},
+            )
+        start = time.perf_counter()
+        latencies = _simulate(controller, policy == "fifo", config)
+        interactive = latencies[admission.INTERACTIVE]
+        results.append(
+            {
+                "policy": policy,
+                "seconds": time.perf_counter() - start,
+                "interactive_p50_seconds": float(np.percentile(interactive, 50)),
+                "interactive_p95_seconds": float(np.percentile(interactive, 95)),
+                "training_max_seconds": max(latencies[admission.TRAINING]),
+                "stats": controller.stats(),
+            }
+        )
+    return {"config": config, "results": results}
+
+
+def format_report(report) -> str:
+    """Formats the report as a plain-text table."""
+    return tabulate(
+        [
+            [
+                result["policy"],
+                f"{result['interactive_p50_seconds']:.2f}",
+                f"{result['interactive_p95_seconds']:.2f}",
+                f"{result['training_max_seconds']:.2f}",
+                f"{result['seconds']:.2f}",
+            ]
+            for result in report["results"]
+        ],
+        headers=[
+            "policy",
+            "interactive p50 s",
+            "interactive p95 s",
+            "last training s",
+            "total s",
+        ],
+    )
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    report = run_benchmark(
+        {
+            "max_concurrent": FLAGS.max_concurrent,
+            "max_session_jobs": FLAGS.max_session_jobs,
+            "max_training_jobs": FLAGS.max_training_jobs,
+            "training_jobs": FLAGS.training_jobs,
+            "training_seconds": FLAGS.training_seconds,
+            "sessions": FLAGS.sessions,
+            "queries": FLAGS.queries,
+            "query_seconds": FLAGS.query_seconds,
+        }
+    )
+    common.write_report(report, format_report(report), FLAGS.output)
+
+
+if __name__ == "__main__":
+    app.run(main)
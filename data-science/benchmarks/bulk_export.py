@@ -0,0 +1,189 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark of fetching large query results.
+
+Runs a `SELECT *` of a synthetic table of `--rows` rows on the local backend
+and fetches the result, once the query has finished, in two ways:
+
+-   `rows`: iterates over `query_job.result()` into dicts, as
+    `run_bigquery_validation` does.
+-   `export`: `BulkExporter.export_table` of the query's destination table
+    through `LocalReadClient`, with each of `--streams` parallel streams.
+
+`--stream_mb_per_second` caps the Arrow bytes each stream serves per second,
+like the per-stream throughput of the Storage Read API; 0 serves them as
+fast as they are read.
+
+Run from the `data-science` directory:
+
+    python -m benchmarks.bulk_export --rows=1000000 --streams=1,2,4,8
+"""
+
+import tempfile
+import time
+
+from absl import app, flags
+
+from benchmarks import common
+
+common.set_default_env()
+
+# pylint: disable=g-import-not-at-top,wrong-import-position
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from data_science.sub_agents.bigquery import backends, bulk_export
+
+# pylint: enable=g-import-not-at-top,wrong-import-position
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_integer("rows", 1_000_000, "Rows of the synthetic table.")
+flags.DEFINE_list("streams", ["1", "2", "4", "8"], "Parallel streams to measure.")
+flags.DEFINE_integer("batch_rows", 10_000, "Rows per Arrow record batch.")
+flags.DEFINE_float("stream_mb_per_second", 0.0, "Throughput cap of each stream.")
+flags.DEFINE_integer("repeats", 3, "Runs per method; the median is reported.")
+flags.DEFINE_string("output", None, "Path of the JSON report.")
+
+_PROJECT = "benchmark-project"
+_DATASET = "bulk"
+
+
+class ThrottledReadClient(backends.LocalReadClient):
+    """`LocalReadClient` whose streams serve at most `mb_per_second` each."""
+
+    def __init__(self, client, batch_rows, mb_per_second):
+        super().__init__(client, batch_rows)
+        self._seconds_per_byte = 1 / (mb_per_second * 1024 * 1024)
+
+    def read_stream(self, stream, schema):
+        for batch in super().read_stream(stream, schema):
+            time.sleep(batch.nbytes * self._seconds_per_byte)
+            yield batch
+
+
+def build_client(rows: int, seed: int = 0) -> backends.LocalBigQueryClient:
+    """Returns a local backend with a synthetic sales table of `rows` rows."""
+    rng = np.random.default_rng(seed)
+    client = backends.LocalBigQueryClient(_PROJECT, default_dataset=_DATASET)
+    client.load_dataframe(
+        _DATASET,
+        "sales",
+        pd.DataFrame(
+            {
+                "id": np.arange(rows),
+                "country": rng.choice(["Canada", "Finland", "Italy"], rows),
+                "store": rng.choice(["Discount Stickers", "Premium"], rows),
+                "num_sold": rng.integers(0, 5000, rows),
+                "price": rng.random(rows) * 10,
+            }
+        ),
+    )
+    return client
+
+
+def _median_seconds(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def run_benchmark(rows, streams, batch_rows, stream_mb_per_second, repeats):
+    """Times both fetch methods; returns the report."""
+    client = build_client(rows)
+    query_job = client.query(f"SELECT * FROM `{_PROJECT}.{_DATASET}.sales`")
+    query_job.result()
+    results = []
+
+    def fetch_rows():
+        return [dict(row.items()) for row in query_job.result()]
+
+    seconds = _median_seconds(fetch_rows, repeats)
+    results.append({"method": "rows", "streams": None, "seconds": seconds})
+    with tempfile.TemporaryDirectory() as directory:
+        for num_streams in streams:
+            exporter = bulk_export.BulkExporter(
+                directory, max_exports=1, max_streams=num_streams
+            )
+            if stream_mb_per_second:
+                read_client = ThrottledReadClient(
+                    client, batch_rows, stream_mb_per_second
+                )
+            else:
+                read_client = backends.LocalReadClient(client, batch_rows)
+            exported = []
+            seconds = _median_seconds(
+                lambda: exported.append(
+                    exporter.export_table(read_client, query_job.destination)
+                ),
+                repeats,
+            )
+            assert exported[-1].num_rows == rows
+            results.append(
+                {
+                    "method": "export",
+                    "streams": exported[-1].streams,
+                    "seconds": seconds,
+                    "parquet_mb": exported[-1].num_bytes / 1024 / 1024,
+                }
+            )
+    for result in results:
+        result["rows_per_second"] = rows / result["seconds"]
+        result["speedup"] = results[0]["seconds"] / result["seconds"]
+    return {
+        "config": {
+            "rows": rows,
+            "batch_rows": batch_rows,
+            "stream_mb_per_second": stream_mb_per_second,
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def format_report(report) -> str:
+    """Formats the report as a plain-text table."""
+    return tabulate(
+        [
+            [
+                result["method"],
+                result["streams"] or "",
+                f"{result['seconds']:.2f}",
+                f"{result['rows_per_second']:,.0f}",
+                f"{result['speedup']:.1f}x",
+            ]
+            for result in report["results"]
+        ],
+        headers=["method", "streams", "seconds", "rows/s", "speedup"],
+    )
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    report = run_benchmark(
+        FLAGS.rows,
+        [int(streams) for streams in FLAGS.streams],
+        FLAGS.batch_rows,
+        FLAGS.stream_mb_per_second,
+        FLAGS.repeats,
+    )
+    common.write_report(report, format_report(report), FLAGS.output)
+
+
+if __name__ == "__main__":
+    app.run(main)
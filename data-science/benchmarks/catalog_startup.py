@@ -0,0 +1,168 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark of the dataset catalog as datasets are added.
+
+Builds catalogs of synthetic datasets on the local backend and reports, per
+catalog size:
+
+-   `startup`: creating the catalog, rendering the root agent's instruction,
+    which lists the datasets, and running the agents' before-agent callback
+    for a new session. No schema or table metadata is loaded.
+-   `first question`: routing the first question, which indexes the table
+    metadata of every dataset and loads the schema of the routed one.
+-   `next question`: routing a question to another dataset.
+
+plus the number of schemas loaded and kept in the schema registry.
+
+Run from the `data-science` directory:
+
+    python -m benchmarks.catalog_startup --catalog_sizes=1,4,12,48
+"""
+
+import os
+import time
+import types
+
+from absl import app, flags
+
+from benchmarks import common
+
+common.set_default_env()
+
+# pylint: disable=g-import-not-at-top,wrong-import-position
+import pandas as pd
+from tabulate import tabulate
+
+from data_science import agent
+from data_science.sub_agents.bigquery import backends, schema_registry, tools
+from data_science.sub_agents.bigquery import catalog as dataset_catalog
+
+# pylint: enable=g-import-not-at-top,wrong-import-position
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_list(
+    "catalog_sizes", ["1", "4", "12", "48"], "Number of datasets in the catalog."
+)
+flags.DEFINE_integer("tables", 10, "Tables per dataset.")
+flags.DEFINE_integer("max_loaded", 4, "Dataset schemas kept loaded.")
+flags.DEFINE_string("output", None, "Path of the JSON report.")
+
+
+def build_client(project: str, num_datasets: int, num_tables: int):
+    """Returns a local backend with `num_datasets` synthetic datasets."""
+    client = backends.LocalBigQueryClient(project)
+    for d in range(num_datasets):
+        for t in range(num_tables):
+            client.load_dataframe(
+                f"dataset_{d:03d}",
+                f"topic{d:03d}_table{t:02d}",
+                pd.DataFrame(
+                    [
+                        {f"metric{d:03d}_{c}": n for c in range(8)}
+                        for n in range(5)
+                    ]
+                ),
+            )
+    return client
+
+
+def _ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(num_datasets: int, num_tables: int, max_loaded: int) -> dict:
+    """Measures startup and the first routed questions for one catalog size."""
+    project = os.environ["BQ_PROJECT_ID"]
+    tools.bq_client = build_client(project, num_datasets, num_tables)
+    tools.database_settings = None
+    registered = len(schema_registry.registry)
+
+    start = time.perf_counter()
+    tools.catalog = dataset_catalog.DatasetCatalog(
+        [
+            dataset_catalog.DatasetRef(project, f"dataset_{d:03d}")
+            for d in range(num_datasets)
+        ],
+        load_schema=tools._load_catalog_schema,  # pylint: disable=protected-access
+        list_columns=tools._list_catalog_columns,  # pylint: disable=protected-access
+        max_loaded=max_loaded,
+    )
+    agent.return_instructions_root_with_catalog()
+    state = {}
+    tools.sync_database_settings(state)
+    startup_ms = _ms(start)
+    context = types.SimpleNamespace(state=state)
+
+    start = time.perf_counter()
+    tools.route_dataset(f"average topic{num_datasets - 1:03d} metric", context)
+    first_ms = _ms(start)
+    start = time.perf_counter()
+    tools.route_dataset("average topic000 metric", context)
+    next_ms = _ms(start)
+    return {
+        "datasets": num_datasets,
+        "startup_ms": startup_ms,
+        "first_question_ms": first_ms,
+        "next_question_ms": next_ms,
+        "schemas_loaded": tools.catalog.loads,
+        "schemas_registered": len(schema_registry.registry) - registered,
+    }
+
+
+def run_benchmark(catalog_sizes: list[int], num_tables: int, max_loaded: int):
+    """Measures each catalog size and returns the report."""
+    saved = (tools.bq_client, tools.catalog, tools.database_settings)
+    try:
+        results = [measure(size, num_tables, max_loaded) for size in catalog_sizes]
+    finally:
+        tools.bq_client, tools.catalog, tools.database_settings = saved
+    return {"tables_per_dataset": num_tables, "results": results}
+
+
+def format_report(report) -> str:
+    """Formats the report as a plain-text table."""
+    return tabulate(
+        [
+            [
+                result["datasets"],
+                f"{result['startup_ms']:.2f}",
+                f"{result['first_question_ms']:.1f}",
+                f"{result['next_question_ms']:.1f}",
+                result["schemas_loaded"],
+            ]
+            for result in report["results"]
+        ],
+        headers=[
+            "datasets",
+            "startup ms",
+            "first question ms",
+            "next question ms",
+            "schemas loaded",
+        ],
+    )
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    report = run_benchmark(
+        catalog_sizes=[int(size) for size in FLAGS.catalog_sizes],
+        num_tables=FLAGS.tables,
+        max_loaded=FLAGS.max_loaded,
+    )
+    common.write_report(report, format_report(report), FLAGS.output)
+
+
+if __name__ == "__main__":
+    app.run(main)
@@ -0,0 +1,96 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Helpers shared by the benchmarks."""
+
+import json
+import os
+import pathlib
+import random
+
+# Questions with reference SQL, shared by the benchmarks.
+CORPUS_PATH = str(pathlib.Path(__file__).parent / "data" / "questions.json")
+
+# The agents are constructed when `data_science` is imported and need a model
+# name and a project, even though the benchmarks never call a real model.
+DEFAULT_ENV = {
+    "ROOT_AGENT_MODEL": "gemini-2.0-flash-001",
+    "ANALYTICS_AGENT_MODEL": "gemini-2.0-flash-001",
+    "BIGQUERY_AGENT_MODEL": "gemini-2.0-flash-001",
+    "BASELINE_NL2SQL_MODEL": "gemini-2.0-flash-001",
+    "CHASE_NL2SQL_MODEL": "gemini-2.0-flash-001",
+    "BQML_AGENT_MODEL": "gemini-2.0-flash-001",
+    "BQ_PROJECT_ID": "benchmark-project",
+    "BQ_DATASET_ID": "forecasting_sticker_sales",
+}
+
+
+def set_default_env() -> None:
+    """Sets the variables of `DEFAULT_ENV` that are not set yet.
+
+    Must run before `data_science` is imported.
+    """
+    for name, value in DEFAULT_ENV.items():
+        os.environ.setdefault(name, value)
+
+
+def write_report(report: dict, text: str, output: str | None) -> None:
+    """Prints the formatted report and, with an `output` path, its JSON."""
+    print(text)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {output}")
+
+
+def load_corpus(path: str, project: str, dataset: str) -> list[dict[str, str]]:
+    """Loads the question corpus and fills in the project and dataset."""
+    with open(path, encoding="utf-8") as f:
+        corpus = json.load(f)
+    return [
+        {
+            "question": item["question"],
+            "sql": item["sql"].format(project=project, dataset=dataset),
+        }
+        for item in corpus
+    ]
+
+
+def build_local_client(project, dataset, num_tables, seed=0):
+    """Returns a local backend with the sample data plus synthetic tables."""
+    # pylint: disable=g-import-not-at-top
+    import pandas as pd
+
+    from data_science.sub_agents.bigquery import backends
+
+    # pylint: enable=g-import-not-at-top
+    client = backends.LocalBigQueryClient(project, default_dataset=dataset)
+    rng = random.Random(seed)
+    existing = len(list(client.list_tables(dataset)))
+    for i in range(max(0, num_tables - existing)):
+        rows = [
+            {
+                "id": n,
+                "name": f"item_{rng.randint(0, 999)}",
+                "category": rng.choice(["a", "b", "c"]),
+                "amount": round(rng.uniform(0, 100), 2),
+                "quantity": rng.randint(0, 50),
+                "created_date": f"2024-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+                "region": rng.choice(["emea", "amer", "apac"]),
+                "is_active": rng.random() > 0.5,
+            }
+            for n in range(5)
+        ]
+        client.load_dataframe(dataset, f"synthetic_{i:03d}", pd.DataFrame(rows))
+    return client
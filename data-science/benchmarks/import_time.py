@@ -0,0 +1,207 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Import-time benchmark of the `data_science` package.
+
+Imports the package in fresh interpreters with `python -X importtime` and
+reports the median total import time and the slowest modules. Importing the
+package must not create clients or initialize SDKs, and modules that are only
+needed on demand (the Vertex AI SDK, ChaseSQL) must not be loaded at all, so
+the benchmark fails if any of the `--forbidden` modules is imported or if the
+median exceeds `--max_ms`.
+
+Run from the `data-science` directory:
+
+    python -m benchmarks.import_time --repeats=5 --max_ms=3000
+"""
+
+import collections
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+
+from absl import app, flags
+from tabulate import tabulate
+
+from benchmarks import common
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_string("module", "data_science", "Module to import.")
+flags.DEFINE_integer("repeats", 5, "Number of fresh interpreters to time.")
+flags.DEFINE_integer("top", 15, "Number of slowest modules to report.")
+flags.DEFINE_float(
+    "max_ms", None, "Fail if the median import time exceeds this budget."
+)
+flags.DEFINE_string(
+    "nl2sql_method", "BASELINE", "NL2SQL_METHOD used for the import."
+)
+flags.DEFINE_list(
+    "forbidden",
+    None,
+    "Modules that must not be imported. Defaults to the modules that are only"
+    " loaded on demand for the selected NL2SQL method.",
+)
+flags.DEFINE_string("output", None, "Path of the JSON report.")
+
+PACKAGE_DIR = pathlib.Path(__file__).resolve().parents[1]
+
+# Loaded on first use, never when the package is imported.
+LAZY_MODULES = ("vertexai", "google.cloud.aiplatform")
+CHASE_MODULE = "data_science.sub_agents.bigquery.chase_sql.chase_db_tools"
+
+
+def default_forbidden(nl2sql_method: str) -> list[str]:
+    """Returns the modules that must not be loaded for an NL2SQL method."""
+    if nl2sql_method == "CHASE":
+        return []
+    return [*LAZY_MODULES, CHASE_MODULE]
+
+
+def parse_importtime(log: str) -> dict[str, int]:
+    """Parses `-X importtime` output into cumulative microseconds per module."""
+    cumulative = {}
+    for line in log.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = (
+            part.strip() for part in line[len("import time:") :].split("|")
+        )
+        if not self_us.isdigit():  # The header line.
+            continue
+        cumulative[name] = int(cumulative_us)
+    return cumulative
+
+
+def measure_import(module: str, nl2sql_method: str = "BASELINE") -> dict[str, int]:
+    """Imports `module` in a fresh interpreter and returns its import times."""
+    env = {**common.DEFAULT_ENV, **os.environ, "NL2SQL_METHOD": nl2sql_method}
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(PACKAGE_DIR), env.get("PYTHONPATH")])
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PACKAGE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    return parse_importtime(result.stderr)
+
+
+def loaded_forbidden(
+    import_times: dict[str, int], forbidden: list[str]
+) -> list[str]:
+    """Returns the forbidden modules, or their submodules, that were loaded."""
+    return sorted(
+        name
+        for name in forbidden
+        if any(
+            loaded == name or loaded.startswith(name + ".")
+            for loaded in import_times
+        )
+    )
+
+
+def run_benchmark(
+    module: str, repeats: int, nl2sql_method: str, forbidden: list[str], top: int
+) -> dict:
+    """Times `repeats` imports and returns the report."""
+    runs = [measure_import(module, nl2sql_method) for _ in range(repeats)]
+    per_module = collections.defaultdict(list)
+    for run in runs:
+        for name, micros in run.items():
+            per_module[name].append(micros)
+    slowest = sorted(
+        (
+            (name, statistics.median(micros) / 1000)
+            for name, micros in per_module.items()
+            if name != module
+        ),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:top]
+    totals_ms = [run[module] / 1000 for run in runs]
+    return {
+        "module": module,
+        "nl2sql_method": nl2sql_method,
+        "repeats": repeats,
+        "median_ms": statistics.median(totals_ms),
+        "min_ms": min(totals_ms),
+        "max_ms": max(totals_ms),
+        "slowest_modules": [
+            {"module": name, "cumulative_ms": ms} for name, ms in slowest
+        ],
+        "forbidden_loaded": sorted(
+            set().union(*(loaded_forbidden(run, forbidden) for run in runs))
+        ),
+    }
+
+
+def format_report(report) -> str:
+    """Formats the report as text."""
+    lines = [
+        f"import {report['module']} (NL2SQL_METHOD={report['nl2sql_method']},"
+        f" {report['repeats']} runs): median {report['median_ms']:.0f} ms,"
+        f" min {report['min_ms']:.0f} ms, max {report['max_ms']:.0f} ms",
+        "",
+        tabulate(
+            [
+                (entry["module"], f"{entry['cumulative_ms']:.1f}")
+                for entry in report["slowest_modules"]
+            ],
+            headers=["module", "cumulative ms (median)"],
+        ),
+    ]
+    if report["forbidden_loaded"]:
+        lines += ["", "Loaded at import: " + ", ".join(report["forbidden_loaded"])]
+    return "\n".join(lines)
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    forbidden = (
+        FLAGS.forbidden
+        if FLAGS.forbidden is not None
+        else default_forbidden(FLAGS.nl2sql_method)
+    )
+    report = run_benchmark(
+        module=FLAGS.module,
+        repeats=FLAGS.repeats,
+        nl2sql_method=FLAGS.nl2sql_method,
+        forbidden=forbidden,
+        top=FLAGS.top,
+    )
+    common.write_report(report, format_report(report), FLAGS.output)
+
+    failures = []
+    if report["forbidden_loaded"]:
+        failures.append(
+            "modules loaded at import: " + ", ".join(report["forbidden_loaded"])
+        )
+    if FLAGS.max_ms is not None and report["median_ms"] > FLAGS.max_ms:
+        failures.append(
+            f"median import time {report['median_ms']:.0f} ms exceeds"
+            f" {FLAGS.max_ms:.0f} ms"
+        )
+    if failures:
+        sys.exit("Import-time regression: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    app.run(main)
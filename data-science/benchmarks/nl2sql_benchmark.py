@@ -0,0 +1,583 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""End-to-end benchmark of the database agent's NL2SQL pipeline.
+
+Drives the baseline and ChaseSQL `initial_bq_nl2sql` tools, followed by
+`run_bigquery_validation`, over the question corpus in `data/questions.json`.
+The LLM is replaced by a deterministic fake that answers every corpus question
+with its reference SQL (optionally with synthetic latency), and SQL runs on the
+local SQLite backend, so runs are reproducible, offline and free.
+
+Each turn is split into the stages schema load, prompt build, LLM generation,
+sqlglot translation, correction calls and SQL execution. For every pipeline,
+schema size and schema format (see `schema_formats.py`), and for ChaseSQL
+every number of worked examples in its prompts (see `example_bank.py`), the
+benchmark reports p50/p95 latency, call counts and token counts per stage,
+and writes them as JSON for regression tracking.
+
+The fake LLM answers correctly whatever the prompt looks like, so comparing
+the accuracy of schema formats or example selection needs `--llm=live`: the configured Gemini
+models are called, or replayed from the cassette in `DATA_SCIENCE_CASSETTE`.
+
+Run from the `data-science` directory:
+
+    python -m benchmarks.nl2sql_benchmark --schema_sizes=1,20,100 \\
+        --output=nl2sql_benchmark.json
+    python -m benchmarks.nl2sql_benchmark --schema_formats=ddl,compact \\
+        --llm=live --schema_sizes=1,20
+    python -m benchmarks.nl2sql_benchmark --paths=chase --few_shot_examples=0,3
+"""
+
+import collections
+import contextlib
+import itertools
+import os
+import time
+import types
+import zlib
+
+from absl import app, flags
+
+from benchmarks import common
+
+common.set_default_env()
+
+# pylint: disable=g-import-not-at-top,wrong-import-position
+import numpy as np
+from tabulate import tabulate
+
+from data_science.sub_agents.bigquery import schema_formats, tools
+from data_science.sub_agents.bigquery.chase_sql import chase_db_tools
+from data_science.sub_agents.bigquery.chase_sql.sql_postprocessor import (
+    sql_translator,
+)
+from data_science.utils.utils import estimate_tokens
+
+# pylint: enable=g-import-not-at-top,wrong-import-position
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_list("paths", ["baseline", "chase"], "NL2SQL pipelines to run.")
+flags.DEFINE_list(
+    "schema_sizes", ["1", "20", "100"], "Number of tables in the benchmark schema."
+)
+flags.DEFINE_list(
+    "schema_formats", [schema_formats.DDL], "Schema formats of the NL2SQL prompts."
+)
+flags.DEFINE_list(
+    "few_shot_examples",
+    [str(chase_db_tools.FEW_SHOT_EXAMPLES)],
+    "Worked examples in the ChaseSQL prompts (0 for all of them).",
+)
+flags.DEFINE_enum(
+    "llm", "fake", ["fake", "live"], "Fake LLM, or the configured Gemini models."
+)
+flags.DEFINE_integer("repeats", 3, "Passes over the question corpus per run.")
+flags.DEFINE_float("llm_latency_ms", 0.0, "Fixed synthetic latency per LLM call.")
+flags.DEFINE_float(
+    "llm_ms_per_1k_tokens",
+    0.0,
+    "Synthetic LLM latency per 1000 prompt tokens.",
+)
+flags.DEFINE_string(
+    "corpus",
+    common.CORPUS_PATH,
+    "Question corpus with reference SQL.",
+)
+flags.DEFINE_string("output", None, "Path of the JSON report.")
+
+STAGES = (
+    "schema_load",
+    "prompt_build",
+    "llm_generation",
+    "translation",
+    "correction",
+    "execution",
+    "total",
+)
+
+# Marker of the SQL correction prompt in `correction_prompt_template.py`.
+_CORRECTION_MARKER = "Corrected SQL query:"
+
+
+class StageRecorder:
+    """Accumulates per-stage time, calls and tokens for the current turn."""
+
+    def __init__(self):
+        self.turn = None
+
+    def start_turn(self):
+        self.turn = collections.defaultdict(
+            lambda: {"ms": 0.0, "calls": 0, "tokens_in": 0, "tokens_out": 0}
+        )
+
+    def add(self, stage, seconds, tokens_in=0, tokens_out=0):
+        if self.turn is None:
+            return
+        entry = self.turn[stage]
+        entry["ms"] += seconds * 1000
+        entry["calls"] += 1
+        entry["tokens_in"] += tokens_in
+        entry["tokens_out"] += tokens_out
+
+    @contextlib.contextmanager
+    def timed(self, owner, name, stage):
+        """Temporarily wraps `owner.name` so that its run time is recorded."""
+        original = getattr(owner, name)
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+
+        setattr(owner, name, wrapper)
+        try:
+            yield
+        finally:
+            setattr(owner, name, original)
+
+
+class FakeLlm:
+    """Deterministic LLM answering corpus questions with their reference SQL."""
+
+    def __init__(self, corpus, recorder, latency_ms=0.0, ms_per_1k_tokens=0.0):
+        self._corpus = corpus
+        self._recorder = recorder
+        self._latency_ms = latency_ms
+        self._ms_per_1k_tokens = ms_per_1k_tokens
+
+    def complete(self, prompt: str, reasoning: bool = False) -> str:
+        """Answers a prompt, optionally with a reasoning preamble like DC/QP."""
+        start = time.perf_counter()
+        correction = _CORRECTION_MARKER in prompt
+        # The question being asked is the last corpus question in the prompt.
+        item = max(self._corpus, key=lambda q: prompt.rfind(q["question"]))
+        response = f"```sql\n{item['sql']}\n```"
+        if reasoning and not correction:
+            response = (
+                f"**Question**: {item['question']}\n\n"
+                "**Final Optimized SQL Query:**\n" + response
+            )
+        tokens_in = estimate_tokens(prompt)
+        delay_ms = self._latency_ms + self._ms_per_1k_tokens * tokens_in / 1000
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+        self._recorder.add(
+            "correction" if correction else "llm_generation",
+            time.perf_counter() - start,
+            tokens_in=tokens_in,
+            tokens_out=estimate_tokens(response),
+        )
+        return response
+
+    def client(self):
+        """Returns a stand-in for the `google.genai.Client` in `tools.py`."""
+
+        def generate_content(model, contents, config=None):
+            del model, config  # Unused.
+            return types.SimpleNamespace(text=self.complete(contents))
+
+        def embed_content(model, contents, config=None):
+            del model, config  # Unused.
+            texts = [contents] if isinstance(contents, str) else contents
+            return types.SimpleNamespace(
+                embeddings=[
+                    types.SimpleNamespace(values=_bag_of_words(text)) for text in texts
+                ]
+            )
+
+        return types.SimpleNamespace(
+            models=types.SimpleNamespace(
+                generate_content=generate_content, embed_content=embed_content
+            )
+        )
+
+    def gemini_model_class(self):
+        """Returns a stand-in for `llm_utils.GeminiModel`."""
+        llm = self
+
+        class FakeGeminiModel:
+
+            def __init__(self, *args, **kwargs):
+                del args, kwargs  # Unused.
+
+            def call(self, prompt, parser_func=None, stop_at_sql_block=False):
+                del stop_at_sql_block  # Unused.
+                response = llm.complete(prompt, reasoning=True)
+                return parser_func(response) if parser_func else response
+
+            def call_parallel(self, prompts, parser_func=None, **kwargs):
+                del kwargs  # Unused.
+                return [self.call(prompt, parser_func) for prompt in prompts]
+
+        return FakeGeminiModel
+
+
+def _bag_of_words(text: str, dims: int = 256) -> list[float]:
+    """Deterministic stand-in for an embedding model."""
+    vector = [0.0] * dims
+    for word in text.lower().split():
+        vector[zlib.crc32(word.strip("?.,;'").encode()) % dims] += 1.0
+    return vector
+
+
+class LiveLlm:
+    """Calls the configured Gemini models, recording their latency and tokens."""
+
+    def __init__(self, recorder):
+        self._recorder = recorder
+
+    def record(self, prompt, start, response):
+        self._recorder.add(
+            "correction" if _CORRECTION_MARKER in prompt else "llm_generation",
+            time.perf_counter() - start,
+            tokens_in=estimate_tokens(prompt),
+            tokens_out=estimate_tokens(response or ""),
+        )
+
+    def client(self):
+        """Returns the Gemini client of `tools.py`, recording its calls."""
+        client = tools.get_llm_client()
+        llm = self
+
+        def generate_content(model, contents, config=None):
+            start = time.perf_counter()
+            response = client.models.generate_content(
+                model=model, contents=contents, config=config
+            )
+            llm.record(contents, start, response.text)
+            return response
+
+        return types.SimpleNamespace(
+            models=types.SimpleNamespace(
+                generate_content=generate_content,
+                embed_content=client.models.embed_content,
+            )
+        )
+
+    def gemini_model_class(self):
+        """Returns `llm_utils.GeminiModel`, recording its calls."""
+        llm = self
+
+        class RecordedGeminiModel(chase_db_tools.GeminiModel):
+
+            def call(self, prompt, parser_func=None, stop_at_sql_block=False):
+                start = time.perf_counter()
+                response = super().call(prompt, stop_at_sql_block=stop_at_sql_block)
+                llm.record(prompt, start, response)
+                return parser_func(response) if parser_func else response
+
+        return RecordedGeminiModel
+
+
+def _rows_key(rows):
+    return sorted(repr(sorted(row.items())) for row in rows or [])
+
+
+def run_benchmark(
+    paths,
+    schema_sizes,
+    corpus_path,
+    repeats=3,
+    llm_latency_ms=0.0,
+    llm_ms_per_1k_tokens=0.0,
+    formats=(schema_formats.DDL,),
+    few_shot_examples=(chase_db_tools.FEW_SHOT_EXAMPLES,),
+    live_llm=False,
+):
+    """Runs the benchmark and returns the report as a dict."""
+    project = os.environ["BQ_PROJECT_ID"]
+    dataset = os.environ["BQ_DATASET_ID"]
+    corpus = common.load_corpus(corpus_path, project, dataset)
+    recorder = StageRecorder()
+    if live_llm:
+        llm = LiveLlm(recorder)
+    else:
+        llm = FakeLlm(corpus, recorder, llm_latency_ms, llm_ms_per_1k_tokens)
+    nl2sql_tools = {
+        "baseline": tools.initial_bq_nl2sql,
+        "chase": chase_db_tools.initial_bq_nl2sql,
+    }
+    results = []
+
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(
+            recorder.timed(sql_translator.SqlTranslator, "translate", "translation")
+        )
+        stack.enter_context(
+            recorder.timed(sql_translator.SqlTranslator, "_fix_errors", "fix_errors")
+        )
+        saved = (
+            tools.llm_client,
+            chase_db_tools.GeminiModel,
+            tools.sql_cache,
+            tools.NL2SQL_SCHEMA_FORMAT,
+            chase_db_tools.FEW_SHOT_EXAMPLES,
+            chase_db_tools.example_bank,
+        )
+        tools.llm_client = llm.client()
+        chase_db_tools.GeminiModel = llm.gemini_model_class()
+        tools.sql_cache = None
+        # Example embeddings come from the benchmark's LLM.
+        chase_db_tools.example_bank = None
+        stack.callback(_restore, saved)
+        saved_client = (tools.bq_client, tools.database_settings)
+        stack.callback(_restore_client, saved_client)
+
+        for num_tables in schema_sizes:
+            tools.bq_client = common.build_local_client(project, dataset, num_tables)
+            gold = {
+                item["question"]: _rows_key(
+                    [dict(r.items()) for r in tools.bq_client.query(item["sql"]).result()]
+                )
+                for item in corpus
+            }
+            schema_load_ms = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                settings = tools.update_database_settings()
+                schema_load_ms.append((time.perf_counter() - start) * 1000)
+
+            runs = [
+                (schema_format, path, examples)
+                for schema_format, path in itertools.product(formats, paths)
+                for examples in (few_shot_examples if path == "chase" else [None])
+            ]
+            for schema_format, path, examples in runs:
+                tools.NL2SQL_SCHEMA_FORMAT = schema_format
+                if examples is not None:
+                    chase_db_tools.FEW_SHOT_EXAMPLES = examples
+                sql_translator.reset_stats()
+                turns = []
+                correct = 0
+                for _ in range(repeats):
+                    for item in corpus:
+                        tool_context = types.SimpleNamespace(
+                            state={"database_settings": dict(settings)}
+                        )
+                        recorder.start_turn()
+                        start = time.perf_counter()
+                        sql = nl2sql_tools[path](item["question"], tool_context)
+                        generated = time.perf_counter()
+                        tools.run_bigquery_validation(sql, tool_context)
+                        done = time.perf_counter()
+                        turn = recorder.turn
+                        recorder.turn = None
+                        # The tool response holds the encoded rows; the
+                        # state holds them as dicts.
+                        correct += _rows_key(
+                            tool_context.state.get("query_result")
+                        ) == gold[item["question"]]
+                        turns.append(
+                            _split_turn(turn, generated - start, done - generated)
+                        )
+                results.append(
+                    _summarize(
+                        path,
+                        num_tables,
+                        schema_format,
+                        examples,
+                        tools.get_ddl_schema(settings, schema_format),
+                        schema_load_ms,
+                        turns,
+                        correct,
+                    )
+                )
+                results[-1]["translator"] = sql_translator.stats()
+
+    return {
+        "config": {
+            "paths": list(paths),
+            "schema_sizes": list(schema_sizes),
+            "schema_formats": list(formats),
+            "few_shot_examples": list(few_shot_examples),
+            "llm": "live" if live_llm else "fake",
+            "repeats": repeats,
+            "questions": len(corpus),
+            "llm_latency_ms": llm_latency_ms,
+            "llm_ms_per_1k_tokens": llm_ms_per_1k_tokens,
+        },
+        "results": results,
+    }
+
+
+def _restore(saved):
+    (
+        tools.llm_client,
+        chase_db_tools.GeminiModel,
+        tools.sql_cache,
+        tools.NL2SQL_SCHEMA_FORMAT,
+        chase_db_tools.FEW_SHOT_EXAMPLES,
+        chase_db_tools.example_bank,
+    ) = saved
+
+
+def _restore_client(saved):
+    tools.bq_client, tools.database_settings = saved
+
+
+def _split_turn(turn, nl2sql_seconds, execution_seconds):
+    """Derives the stages that are not recorded directly."""
+    stages = {stage: dict(values) for stage, values in turn.items()}
+    empty = {"ms": 0.0, "calls": 0, "tokens_in": 0, "tokens_out": 0}
+    translation = stages.pop("translation", dict(empty))
+    fix_errors = stages.pop("fix_errors", dict(empty))
+    correction = stages.setdefault("correction", dict(empty))
+    generation = stages.setdefault("llm_generation", dict(empty))
+    # `_fix_errors` includes its LLM call; sqlglot checks count as correction.
+    correction["ms"] = fix_errors["ms"]
+    translation["ms"] -= fix_errors["ms"]
+    stages["translation"] = translation
+    stages["prompt_build"] = {
+        **empty,
+        "ms": nl2sql_seconds * 1000
+        - generation["ms"]
+        - translation["ms"]
+        - correction["ms"],
+        "calls": 1,
+    }
+    stages["execution"] = {**empty, "ms": execution_seconds * 1000, "calls": 1}
+    stages["total"] = {
+        **empty,
+        "ms": (nl2sql_seconds + execution_seconds) * 1000,
+        "calls": 1,
+        "tokens_in": generation["tokens_in"] + correction["tokens_in"],
+        "tokens_out": generation["tokens_out"] + correction["tokens_out"],
+    }
+    return stages
+
+
+def _summarize(
+    path,
+    num_tables,
+    schema_format,
+    few_shot_examples,
+    schema,
+    schema_load_ms,
+    turns,
+    correct,
+):
+    """Aggregates the turns of one run into percentiles and per-turn means."""
+    stages = {}
+    for stage in STAGES:
+        if stage == "schema_load":
+            ms = schema_load_ms
+            per_turn = {"calls": 1, "tokens_in": 0, "tokens_out": 0}
+        else:
+            values = [turn.get(stage, {}) for turn in turns]
+            ms = [v.get("ms", 0.0) for v in values]
+            per_turn = {
+                key: float(np.mean([v.get(key, 0) for v in values]))
+                for key in ("calls", "tokens_in", "tokens_out")
+            }
+        stages[stage] = {
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "calls_per_turn": per_turn["calls"],
+            "tokens_in_per_turn": per_turn["tokens_in"],
+            "tokens_out_per_turn": per_turn["tokens_out"],
+        }
+    return {
+        "path": path,
+        "schema_tables": num_tables,
+        "schema_format": schema_format,
+        "few_shot_examples": few_shot_examples,
+        "schema_tokens": estimate_tokens(schema),
+        "turns": len(turns),
+        "accuracy": correct / len(turns) if turns else None,
+        "stages": stages,
+    }
+
+
+def _examples_label(few_shot_examples) -> str:
+    if few_shot_examples is None:
+        return "-"
+    return str(few_shot_examples) if few_shot_examples else "all"
+
+
+def format_report(report) -> str:
+    """Formats a report as a plain-text table."""
+    rows = []
+    for result in report["results"]:
+        for stage, values in result["stages"].items():
+            rows.append(
+                [
+                    result["path"],
+                    result["schema_tables"],
+                    result["schema_format"],
+                    _examples_label(result["few_shot_examples"]),
+                    stage,
+                    f"{values['p50_ms']:.2f}",
+                    f"{values['p95_ms']:.2f}",
+                    f"{values['calls_per_turn']:.2f}",
+                    f"{values['tokens_in_per_turn']:.0f}",
+                    f"{values['tokens_out_per_turn']:.0f}",
+                ]
+            )
+    return tabulate(
+        rows,
+        headers=[
+            "path",
+            "tables",
+            "schema",
+            "examples",
+            "stage",
+            "p50 ms",
+            "p95 ms",
+            "calls/turn",
+            "tokens in/turn",
+            "tokens out/turn",
+        ],
+    )
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    report = run_benchmark(
+        paths=FLAGS.paths,
+        schema_sizes=[int(size) for size in FLAGS.schema_sizes],
+        corpus_path=FLAGS.corpus,
+        repeats=FLAGS.repeats,
+        llm_latency_ms=FLAGS.llm_latency_ms,
+        llm_ms_per_1k_tokens=FLAGS.llm_ms_per_1k_tokens,
+        formats=FLAGS.schema_formats,
+        few_shot_examples=[int(k) for k in FLAGS.few_shot_examples],
+        live_llm=FLAGS.llm == "live",
+    )
+    lines = [format_report(report)]
+    for result in report["results"]:
+        variant = result["schema_format"]
+        if result["few_shot_examples"] is not None:
+            variant += f", {_examples_label(result['few_shot_examples'])} examples"
+        lines.append(
+            f"{result['path']} @ {result['schema_tables']} tables ({variant}):"
+            f" accuracy {result['accuracy']:.2%},"
+            f" schema ~{result['schema_tokens']} tokens"
+        )
+        translator = result["translator"]
+        if translator.get("translations"):
+            lines.append(
+                f"  translator: {translator.get('output_dialect', 0)} of"
+                f" {translator['translations']} queries already GoogleSQL,"
+                f" {translator.get('correction_passes_skipped', 0)} correction"
+                f" passes skipped, {translator.get('correction_calls', 0)} LLM"
+                " correction calls"
+            )
+    common.write_report(report, "\n".join(lines), FLAGS.output)
+
+
+if __name__ == "__main__":
+    app.run(main)
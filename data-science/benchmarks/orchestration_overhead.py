@@ -0,0 +1,139 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-benchmark of the per-turn overhead of the root orchestration path.
+
+Reports the mean microseconds per LLM request spent outside the model for:
+
+-   `tools`: resolving an agent's tools and adding their function
+    declarations to the request, as ADK does before every LLM call, with
+    the agent's precompiled tools and with the same tools listed as plain
+    functions.
+-   `agent tool`: getting the `AgentTool` that `call_db_agent` and
+    `call_ds_agent` run the sub-agents with, built per call or shared.
+
+Run from the `data-science` directory:
+
+    python -m benchmarks.orchestration_overhead --iterations=2000
+"""
+
+import asyncio
+import time
+
+from absl import app, flags
+
+from benchmarks import common
+
+common.set_default_env()
+
+# pylint: disable=g-import-not-at-top,wrong-import-position
+from google.adk.models.llm_request import LlmRequest
+from google.adk.tools.agent_tool import AgentTool
+from tabulate import tabulate
+
+from data_science import agent, tools
+from data_science.sub_agents import bqml_agent, db_agent
+from data_science.utils.tools import PrecompiledFunctionTool
+
+# pylint: enable=g-import-not-at-top,wrong-import-position
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_integer("iterations", 2000, "Timed repetitions per measurement.")
+flags.DEFINE_string("output", None, "Path of the JSON report.")
+
+
+def _plain(llm_agent):
+    """Returns a copy of the agent listing plain functions as tools."""
+    return llm_agent.model_copy(
+        update={
+            "tools": [
+                tool.func if isinstance(tool, PrecompiledFunctionTool) else tool
+                for tool in llm_agent.tools
+            ]
+        }
+    )
+
+
+async def _prepare_request(llm_agent) -> None:
+    LlmRequest().append_tools(await llm_agent.canonical_tools())
+
+
+async def _time_async(func, iterations: int) -> float:
+    for _ in range(min(iterations, 100)):
+        await func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def _time(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def run_benchmark(iterations: int):
+    """Measures each step and returns the report."""
+    results = []
+    for name, llm_agent in [
+        ("root", agent.root_agent),
+        ("bqml", bqml_agent),
+    ]:
+        plain = _plain(llm_agent)
+        results.append(
+            {
+                "step": f"{name} tools",
+                "before_us": await _time_async(
+                    lambda a=plain: _prepare_request(a), iterations
+                ),
+                "after_us": await _time_async(
+                    lambda a=llm_agent: _prepare_request(a), iterations
+                ),
+            }
+        )
+    results.append(
+        {
+            "step": "agent tool",
+            "before_us": _time(lambda: AgentTool(agent=db_agent), iterations),
+            "after_us": _time(lambda: tools.db_agent_tool, iterations),
+        }
+    )
+    return {"iterations": iterations, "results": results}
+
+
+def format_report(report) -> str:
+    """Formats the report as a plain-text table."""
+    return tabulate(
+        [
+            [
+                result["step"],
+                f"{result['before_us']:.1f}",
+                f"{result['after_us']:.1f}",
+            ]
+            for result in report["results"]
+        ],
+        headers=["step", "per call (us)", "precompiled (us)"],
+    )
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    report = asyncio.run(run_benchmark(FLAGS.iterations))
+    common.write_report(report, format_report(report), FLAGS.output)
+
+
+if __name__ == "__main__":
+    app.run(main)
@@ -0,0 +1,174 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark of the tokens of query results in the agents' context.
+
+Runs the reference SQL of the question corpus on the local backend, plus,
+with `--scan_tables`, a `SELECT *` of `MAX_NUM_ROWS` rows of every table, and
+compares the estimated tokens of the results as they used to reach the
+models (the JSON of the list of dicts in the `run_bigquery_validation`
+response, its Python repr in the data science agent's request) with the
+encodings of `result_encoder.py`:
+
+-   `full`: every row and whole values, as handed to the data science agent.
+-   `budget`: the rows that fit in `--token_budget`, with values cut at
+    `--max_value_chars`, as in the tool response.
+
+Run from the `data-science` directory:
+
+    python -m benchmarks.result_encoding --formats=csv,tsv,markdown
+"""
+
+import json
+
+from absl import app, flags
+
+from benchmarks import common
+
+common.set_default_env()
+
+# pylint: disable=g-import-not-at-top,wrong-import-position
+from tabulate import tabulate
+
+from data_science.sub_agents.bigquery import backends, tools
+from data_science.utils import result_encoder
+from data_science.utils.utils import estimate_tokens
+
+# pylint: enable=g-import-not-at-top,wrong-import-position
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_list(
+    "formats", list(result_encoder.RESULT_FORMATS), "Result formats to compare."
+)
+flags.DEFINE_integer(
+    "token_budget", tools.QUERY_RESULT_TOKEN_BUDGET, "Tokens of a tool response."
+)
+flags.DEFINE_integer(
+    "max_value_chars", tools.QUERY_RESULT_MAX_VALUE_CHARS, "Longest value shown."
+)
+flags.DEFINE_bool("scan_tables", True, "Also encode a SELECT * of every table.")
+flags.DEFINE_string("corpus", common.CORPUS_PATH, "Question corpus.")
+flags.DEFINE_string("output", None, "Path of the JSON report.")
+
+
+def load_results(corpus_path, scan_tables):
+    """Returns the rows of the corpus queries, as in `run_bigquery_validation`."""
+    project = "benchmark-project"
+    dataset = "forecasting_sticker_sales"
+    client = backends.LocalBigQueryClient(project, default_dataset=dataset)
+    corpus = common.load_corpus(corpus_path, project, dataset)
+    queries = [item["sql"] for item in corpus]
+    if scan_tables:
+        queries += [
+            f"SELECT * FROM `{project}.{dataset}.{table.table_id}`"
+            f" LIMIT {tools.MAX_NUM_ROWS}"
+            for table in client.list_tables(dataset)
+        ]
+    return [
+        [dict(row.items()) for row in client.query(sql).result()] for sql in queries
+    ]
+
+
+def run_benchmark(formats, token_budget, max_value_chars, corpus_path, scan_tables):
+    """Encodes the results in each format; returns the report."""
+    results = load_results(corpus_path, scan_tables)
+    json_tokens = sum(
+        estimate_tokens(json.dumps(rows, default=str)) for rows in results
+    )
+    repr_tokens = sum(estimate_tokens(str(rows)) for rows in results)
+    encodings = []
+    for result_format in formats:
+        full = [result_encoder.encode_rows(rows, result_format) for rows in results]
+        budget = [
+            result_encoder.encode_rows(
+                rows,
+                result_format,
+                max_tokens=token_budget,
+                max_value_chars=max_value_chars,
+            )
+            for rows in results
+        ]
+        full_tokens = sum(estimate_tokens(e.text) for e in full)
+        budget_tokens = sum(estimate_tokens(e.text) for e in budget)
+        encodings.append(
+            {
+                "format": result_format,
+                "full_tokens": full_tokens,
+                "full_saving": 1 - full_tokens / repr_tokens,
+                "budget_tokens": budget_tokens,
+                "budget_saving": 1 - budget_tokens / json_tokens,
+                "rows_shown": sum(e.rows_shown for e in budget),
+                "values_cut": sum(e.values_cut for e in budget),
+            }
+        )
+    return {
+        "config": {
+            "token_budget": token_budget,
+            "max_value_chars": max_value_chars,
+            "scan_tables": scan_tables,
+        },
+        "results": len(results),
+        "rows": sum(len(rows) for rows in results),
+        "json_tokens": json_tokens,
+        "repr_tokens": repr_tokens,
+        "encodings": encodings,
+    }
+
+
+def format_report(report) -> str:
+    """Formats the report as a plain-text table."""
+    table = tabulate(
+        [
+            [
+                encoding["format"],
+                encoding["full_tokens"],
+                f"{encoding['full_saving']:.1%}",
+                encoding["budget_tokens"],
+                f"{encoding['budget_saving']:.1%}",
+                f"{encoding['rows_shown']}/{report['rows']}",
+                encoding["values_cut"],
+            ]
+            for encoding in report["encodings"]
+        ],
+        headers=[
+            "format",
+            "full tokens",
+            "vs repr",
+            "budget tokens",
+            "vs JSON",
+            "rows shown",
+            "values cut",
+        ],
+    )
+    return (
+        f"{report['results']} results, {report['rows']} rows: "
+        f"{report['json_tokens']} tokens as JSON, "
+        f"{report['repr_tokens']} as Python repr.\n{table}"
+    )
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    report = run_benchmark(
+        FLAGS.formats,
+        FLAGS.token_budget,
+        FLAGS.max_value_chars,
+        FLAGS.corpus,
+        FLAGS.scan_tables,
+    )
+    common.write_report(report, format_report(report), FLAGS.output)
+
+
+if __name__ == "__main__":
+    app.run(main)
@@ -0,0 +1,173 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark of the session storage taken by the database settings.
+
+Persistent session services store each session's state, and each event's
+state delta, as JSON. This benchmark runs the before-agent callbacks of the
+root and database agents for a number of sessions and turns, records every
+state write, and reports the JSON bytes stored per session:
+
+-   `registry`: the current layout, where state only references the DDL
+    schema by fingerprint and the callbacks write it when it changes.
+-   `inline`: the previous layout, where the full DDL schema was copied into
+    `database_settings` and re-written on every turn.
+
+Run from the `data-science` directory:
+
+    python -m benchmarks.session_state_size --schema_sizes=1,20,100
+"""
+
+import json
+import os
+import types
+
+from absl import app, flags
+
+from benchmarks import common
+
+common.set_default_env()
+
+# pylint: disable=g-import-not-at-top,wrong-import-position
+from tabulate import tabulate
+
+from data_science import agent as root_agent_module
+from data_science.sub_agents.bigquery import agent as database_agent_module
+from data_science.sub_agents.bigquery import tools
+
+# pylint: enable=g-import-not-at-top,wrong-import-position
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_list(
+    "schema_sizes", ["1", "20", "100"], "Number of tables in the schema."
+)
+flags.DEFINE_integer("sessions", 100, "Number of sessions.")
+flags.DEFINE_integer("turns", 5, "Turns per session.")
+flags.DEFINE_string("output", None, "Path of the JSON report.")
+
+
+class _RecordingState(dict):
+    """Session state that records the writes of the current turn."""
+
+    def __init__(self):
+        super().__init__()
+        self.delta = {}
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.delta[key] = value
+
+
+def _json_size(value) -> int:
+    return len(json.dumps(value, default=str).encode("utf-8"))
+
+
+def _registry_turn(context):
+    root_agent_module.setup_before_agent_call(context)
+    database_agent_module.setup_before_agent_call(context)
+
+
+def _inline_turn(context, ddl_schema):
+    # What the root agent's callback used to write on every turn.
+    context.state["all_db_settings"] = {"use_database": "BigQuery"}
+    context.state["database_settings"] = {
+        **tools.get_database_settings(),
+        "bq_ddl_schema": ddl_schema,
+    }
+
+
+def measure_session(layout: str, turns: int, ddl_schema: str) -> dict:
+    """Runs one session and returns its state and event bytes."""
+    context = types.SimpleNamespace(state=_RecordingState())
+    event_bytes = 0
+    for _ in range(turns):
+        context.state.delta = {}
+        if layout == "registry":
+            _registry_turn(context)
+        else:
+            _inline_turn(context, ddl_schema)
+        if context.state.delta:
+            event_bytes += _json_size(context.state.delta)
+    return {
+        "state_bytes": _json_size(dict(context.state)),
+        "event_bytes": event_bytes,
+    }
+
+
+def run_benchmark(schema_sizes: list[int], sessions: int, turns: int) -> dict:
+    """Measures both layouts for each schema size and returns the report."""
+    project = os.environ["BQ_PROJECT_ID"]
+    dataset = os.environ["BQ_DATASET_ID"]
+    saved = (tools.bq_client, tools.database_settings)
+    results = []
+    try:
+        for num_tables in schema_sizes:
+            tools.bq_client = common.build_local_client(project, dataset, num_tables)
+            settings = tools.update_database_settings()
+            ddl_schema = tools.get_ddl_schema(settings)
+            for layout in ("inline", "registry"):
+                session = measure_session(layout, turns, ddl_schema)
+                results.append(
+                    {
+                        "schema_tables": num_tables,
+                        "ddl_bytes": len(ddl_schema.encode("utf-8")),
+                        "layout": layout,
+                        **session,
+                        "total_bytes": sessions
+                        * (session["state_bytes"] + session["event_bytes"]),
+                    }
+                )
+    finally:
+        tools.bq_client, tools.database_settings = saved
+    return {"sessions": sessions, "turns": turns, "results": results}
+
+
+def format_report(report) -> str:
+    """Formats the report as a plain-text table."""
+    return tabulate(
+        [
+            [
+                result["schema_tables"],
+                f"{result['ddl_bytes'] / 1024:.1f}",
+                result["layout"],
+                f"{result['state_bytes'] / 1024:.1f}",
+                f"{result['event_bytes'] / 1024:.1f}",
+                f"{result['total_bytes'] / 1024**2:.2f}",
+            ]
+            for result in report["results"]
+        ],
+        headers=[
+            "tables",
+            "DDL KiB",
+            "layout",
+            "state KiB/session",
+            "events KiB/session",
+            f"MiB for {report['sessions']} sessions",
+        ],
+    )
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    report = run_benchmark(
+        schema_sizes=[int(size) for size in FLAGS.schema_sizes],
+        sessions=FLAGS.sessions,
+        turns=FLAGS.turns,
+    )
+    print(f"{report['turns']} turns per session")
+    common.write_report(report, format_report(report), FLAGS.output)
+
+
+if __name__ == "__main__":
+    app.run(main)
@@ -0,0 +1,189 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark of the time to SQL of blocking and streamed ChaseSQL generation.
+
+`GeminiModel.call` runs against a simulated model that produces the worked
+answers of `DC_PROMPT_TEMPLATE` at a fixed token rate, optionally followed by
+an explanation after the SQL block. The blocking path waits for the whole
+response before parsing it; the streamed path (`stop_at_sql_block=True`)
+returns as soon as the SQL block is closed. Both must return the same SQL.
+
+Run from the `data-science` directory:
+
+    python -m benchmarks.streaming_sql --tokens_per_second=200 \\
+        --trailing_tokens=0,150
+"""
+
+import time
+import types
+
+from absl import app, flags
+
+from benchmarks import common
+
+common.set_default_env()
+
+# pylint: disable=g-import-not-at-top,wrong-import-position
+import numpy as np
+from tabulate import tabulate
+
+from data_science.sub_agents.bigquery.chase_sql import example_bank, llm_utils
+from data_science.sub_agents.bigquery.chase_sql.chase_db_tools import (
+    parse_response,
+)
+from data_science.sub_agents.bigquery.chase_sql.dc_prompt_template import (
+    DC_PROMPT_TEMPLATE,
+)
+from data_science.utils.utils import estimate_tokens
+
+# pylint: enable=g-import-not-at-top,wrong-import-position
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_float("tokens_per_second", 1000.0, "Simulated output token rate.")
+flags.DEFINE_float("first_token_ms", 200.0, "Simulated time to first token.")
+flags.DEFINE_integer("chunk_tokens", 20, "Tokens per streamed chunk.")
+flags.DEFINE_list(
+    "trailing_tokens", ["0", "150"], "Tokens of explanation after the SQL block."
+)
+flags.DEFINE_integer("repeats", 3, "Passes over the responses.")
+flags.DEFINE_string("output", None, "Path of the JSON report.")
+
+_EXPLANATION = (
+    "This query joins the relevant tables, filters the rows that match the "
+    "question and aggregates them, so it returns exactly the requested value. "
+)
+
+
+class SimulatedModel:
+    """Stands in for `GenerativeModel`, replying with `responses[prompt]`."""
+
+    def __init__(self, responses, tokens_per_second, first_token_ms, chunk_tokens):
+        self._responses = responses
+        self._seconds_per_char = 1 / (tokens_per_second * 4)
+        self._first_token_s = first_token_ms / 1000
+        self._chunk_chars = chunk_tokens * 4
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        del kwargs  # Unused.
+        text = self._responses[prompt]
+        if not stream:
+            time.sleep(self._first_token_s + len(text) * self._seconds_per_char)
+            return types.SimpleNamespace(text=text)
+        return self._stream(text)
+
+    def _stream(self, text):
+        time.sleep(self._first_token_s)
+        for start in range(0, len(text), self._chunk_chars):
+            chunk = text[start : start + self._chunk_chars]
+            time.sleep(len(chunk) * self._seconds_per_char)
+            yield types.SimpleNamespace(text=chunk)
+
+
+def load_responses(trailing_tokens: int) -> dict[str, str]:
+    """Returns the worked answers of the DC template, by example title."""
+    _, examples, _ = example_bank.split_template(DC_PROMPT_TEMPLATE)
+    explanation = ""
+    while estimate_tokens(explanation) < trailing_tokens:
+        explanation += _EXPLANATION
+    return {
+        example.text.splitlines()[0]: example.text.split("【Answer】", 1)[1].strip()
+        + ("\n\n" + explanation.strip() if explanation else "")
+        for example in examples
+    }
+
+
+def run_benchmark(
+    tokens_per_second, first_token_ms, chunk_tokens, trailing_tokens, repeats
+):
+    """Times both paths for each amount of trailing text; returns the report."""
+    model = llm_utils.GeminiModel()
+    results = []
+    for trailing in trailing_tokens:
+        responses = load_responses(trailing)
+        model.model = SimulatedModel(
+            responses, tokens_per_second, first_token_ms, chunk_tokens
+        )
+        timings = {"blocking": [], "streamed": []}
+        matches = 0
+        for _ in range(repeats):
+            for prompt in responses:
+                sql = {}
+                for path, stop in (("blocking", False), ("streamed", True)):
+                    start = time.perf_counter()
+                    sql[path] = model.call(
+                        prompt, parse_response, stop_at_sql_block=stop
+                    )
+                    timings[path].append((time.perf_counter() - start) * 1000)
+                matches += sql["blocking"] == sql["streamed"]
+        blocking = float(np.percentile(timings["blocking"], 50))
+        streamed = float(np.percentile(timings["streamed"], 50))
+        results.append(
+            {
+                "trailing_tokens": trailing,
+                "responses": len(timings["blocking"]),
+                "blocking_p50_ms": blocking,
+                "streamed_p50_ms": streamed,
+                "saving": 1 - streamed / blocking,
+                "same_sql": matches / len(timings["blocking"]),
+            }
+        )
+    return {
+        "config": {
+            "tokens_per_second": tokens_per_second,
+            "first_token_ms": first_token_ms,
+            "chunk_tokens": chunk_tokens,
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def format_report(report) -> str:
+    """Formats the report as a plain-text table."""
+    return tabulate(
+        [
+            [
+                result["trailing_tokens"],
+                f"{result['blocking_p50_ms']:.1f}",
+                f"{result['streamed_p50_ms']:.1f}",
+                f"{result['saving']:.1%}",
+                f"{result['same_sql']:.0%}",
+            ]
+            for result in report["results"]
+        ],
+        headers=[
+            "trailing tokens",
+            "blocking p50 ms",
+            "streamed p50 ms",
+            "saving",
+            "same SQL",
+        ],
+    )
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    report = run_benchmark(
+        FLAGS.tokens_per_second,
+        FLAGS.first_token_ms,
+        FLAGS.chunk_tokens,
+        [int(tokens) for tokens in FLAGS.trailing_tokens],
+        FLAGS.repeats,
+    )
+    common.write_report(report, format_report(report), FLAGS.output)
+
+
+if __name__ == "__main__":
+    app.run(main)
@@ -0,0 +1,189 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark of converting large CSV files for loading into BigQuery.
+
+Generates a synthetic CSV file of `--size_mb` and converts it to Parquet in a
+fresh process per method, reporting throughput (MB/s of CSV) and peak RSS:
+
+-   `pandas`: `pd.read_csv` of the whole file, then `to_parquet`.
+-   `table_loader`: `TableLoader`, which infers the schema from every part
+    and converts `--part_mb` parts with `--workers` threads. The load jobs go
+    to a client that only reads the Parquet parts, so no BigQuery quota is
+    used.
+
+Run from the `data-science` directory:
+
+    python -m benchmarks.table_loading --size_mb=2048
+"""
+
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from absl import app, flags
+
+from benchmarks import common
+
+common.set_default_env()
+
+# pylint: disable=g-import-not-at-top,wrong-import-position
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from data_science.utils.table_loader import TableLoader, TableSpec
+
+# pylint: enable=g-import-not-at-top,wrong-import-position
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_integer("size_mb", 2048, "Size of the generated CSV file in MB.")
+flags.DEFINE_integer("part_mb", 64, "CSV megabytes per TableLoader part.")
+flags.DEFINE_integer("workers", 4, "TableLoader conversion threads.")
+flags.DEFINE_list("methods", ["pandas", "table_loader"], "Methods to measure.")
+flags.DEFINE_string("csv_path", None, "Existing CSV file to use instead.")
+flags.DEFINE_string("output", None, "Path of the JSON report.")
+
+
+def generate_csv(path: str, size_mb: int, seed: int = 0) -> None:
+    """Writes a synthetic sales CSV file of about `size_mb` megabytes."""
+    rng = np.random.default_rng(seed)
+    rows = 200_000
+    with open(path, "w", encoding="utf-8") as f:
+        header = True
+        while f.tell() < size_mb * 1024 * 1024:
+            start = f.tell()
+            pd.DataFrame(
+                {
+                    "id": rng.integers(0, 10**9, rows),
+                    "date": pd.Timestamp("2020-01-01")
+                    + pd.to_timedelta(rng.integers(0, 1500, rows), unit="D"),
+                    "country": rng.choice(["Canada", "Finland", "Italy"], rows),
+                    "store": rng.choice(["Discount Stickers", "Premium"], rows),
+                    "num_sold": rng.integers(0, 5000, rows).astype(float),
+                    "is_promo": rng.random(rows) > 0.8,
+                }
+            ).to_csv(f, header=header, index=False, date_format="%Y-%m-%d")
+            header = False
+            if f.tell() == start:
+                break
+
+
+class NullClient:
+    """Client whose load jobs only read the Parquet file."""
+
+    project = "benchmark"
+
+    class _Job:
+        def result(self):
+            return self
+
+    def load_table_from_file(self, file_obj, destination, **kwargs):
+        del destination, kwargs  # Unused.
+        while file_obj.read(1 << 20):
+            pass
+        return self._Job()
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run(method: str, csv_path: str, work_dir: str, part_mb: int, workers: int):
+    """Converts the file with one method; runs in a fresh process."""
+    baseline_rss_mb = _peak_rss_mb()
+    start = time.perf_counter()
+    if method == "pandas":
+        pd.read_csv(csv_path).to_parquet(os.path.join(work_dir, "pandas.parquet"))
+    elif method == "table_loader":
+        TableLoader(
+            NullClient(),
+            os.path.join(work_dir, "staging"),
+            part_bytes=part_mb * 1024 * 1024,
+            max_workers=workers,
+        ).load(TableSpec(csv_path, "benchmark", "sales"))
+    else:
+        raise ValueError(f"Unknown method: {method}")
+    seconds = time.perf_counter() - start
+    size_mb = os.path.getsize(csv_path) / (1024 * 1024)
+    return {
+        "method": method,
+        "seconds": seconds,
+        "mb_per_s": size_mb / seconds,
+        "peak_rss_mb": _peak_rss_mb(),
+        "baseline_rss_mb": baseline_rss_mb,
+    }
+
+
+def run_benchmark(
+    methods: list[str],
+    size_mb: int,
+    part_mb: int,
+    workers: int,
+    csv_path: str | None = None,
+):
+    """Measures each method in its own process and returns the report."""
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as work_dir:
+        if csv_path is None:
+            csv_path = os.path.join(work_dir, "sales.csv")
+            generate_csv(csv_path, size_mb)
+        results = []
+        for method in methods:
+            with context.Pool(1) as pool:
+                results.append(
+                    pool.apply(_run, (method, csv_path, work_dir, part_mb, workers))
+                )
+        return {
+            "csv_mb": os.path.getsize(csv_path) / (1024 * 1024),
+            "part_mb": part_mb,
+            "workers": workers,
+            "results": results,
+        }
+
+
+def format_report(report) -> str:
+    """Formats the report as a plain-text table."""
+    return tabulate(
+        [
+            [
+                result["method"],
+                f"{result['seconds']:.1f}",
+                f"{result['mb_per_s']:.1f}",
+                f"{result['peak_rss_mb']:.0f}",
+                f"{result['baseline_rss_mb']:.0f}",
+            ]
+            for result in report["results"]
+        ],
+        headers=["method", "seconds", "MB/s", "peak RSS MB", "startup RSS MB"],
+    )
+
+
+def main(argv: list[str]) -> None:  # pylint: disable=unused-argument
+    report = run_benchmark(
+        methods=FLAGS.methods,
+        size_mb=FLAGS.size_mb,
+        part_mb=FLAGS.part_mb,
+        workers=FLAGS.workers,
+        csv_path=FLAGS.csv_path,
+    )
+    print(f"CSV file: {report['csv_mb']:.0f} MB")
+    common.write_report(report, format_report(report), FLAGS.output)
+
+
+if __name__ == "__main__":
+    app.run(main)
@@ -17,6 +17,7 @@
 -- it get data from database (e.g., BQ) using NL2SQL
 -- then, it use NL2Py to do further data analysis as needed
 """
+import functools
 import os
 from datetime import date
 
@@ -27,44 +28,78 @@ from google.adk.agents.callback_context import CallbackContext
 from google.adk.tools import load_artifacts
 
 from .sub_agents import bqml_agent
+from .sub_agents.analytics.agent import warm_up_code_executor
+from .sub_agents.bigquery import admission
 from .sub_agents.bigquery.tools import (
-    get_database_settings as get_bq_database_settings,
+    get_catalog as get_bq_catalog,
+    get_ddl_schema as get_bq_ddl_schema,
+    sync_database_settings as sync_bq_database_settings,
 )
 from .prompts import return_instructions_root
-from .tools import call_db_agent, call_ds_agent
+from .tools import call_db_agent, call_db_agents_pipelined, call_ds_agent
+from .utils import cassette
+from .utils.instructions import SchemaInstructionProvider
+from .utils.tools import precompiled
 
-date_today = date.today()
+# `DATA_SCIENCE_TODAY` pins the date, so that replayed LLM cassettes match.
+date_today = (
+    date.fromisoformat(os.environ["DATA_SCIENCE_TODAY"])
+    if os.getenv("DATA_SCIENCE_TODAY")
+    else date.today()
+)
 
 
 def setup_before_agent_call(callback_context: CallbackContext):
     """Setup the agent."""
 
     # setting up database settings in session.state
-    if "database_settings" not in callback_context.state:
+    if "all_db_settings" not in callback_context.state:
         db_settings = dict()
         db_settings["use_database"] = "BigQuery"
         callback_context.state["all_db_settings"] = db_settings
+        # A new session will need a code execution worker of its own.
+        warm_up_code_executor()
+        # Keyed before any sub-agent runs, as those get a copy of the state.
+        admission.session_key(callback_context.state)
 
-    # setting up schema in instruction
+    # setting up schema in session.state; the instruction provider renders it
     if callback_context.state["all_db_settings"]["use_database"] == "BigQuery":
-        callback_context.state["database_settings"] = get_bq_database_settings()
-        schema = callback_context.state["database_settings"]["bq_ddl_schema"]
+        sync_bq_database_settings(callback_context.state)
+
+
+def return_instructions_root_with_catalog() -> str:
+    """Root instructions, listing the datasets if the catalog has several."""
+    catalog = get_bq_catalog()
+    if len(catalog.datasets) == 1:
+        return return_instructions_root()
+    return (
+        return_instructions_root()
+        + f"""
+
+    --------- The BigQuery datasets you can query. ---------
+    {catalog.describe()}
+    """
+    )
 
-        callback_context._invocation_context.agent.instruction = (
-            return_instructions_root()
-            + f"""
+
+root_instruction = SchemaInstructionProvider(
+    return_instructions_root_with_catalog,
+    """
 
     --------- The BigQuery schema of the relevant data with a few sample rows. ---------
     {schema}
 
-    """
-        )
+    """,
+    functools.partial(
+        get_bq_ddl_schema, schema_format=os.getenv("ROOT_AGENT_SCHEMA_FORMAT", "ddl")
+    ),
+)
 
 
 root_agent = Agent(
     model=os.getenv("ROOT_AGENT_MODEL"),
     name="db_ds_multiagent",
-    instruction=return_instructions_root(),
+    instruction=root_instruction,
     global_instruction=(
         f"""
         You are a Data Science and Data Analytics Multi Agent System.
@@ -73,10 +108,11 @@ root_agent = Agent(
     ),
     sub_agents=[bqml_agent],
     tools=[
-        call_db_agent,
-        call_ds_agent,
+        *precompiled(call_db_agent, call_db_agents_pipelined, call_ds_agent),
         load_artifacts,
     ],
     before_agent_callback=setup_before_agent_call,
+    before_model_callback=cassette.before_model_callback,
+    after_model_callback=cassette.after_model_callback,
     generate_content_config=types.GenerateContentConfig(temperature=0.01),
 )
@@ -41,7 +41,9 @@ def return_instructions_root() -> str:
 
         # 2. **Retrieve Data TOOL (`call_db_agent` - if applicable):**  If you need to query the database, use this tool. Make sure to provide a proper query to it to fulfill the task.
 
-        # 3. **Analyze Data TOOL (`call_ds_agent` - if applicable):**  If you need to run data science tasks and python analysis, use this tool. Make sure to provide a proper query to it to fulfill the task.
+        # 3. **Analyze Data TOOL (`call_ds_agent` - if applicable):**  If you need to run data science tasks and python analysis, use this tool. Make sure to provide a proper query to it to fulfill the task. Set `full_result` to true if the analysis needs every row of the last query's result (e.g. plots or models over many rows), not just the rows returned by `call_db_agent`.
+
+        # 3a. **Multi-part Questions TOOL (`call_db_agents_pipelined` - if applicable):**  If the question needs several INDEPENDENT queries (e.g. the same metric for different tables, periods or segments), decompose it into self-contained sub-questions and pass them together to this tool instead of calling `call_db_agent` repeatedly. The queries run concurrently, and `analysis_question` (or "N/A") is applied to each sub-question's data as soon as it is retrieved. Afterwards `call_ds_agent` can analyze the data of all sub-questions together.
 
         # 4a. **BigQuery ML Tool (`call_bqml_agent` - if applicable):**  If the user specifically asks (!) for BigQuery ML, use this tool. Make sure to provide a proper query to it to fulfill the task, along with the dataset and project ID, and context. 
 
@@ -56,6 +58,7 @@ def return_instructions_root() -> str:
         #   * **Greeting/Out of Scope:** answer directly.
         #   * **SQL Query:** `call_db_agent`. Once you return the answer, provide additional explanations.
         #   * **SQL & Python Analysis:** `call_db_agent`, then `call_ds_agent`. Once you return the answer, provide additional explanations.
+        #   * **Independent SQL Queries (& Python Analysis):** `call_db_agents_pipelined`. Once you return the answer, provide additional explanations.
         #   * **BQ ML `call_bqml_agent`:** Query the BQ ML Agent if the user asks for it. Ensure that:
         #   A. You provide the fitting query.
         #   B. You pass the project and dataset ID.
@@ -101,7 +104,7 @@ def return_instructions_root() -> str:
 
     # 2. **Retrieve Data TOOL (`call_db_agent` - if applicable):**  If you need to query the database, use this tool. Make sure to provide a proper query to it to fulfill the task.
 
-    # 3. **Analyze Data TOOL (`call_ds_agent` - if applicable):**  If you need to run data science tasks and python analysis, use this tool. Make sure to provide a proper query to it to fulfill the task.
+    # 3. **Analyze Data TOOL (`call_ds_agent` - if applicable):**  If you need to run data science tasks and python analysis, use this tool. Make sure to provide a proper query to it to fulfill the task. Set `full_result` to true if the analysis needs every row of the last query's result (e.g. plots or models over many rows), not just the rows returned by `call_db_agent`.
 
     # 4a. **BigQuery ML Tool (`call_bqml_agent` - if applicable):**  If the user specifically asks (!) for BigQuery ML, use this tool. Make sure to provide a proper query to it to fulfill the task, along with the dataset and project ID, and context. 
 
@@ -148,7 +151,7 @@ def return_instructions_root() -> str:
 
         2. **Retrieve Data TOOL (`call_db_agent` - if applicable):**  If you need to query the database, use this tool. Make sure to provide a proper query to it to fulfill the task.
 
-        3. **Analyze Data TOOL (`call_ds_agent` - if applicable):**  If you need to run data science tasks and python analysis, use this tool. Make sure to provide a proper query to it to fulfill the task.
+        3. **Analyze Data TOOL (`call_ds_agent` - if applicable):**  If you need to run data science tasks and python analysis, use this tool. Make sure to provide a proper query to it to fulfill the task. Set `full_result` to true if the analysis needs every row of the last query's result (e.g. plots or models over many rows), not just the rows returned by `call_db_agent`.
 
         4a. **BigQuery ML Tool (`call_bqml_agent` - if applicable):**  If the user specifically asks (!) for BigQuery ML, use this tool. Make sure to provide a proper query to it to fulfill the task, along with the dataset and project ID, and context. Once this is done, check back the plan with the user before proceeding.
             If the user accepts the plan, call this tool again so it can execute.
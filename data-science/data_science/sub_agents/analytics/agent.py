@@ -16,15 +16,44 @@
 import os
 from google.adk.code_executors import VertexAiCodeExecutor
 from google.adk.agents import Agent
+from data_science.utils import cassette
+
+from .local_executor import LocalProcessCodeExecutor
 from .prompts import return_instructions_ds
 
 
+def _code_executor():
+    """Returns the executor named by ANALYTICS_CODE_EXECUTOR."""
+    if os.getenv("ANALYTICS_CODE_EXECUTOR", "vertex") == "local":
+        return LocalProcessCodeExecutor(
+            optimize_data_file=True,
+            stateful=True,
+        )
+    return VertexAiCodeExecutor(
+        optimize_data_file=True,
+        stateful=True,
+    )
+
+
+code_executor = _code_executor()
+
+
+def reads_local_files() -> bool:
+    """Whether the code executor runs on this machine and can read its files."""
+    return isinstance(code_executor, LocalProcessCodeExecutor)
+
+
+def warm_up_code_executor() -> None:
+    """Forks the local executor's workers ahead of the first analysis."""
+    if isinstance(code_executor, LocalProcessCodeExecutor):
+        code_executor.warm_up()
+
+
 root_agent = Agent(
     model=os.getenv("ANALYTICS_AGENT_MODEL"),
     name="data_science_agent",
     instruction=return_instructions_ds(),
-    code_executor=VertexAiCodeExecutor(
-        optimize_data_file=True,
-        stateful=True,
-    ),
+    code_executor=code_executor,
+    before_model_callback=cassette.before_model_callback,
+    after_model_callback=cassette.after_model_callback,
 )
@@ -0,0 +1,325 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local code executor backed by warm, pre-forked worker processes.
+
+`LocalProcessCodeExecutor` runs the analytics agent's code on this machine
+instead of the Vertex AI Code Interpreter extension. A template process
+(`local_worker.py`) imports pandas, NumPy and matplotlib once and forks a
+worker per session, so executing a small snippet costs a round trip over a
+local connection rather than an interpreter start and the imports.
+
+Each session (the ADK `execution_id`) gets its own worker: variables persist
+between the executions of a session and are invisible to other sessions.
+Workers run with a CPU time limit per execution, an address-space limit and
+a wall-clock timeout, and every matplotlib figure left open by the code is
+returned as a PNG output file, which ADK saves as an artifact.
+
+The limits guard against runaway analyses, not hostile code: workers run as
+the agent's user with its file system and network access. POSIX only.
+"""
+
+import base64
+import collections
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection, Listener
+from typing import Optional
+
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.code_executors import BaseCodeExecutor
+from google.adk.code_executors.code_execution_utils import (
+    CodeExecutionInput,
+    CodeExecutionResult,
+    File,
+)
+from pydantic import PrivateAttr
+
+from ...utils import tracing
+
+logger = logging.getLogger(__name__)
+
+_WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "local_worker.py")
+
+
+class _Worker:
+    """A forked worker process and its connection."""
+
+    def __init__(self, conn: Connection, pid: int, workdir: str):
+        self.conn = conn
+        self.pid = pid
+        self.workdir = workdir
+        self.lock = threading.Lock()
+        self.sent_files: set[str] = set()
+
+    def kill(self) -> None:
+        self.conn.close()
+        try:
+            os.killpg(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class WorkerPool:
+    """Keeps `size` idle workers forked from a warm template process."""
+
+    def __init__(self, size: int, memory_limit_mb: int):
+        self._size = size
+        self._memory_limit_mb = memory_limit_mb
+        self._lock = threading.Lock()
+        self._fork_lock = threading.Lock()
+        self._idle: collections.deque[_Worker] = collections.deque()
+        self._template: Optional[subprocess.Popen] = None
+        self._listener: Optional[Listener] = None
+        self._refilling = False
+        self._closed = False
+
+    def _start_template(self) -> None:
+        authkey = os.urandom(32)
+        self._listener = Listener(family="AF_UNIX", authkey=authkey)
+        env = dict(
+            os.environ, LOCAL_WORKER_AUTHKEY=base64.b64encode(authkey).decode()
+        )
+        self._template = subprocess.Popen(
+            [
+                sys.executable,
+                _WORKER_SCRIPT,
+                self._listener.address,
+                str(self._memory_limit_mb),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=env,
+            text=True,
+        )
+        if self._template.stdout.readline().strip() != "ready":
+            raise RuntimeError("The worker template process failed to start.")
+        logger.info("Started worker template process %d.", self._template.pid)
+
+    def _fork(self) -> _Worker:
+        with self._fork_lock:
+            if self._closed:
+                raise RuntimeError("The worker pool is closed.")
+            if self._template is None or self._template.poll() is not None:
+                self._start_template()
+            self._template.stdin.write("fork\n")
+            self._template.stdin.flush()
+            conn = self._listener.accept()
+            pid, workdir = conn.recv()
+        return _Worker(conn, pid, workdir)
+
+    def _refill(self) -> None:
+        try:
+            while True:
+                with self._lock:
+                    if self._closed or len(self._idle) >= self._size:
+                        return
+                worker = self._fork()
+                with self._lock:
+                    if not self._closed:
+                        self._idle.append(worker)
+                        continue
+                worker.kill()
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Failed to fork a worker.")
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def refill_in_background(self) -> None:
+        """Forks workers up to the pool size without blocking the caller."""
+        with self._lock:
+            if self._refilling or self._closed:
+                return
+            self._refilling = True
+        threading.Thread(target=self._refill, daemon=True).start()
+
+    def acquire(self) -> _Worker:
+        """Returns an idle worker, forking one if none is ready."""
+        with self._lock:
+            worker = self._idle.popleft() if self._idle else None
+        self.refill_in_background()
+        return worker or self._fork()
+
+    def close(self) -> None:
+        """Kills the idle workers and the template process."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = list(self._idle), collections.deque()
+        for worker in idle:
+            worker.kill()
+        with self._fork_lock:
+            if self._template is not None:
+                self._template.kill()
+                self._template.wait()
+                self._template.stdin.close()
+                self._template.stdout.close()
+            if self._listener is not None:
+                self._listener.close()
+
+
+def _content_bytes(file: File) -> bytes:
+    # ADK passes input files base64-encoded.
+    if isinstance(file.content, bytes):
+        return file.content
+    return base64.b64decode(file.content)
+
+
+class LocalProcessCodeExecutor(BaseCodeExecutor):
+    """Executes code in warm local worker processes, one per session.
+
+    The workers are not isolated from the host; see the module docstring.
+    """
+
+    stateful: bool = True
+    optimize_data_file: bool = True
+
+    pool_size: int = 2
+    """Number of idle workers kept ready for new sessions."""
+
+    max_sessions: int = 32
+    """Number of session workers kept; the least recently used is killed."""
+
+    memory_limit_mb: int = 4096
+    """Address-space limit of each worker (0 for none)."""
+
+    cpu_time_limit_seconds: int = 30
+    """CPU time limit of each execution."""
+
+    timeout_seconds: int = 60
+    """Wall-clock limit of each execution; the worker is killed after it."""
+
+    _pool: Optional[WorkerPool] = PrivateAttr(default=None)
+    _sessions: collections.OrderedDict = PrivateAttr(
+        default_factory=collections.OrderedDict
+    )
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def _get_pool(self) -> WorkerPool:
+        with self._lock:
+            if self._pool is None:
+                self._pool = WorkerPool(self.pool_size, self.memory_limit_mb)
+            return self._pool
+
+    def warm_up(self) -> None:
+        """Starts the template process and forks idle workers in the background."""
+        self._get_pool().refill_in_background()
+
+    def _session_worker(self, execution_id: Optional[str]) -> tuple[_Worker, bool]:
+        """Returns the worker of a session and whether it was reused."""
+        if execution_id is not None:
+            with self._lock:
+                worker = self._sessions.get(execution_id)
+                if worker is not None:
+                    self._sessions.move_to_end(execution_id)
+                    return worker, True
+        worker = self._get_pool().acquire()
+        if execution_id is not None:
+            evicted = []
+            with self._lock:
+                self._sessions[execution_id] = worker
+                while len(self._sessions) > self.max_sessions:
+                    evicted.append(self._sessions.popitem(last=False)[1])
+            for old in evicted:
+                old.kill()
+        return worker, False
+
+    def _discard(self, execution_id: Optional[str], worker: _Worker) -> None:
+        with self._lock:
+            if self._sessions.get(execution_id) is worker:
+                del self._sessions[execution_id]
+        worker.kill()
+
+    def _run(self, worker: _Worker, code_execution_input: CodeExecutionInput):
+        files = [
+            (file.name, _content_bytes(file))
+            for file in code_execution_input.input_files
+            if file.name not in worker.sent_files
+        ]
+        worker.conn.send(
+            {
+                "code": code_execution_input.code,
+                "input_files": files,
+                "cpu_time_limit_seconds": self.cpu_time_limit_seconds,
+            }
+        )
+        worker.sent_files.update(name for name, _ in files)
+        if not worker.conn.poll(self.timeout_seconds):
+            raise TimeoutError
+        return worker.conn.recv()
+
+    def execute_code(
+        self,
+        invocation_context: InvocationContext,
+        code_execution_input: CodeExecutionInput,
+    ) -> CodeExecutionResult:
+        del invocation_context  # Unused.
+        execution_id = code_execution_input.execution_id if self.stateful else None
+        start = time.perf_counter()
+        with tracing.span("local_executor.execute_code") as span:
+            worker, reused = self._session_worker(execution_id)
+            tracing.set_attributes(span, **{"local_executor.session_reused": reused})
+            with worker.lock:
+                try:
+                    result = self._run(worker, code_execution_input)
+                except TimeoutError:
+                    self._discard(execution_id, worker)
+                    return CodeExecutionResult(
+                        stderr="Code execution timed out after "
+                        f"{self.timeout_seconds} seconds; the session's "
+                        "variables were lost.",
+                        exit_code=1,
+                    )
+                except (EOFError, OSError):
+                    self._discard(execution_id, worker)
+                    return CodeExecutionResult(
+                        stderr="The code execution process exited unexpectedly "
+                        f"(the memory limit is {self.memory_limit_mb} MB); "
+                        "the session's variables were lost.",
+                        exit_code=1,
+                    )
+            if execution_id is None:
+                self._discard(None, worker)
+            logger.debug(
+                "Executed code in %.1f ms.", (time.perf_counter() - start) * 1000
+            )
+        return CodeExecutionResult(
+            stdout=result["stdout"],
+            stderr=result["stderr"],
+            exit_code=result["exit_code"],
+            output_files=[
+                File(name=name, content=content, mime_type=mime_type)
+                for name, content, mime_type in result["output_files"]
+            ],
+        )
+
+    def close(self) -> None:
+        """Kills every worker and the template process."""
+        with self._lock:
+            sessions, self._sessions = (
+                list(self._sessions.values()),
+                collections.OrderedDict(),
+            )
+            pool, self._pool = self._pool, None
+        for worker in sessions:
+            worker.kill()
+        if pool is not None:
+            pool.close()
@@ -0,0 +1,175 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Template process of `LocalProcessCodeExecutor`.
+
+Run as a script, so that it does not import the `data_science` package:
+
+    python local_worker.py <listener address> [<memory limit in MB>]
+
+with the connection authentication key in `LOCAL_WORKER_AUTHKEY`. The
+template imports pandas, NumPy and matplotlib once, then reads commands from
+stdin: every `fork` line forks a worker that inherits the imported modules,
+connects back to the listener and executes code for one session until its
+connection closes.
+"""
+
+import base64
+import contextlib
+import io
+import math
+import os
+import re
+import resource
+import signal
+import sys
+import tempfile
+import traceback
+from multiprocessing.connection import Client
+
+# Fork safety: BLAS thread pools must not be running when the template forks.
+for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(variable, "1")
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+# pylint: disable=g-import-not-at-top,wrong-import-position,unused-import
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+try:
+    import scipy
+except ImportError:
+    scipy = None
+
+# pylint: enable=g-import-not-at-top,wrong-import-position,unused-import
+
+
+class CpuTimeExceeded(Exception):
+    """Raised in the executed code when it exceeds its CPU time."""
+
+
+def _raise_cpu_time_exceeded(signum, frame):  # pylint: disable=unused-argument
+    raise CpuTimeExceeded("CPU time limit exceeded.")
+
+
+def _set_cpu_limit(seconds):
+    used = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(used.ru_utime + used.ru_stime)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (used + seconds, hard))
+
+
+def _figures(counter):
+    """Returns every open matplotlib figure as a PNG file, then closes them."""
+    files = []
+    for number in plt.get_fignums():
+        buffer = io.BytesIO()
+        plt.figure(number).savefig(buffer, format="png", bbox_inches="tight")
+        counter[0] += 1
+        files.append((f"plot_{counter[0]}.png", buffer.getvalue(), "image/png"))
+    plt.close("all")
+    return files
+
+
+def _execute(request, namespace, counter):
+    for name, content in request.get("input_files", []):
+        with open(os.path.basename(name), "wb") as f:
+            f.write(content)
+    stdout, stderr = io.StringIO(), io.StringIO()
+    exit_code = 0
+    _set_cpu_limit(request["cpu_time_limit_seconds"])
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            exec(compile(request["code"], "<code>", "exec"), namespace)  # pylint: disable=exec-used
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except BaseException as e:  # pylint: disable=broad-exception-caught
+        exit_code = 1
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next, file=stderr)
+    finally:
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+    try:
+        files = _figures(counter)
+    except Exception:  # pylint: disable=broad-exception-caught
+        files = []
+        stderr.write(traceback.format_exc())
+    # As for `UnsafeLocalCodeExecutor`, stderr marks a failed execution, so
+    # warnings of a successful one are dropped.
+    return {
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue() if exit_code else "",
+        "exit_code": exit_code,
+        "output_files": files,
+    }
+
+
+def _serve(address, authkey, memory_limit_mb):
+    """Executes the code of one session; runs in a forked worker."""
+    os.setsid()
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.signal(signal.SIGXCPU, _raise_cpu_time_exceeded)
+    if memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    workdir = tempfile.mkdtemp(prefix="analytics_session_")
+    os.chdir(workdir)
+    sys.stdin.close()
+    conn = Client(address, authkey=authkey)
+    conn.send((os.getpid(), workdir))
+    # The libraries the analytics agent's instructions say are imported.
+    namespace = {
+        "__name__": "__main__",
+        "io": io,
+        "math": math,
+        "re": re,
+        "plt": plt,
+        "np": np,
+        "pd": pd,
+    }
+    if scipy is not None:
+        namespace["scipy"] = scipy
+    counter = [0]
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        conn.send(_execute(request, namespace, counter))
+
+
+def main():
+    address = sys.argv[1]
+    authkey = base64.b64decode(os.environ.pop("LOCAL_WORKER_AUTHKEY"))
+    memory_limit_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    # Forked workers are reaped automatically.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    sys.stdout.write("ready\n")
+    sys.stdout.flush()
+    for command in sys.stdin:
+        if command.strip() != "fork":
+            continue
+        if os.fork() == 0:
+            try:
+                _serve(address, authkey, memory_limit_mb)
+            finally:
+                os._exit(0)  # pylint: disable=protected-access
+
+
+if __name__ == "__main__":
+    main()
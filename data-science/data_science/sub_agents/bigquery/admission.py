@@ -0,0 +1,336 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Admission control of the BigQuery jobs of all sessions.
+
+Interactive NL2SQL queries, bulk exports for the data science agent and
+BigQuery ML training jobs share the slots and the concurrent query quota of
+the project, and a single session can start many heavy jobs at once.
+`AdmissionController.admit` runs a job only when it fits in:
+
+-   `max_concurrent` jobs in total,
+-   `max_per_session` jobs of its session,
+-   `max_per_priority` jobs of its priority class.
+
+Jobs that do not fit wait in a queue, the most urgent priority class first
+(`INTERACTIVE` > `ANALYTICS` > `TRAINING`) and in arrival order within a
+class. A waiting job that cannot run, e.g. because its session is at its cap,
+does not hold back the jobs behind it. A job still waiting at its deadline
+raises `AdmissionTimeout`. A cap of 0 disables it. `admit` blocks its thread
+while waiting; `admit_async` waits without blocking the event loop.
+
+Sessions are keyed by an ID kept in the session state (see `session_key`),
+since sub-agents run in sessions of their own with a copy of the state.
+"""
+
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import itertools
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from data_science.utils import tracing
+
+INTERACTIVE = "interactive"
+ANALYTICS = "analytics"
+TRAINING = "training"
+
+# Priority classes, the most urgent first.
+PRIORITIES = (INTERACTIVE, ANALYTICS, TRAINING)
+
+# Seconds a job of each priority class waits for admission by default.
+DEFAULT_TIMEOUTS = {INTERACTIVE: 60.0, ANALYTICS: 300.0, TRAINING: 1800.0}
+
+# Queue times kept per priority class for the percentiles of `stats()`.
+MAX_QUEUE_SAMPLES = 1000
+
+STATE_KEY = "admission_session"
+
+
+class AdmissionTimeout(TimeoutError):
+    """A job was not admitted before its deadline."""
+
+
+def session_key(state) -> str:
+    """Returns the admission key of a session, stored in its state."""
+    if not state.get(STATE_KEY):
+        state[STATE_KEY] = uuid.uuid4().hex
+    return state[STATE_KEY]
+
+
+@dataclasses.dataclass
+class Admission:
+    """An admitted job.
+
+    Attributes:
+        session: Key of the job's session.
+        priority: Priority class of the job.
+        queue_seconds: Time the job waited for admission.
+    """
+
+    session: str
+    priority: str
+    queue_seconds: float
+
+
+@dataclasses.dataclass
+class _Waiter:
+    rank: int
+    seq: int
+    session: str
+    priority: str
+    # Wakes an `admit_async` waiter up once admitted.
+    wake: Optional[Callable[[], None]] = None
+    admitted: bool = False
+
+
+def _percentile(values: list[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class AdmissionController:
+    """Thread-safe admission queue of BigQuery jobs."""
+
+    def __init__(
+        self,
+        max_concurrent: int = 10,
+        max_per_session: int = 4,
+        max_per_priority: Optional[dict[str, int]] = None,
+        timeouts: Optional[dict[str, float]] = None,
+    ):
+        """Initializes the controller.
+
+        Args:
+            max_concurrent: Maximum number of jobs running at once.
+            max_per_session: Maximum number of jobs of a session running at
+                once.
+            max_per_priority: Maximum number of jobs running at once per
+                priority class; classes not listed are only capped by
+                `max_concurrent`.
+            timeouts: Seconds a job waits for admission per priority class;
+                defaults to `DEFAULT_TIMEOUTS`.
+        """
+        self.max_concurrent = max_concurrent
+        self.max_per_session = max_per_session
+        self.max_per_priority = dict(max_per_priority or {})
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self._condition = threading.Condition()
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._running = 0
+        self._running_sessions = collections.Counter()
+        self._running_priorities = collections.Counter()
+        self._counters = collections.Counter()
+        self._queue_seconds = {
+            priority: collections.deque(maxlen=MAX_QUEUE_SAMPLES)
+            for priority in PRIORITIES
+        }
+
+    def _fits(self, waiter: _Waiter) -> bool:
+        session_cap = self.max_per_session
+        priority_cap = self.max_per_priority.get(waiter.priority)
+        return (
+            not session_cap or self._running_sessions[waiter.session] < session_cap
+        ) and (
+            not priority_cap
+            or self._running_priorities[waiter.priority] < priority_cap
+        )
+
+    def _dispatch(self) -> None:
+        """Admits the waiting jobs that fit, the most urgent first."""
+        admitted = False
+        for waiter in sorted(self._waiters, key=lambda w: (w.rank, w.seq)):
+            if self.max_concurrent and self._running >= self.max_concurrent:
+                break
+            if self._fits(waiter):
+                waiter.admitted = True
+                self._waiters.remove(waiter)
+                self._running += 1
+                self._running_sessions[waiter.session] += 1
+                self._running_priorities[waiter.priority] += 1
+                admitted = True
+                if waiter.wake:
+                    waiter.wake()
+        if admitted:
+            self._condition.notify_all()
+
+    def _release(self, waiter: _Waiter) -> None:
+        with self._condition:
+            self._running -= 1
+            self._running_sessions[waiter.session] -= 1
+            if not self._running_sessions[waiter.session]:
+                del self._running_sessions[waiter.session]
+            self._running_priorities[waiter.priority] -= 1
+            self._dispatch()
+
+    def _enqueue(
+        self,
+        session: str,
+        priority: str,
+        wake: Optional[Callable[[], None]] = None,
+    ) -> _Waiter:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority class: {priority}")
+        waiter = _Waiter(
+            PRIORITIES.index(priority), next(self._seq), session, priority, wake
+        )
+        with self._condition:
+            self._waiters.append(waiter)
+            self._dispatch()
+        return waiter
+
+    def _withdraw(self, waiter: _Waiter) -> bool:
+        """Removes a job that stopped waiting, called with the lock held.
+
+        Returns:
+            False if the job was admitted in the meantime.
+        """
+        if waiter.admitted:
+            return False
+        self._waiters.remove(waiter)
+        # Jobs behind this one may fit now.
+        self._dispatch()
+        return True
+
+    def _timed_out(self, waiter: _Waiter, timeout: float) -> AdmissionTimeout:
+        self._counters[f"{waiter.priority}_timed_out"] += 1
+        return AdmissionTimeout(
+            f"No BigQuery capacity for this {waiter.priority} job within"
+            f" {timeout:.0f}s; other queries are running."
+        )
+
+    def _admitted(self, waiter: _Waiter, start: float) -> Admission:
+        with self._condition:
+            queue_seconds = time.perf_counter() - start
+            self._counters[f"{waiter.priority}_admitted"] += 1
+            self._queue_seconds[waiter.priority].append(queue_seconds)
+        tracing.set_attributes(
+            tracing.current_span(),
+            **{"bq.priority": waiter.priority, "bq.queue_seconds": queue_seconds},
+        )
+        return Admission(waiter.session, waiter.priority, queue_seconds)
+
+    @contextlib.contextmanager
+    def admit(
+        self,
+        session: str,
+        priority: str = INTERACTIVE,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Admission]:
+        """Waits until a job may run, and runs the body as that job.
+
+        Records the priority and queue time in the current span.
+
+        Args:
+            session: Key of the job's session, see `session_key`.
+            priority: One of `PRIORITIES`.
+            timeout: Seconds to wait for admission; defaults to the timeout of
+                the priority class.
+
+        Yields:
+            Admission: The admitted job.
+
+        Raises:
+            AdmissionTimeout: The job was not admitted within the timeout.
+            ValueError: Unknown priority class.
+        """
+        start = time.perf_counter()
+        waiter = self._enqueue(session, priority)
+        if timeout is None:
+            timeout = self.timeouts[priority]
+        deadline = start + timeout
+        with self._condition:
+            while not waiter.admitted:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._withdraw(waiter)
+                    raise self._timed_out(waiter, timeout)
+                self._condition.wait(remaining)
+        try:
+            yield self._admitted(waiter, start)
+        finally:
+            self._release(waiter)
+
+    @contextlib.asynccontextmanager
+    async def admit_async(
+        self,
+        session: str,
+        priority: str = INTERACTIVE,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Admission]:
+        """Like `admit`, but waits without blocking the event loop.
+
+        A cancelled wait leaves the queue, and gives its slot back if it was
+        admitted in the meantime.
+        """
+        loop = asyncio.get_running_loop()
+        admitted = asyncio.Event()
+        start = time.perf_counter()
+        waiter = self._enqueue(
+            session, priority, lambda: loop.call_soon_threadsafe(admitted.set)
+        )
+        if timeout is None:
+            timeout = self.timeouts[priority]
+        try:
+            await asyncio.wait_for(admitted.wait(), timeout)
+        except asyncio.TimeoutError:
+            with self._condition:
+                if self._withdraw(waiter):
+                    raise self._timed_out(waiter, timeout) from None
+        except BaseException:
+            with self._condition:
+                withdrawn = self._withdraw(waiter)
+            if not withdrawn:
+                self._release(waiter)
+            raise
+        try:
+            yield self._admitted(waiter, start)
+        finally:
+            self._release(waiter)
+
+    def stats(self) -> dict[str, Any]:
+        """Returns the running and waiting jobs and the queue times.
+
+        Returns:
+            The number of running jobs and, per priority class, the jobs
+            running and waiting, the counts of admitted and timed out jobs,
+            and the median, 95th percentile and maximum queue times of the
+            last `MAX_QUEUE_SAMPLES` admitted jobs.
+        """
+        with self._condition:
+            stats: dict[str, Any] = {
+                "running": self._running,
+                "sessions": len(self._running_sessions),
+            }
+            for priority in PRIORITIES:
+                samples = list(self._queue_seconds[priority])
+                stats[priority] = {
+                    "running": self._running_priorities[priority],
+                    "waiting": sum(
+                        waiter.priority == priority for waiter in self._waiters
+                    ),
+                    "admitted": self._counters[f"{priority}_admitted"],
+                    "timed_out": self._counters[f"{priority}_timed_out"],
+                    "queue_p50_seconds": _percentile(samples, 0.5),
+                    "queue_p95_seconds": _percentile(samples, 0.95),
+                    "queue_max_seconds": max(samples, default=None),
+                }
+            return stats
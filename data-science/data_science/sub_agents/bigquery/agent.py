@@ -20,33 +20,37 @@ from google.adk.agents import Agent
 from google.adk.agents.callback_context import CallbackContext
 from google.genai import types
 
+from data_science.utils import cassette
+from data_science.utils.tools import precompiled
+
 from . import tools
-from .chase_sql import chase_db_tools
 from .prompts import return_instructions_bigquery
 
 NL2SQL_METHOD = os.getenv("NL2SQL_METHOD", "BASELINE")
 
+if NL2SQL_METHOD == "CHASE":
+    # ChaseSQL pulls in the Vertex AI SDK and large prompt templates, so it is
+    # only imported when selected.
+    from .chase_sql import chase_db_tools  # pylint: disable=g-import-not-at-top
+
+    nl2sql_tool = chase_db_tools.initial_bq_nl2sql
+else:
+    nl2sql_tool = tools.initial_bq_nl2sql
+
 
 def setup_before_agent_call(callback_context: CallbackContext) -> None:
     """Setup the agent."""
 
-    if "database_settings" not in callback_context.state:
-        callback_context.state["database_settings"] = \
-            tools.get_database_settings()
+    tools.sync_database_settings(callback_context.state)
 
 
 database_agent = Agent(
     model=os.getenv("BIGQUERY_AGENT_MODEL"),
     name="database_agent",
     instruction=return_instructions_bigquery(),
-    tools=[
-        (
-            chase_db_tools.initial_bq_nl2sql
-            if NL2SQL_METHOD == "CHASE"
-            else tools.initial_bq_nl2sql
-        ),
-        tools.run_bigquery_validation,
-    ],
+    tools=precompiled(nl2sql_tool, tools.run_bigquery_validation),
     before_agent_callback=setup_before_agent_call,
+    before_model_callback=cassette.before_model_callback,
+    after_model_callback=cassette.after_model_callback,
     generate_content_config=types.GenerateContentConfig(temperature=0.01),
 )
@@ -0,0 +1,559 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pluggable SQL backends behind `tools.get_bq_client()`.
+
+The `bigquery` backend is the real `google.cloud.bigquery.Client`. The `local`
+backend is an in-process SQLite database seeded from CSV files, which serves
+the subset of the client API used by the agents (`list_tables`, `get_table`,
+`list_rows`, `query` and `list_models`). BigQuery SQL is transpiled to SQLite
+with sqlglot, so generated queries can be validated and benchmarked offline
+without spending BigQuery quota.
+
+Bulk exports read query results through the BigQuery Storage Read API
+(`StorageReadClient`), or, locally, from `LocalReadClient`, which serves the
+local tables as Arrow streams in the same way.
+
+Select the backend with `BQ_BACKEND=bigquery|local`. The local backend reads
+CSV files from `BQ_LOCAL_DATA_DIR`: files at the top level are loaded as
+tables of `BQ_DATASET_ID`, files in sub-directories as tables of a dataset
+named after the sub-directory.
+"""
+
+import os
+import pathlib
+import re
+import sqlite3
+import threading
+import uuid
+from typing import Any, Callable, Iterator, Protocol
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import sqlglot
+from google.api_core import exceptions
+from google.cloud import bigquery
+
+DEFAULT_DATA_DIR = pathlib.Path(__file__).parents[2] / "utils" / "data"
+
+# Dataset of the anonymous tables holding query results, and how many of the
+# most recent results are kept.
+ANONYMOUS_DATASET = "_local_results"
+MAX_ANONYMOUS_TABLES = 100
+
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+# Arrow types of the local field types; dates are stored as ISO strings.
+_ARROW_TYPES = {
+    "BOOLEAN": pa.bool_(),
+    "INTEGER": pa.int64(),
+    "FLOAT": pa.float64(),
+}
+
+
+class BigQueryBackend(Protocol):
+    """The part of `bigquery.Client` used by the data science agents."""
+
+    project: str
+
+    def list_tables(self, dataset: Any) -> Iterator[Any]:
+        ...
+
+    def get_table(self, table: Any) -> Any:
+        ...
+
+    def list_rows(self, table: Any, max_results: int | None = None) -> Any:
+        ...
+
+    def query(self, query: str, **kwargs) -> Any:
+        ...
+
+    def list_models(self, dataset: Any) -> Iterator[Any]:
+        ...
+
+
+_BACKENDS: dict[str, Callable[..., BigQueryBackend]] = {}
+
+
+def register_backend(name: str, factory: Callable[..., BigQueryBackend]) -> None:
+    """Registers a backend factory, called as `factory(project=...)`."""
+    _BACKENDS[name] = factory
+
+
+def create_client(name: str, project: str) -> BigQueryBackend:
+    """Creates a client for the named backend."""
+    if name not in _BACKENDS:
+        raise ValueError(
+            f"Unknown BigQuery backend: {name}. Available: {sorted(_BACKENDS)}"
+        )
+    return _BACKENDS[name](project=project)
+
+
+def _table_parts(table: Any, default_dataset: str) -> tuple[str, str]:
+    """Returns (dataset_id, table_id) for a table reference or string.
+
+    A table name without a dataset is in `default_dataset`.
+
+    Raises:
+        ValueError: The table string is empty.
+    """
+    if isinstance(table, str):
+        parts = table.replace("`", "").split(".")
+        if not parts[-1]:
+            raise ValueError(f"Invalid table name: {table!r}")
+        if len(parts) == 1:
+            return default_dataset, parts[0]
+        return parts[-2], parts[-1]
+    return table.dataset_id, table.table_id
+
+
+def _field_type(series: pd.Series) -> str:
+    if pd.api.types.is_bool_dtype(series):
+        return "BOOLEAN"
+    if pd.api.types.is_integer_dtype(series):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(series):
+        return "FLOAT"
+    values = series.dropna().astype(str)
+    if len(values) and values.map(lambda v: bool(_ISO_DATE.match(v))).all():
+        return "DATE"
+    return "STRING"
+
+
+def _value_type(value: Any) -> str:
+    if isinstance(value, bool):
+        return "BOOLEAN"
+    if isinstance(value, int):
+        return "INTEGER"
+    if isinstance(value, float):
+        return "FLOAT"
+    return "STRING"
+
+
+def _arrow_schema(schema: list[bigquery.SchemaField]) -> pa.Schema:
+    return pa.schema(
+        [
+            (field.name, _ARROW_TYPES.get(field.field_type, pa.string()))
+            for field in schema
+        ]
+    )
+
+
+class LocalRowIterator:
+    """Result of a local query or `list_rows` call."""
+
+    def __init__(self, schema: list[bigquery.SchemaField], rows: list[tuple]):
+        self.schema = schema
+        self._rows = rows
+        self._field_to_index = {field.name: i for i, field in enumerate(schema)}
+        self.total_rows = len(rows)
+
+    def __iter__(self) -> Iterator[bigquery.Row]:
+        for values in self._rows:
+            yield bigquery.Row(values, self._field_to_index)
+
+    def to_dataframe(self, **kwargs) -> pd.DataFrame:  # pylint: disable=unused-argument
+        return pd.DataFrame(self._rows, columns=[f.name for f in self.schema])
+
+    def to_arrow_iterable(
+        self, max_rows_per_batch: int = 10_000, **kwargs
+    ) -> Iterator[pa.RecordBatch]:  # pylint: disable=unused-argument
+        """Yields the rows as Arrow record batches, like `RowIterator`."""
+        schema = _arrow_schema(self.schema)
+        for start in range(0, len(self._rows), max_rows_per_batch):
+            rows = self._rows[start : start + max_rows_per_batch]
+            yield pa.RecordBatch.from_arrays(
+                [
+                    pa.array([row[i] for row in rows], type=field.type)
+                    for i, field in enumerate(schema)
+                ],
+                schema=schema,
+            )
+
+
+class LocalQueryJob:
+    """A query job that has already run to completion.
+
+    Like BigQuery, the client keeps the result in an anonymous table, named by
+    `destination`, that later queries can read.
+    """
+
+    def __init__(
+        self,
+        result: LocalRowIterator | None,
+        error: Exception | None,
+        destination: bigquery.TableReference | None = None,
+    ):
+        self.job_id = f"local_{uuid.uuid4().hex}"
+        self.state = "DONE"
+        self._result = result
+        self._error = error
+        self.error_result = (
+            {"reason": "invalidQuery", "message": str(error)} if error else None
+        )
+        self.total_bytes_processed = 0
+        self.destination = destination
+
+    def done(self) -> bool:
+        return True
+
+    def exception(self) -> Exception | None:
+        return self._error
+
+    def result(self, **kwargs) -> LocalRowIterator:  # pylint: disable=unused-argument
+        if self._error:
+            raise self._error
+        return self._result
+
+
+class LocalLoadJob:
+    """A load job that has already run to completion."""
+
+    def __init__(self, job_id: str, output_rows: int):
+        self.job_id = job_id
+        self.state = "DONE"
+        self.output_rows = output_rows
+        self.error_result = None
+
+    def done(self) -> bool:
+        return True
+
+    def result(self, **kwargs) -> "LocalLoadJob":  # pylint: disable=unused-argument
+        return self
+
+
+class LocalBigQueryClient:
+    """SQLite-backed stand-in for `bigquery.Client`.
+
+    Tables are stored in a single in-memory SQLite database under the name
+    `<dataset>.<table>`, and every table reference in a query is rewritten to
+    that name, so the project part of a reference is ignored.
+    """
+
+    def __init__(
+        self,
+        project: str,
+        data_dir: str | pathlib.Path | None = None,
+        default_dataset: str | None = None,
+    ):
+        self.project = project
+        self.default_dataset = default_dataset or "local"
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(":memory:", check_same_thread=False)
+        self._schemas: dict[tuple[str, str], list[bigquery.SchemaField]] = {}
+        self._jobs: dict[str, LocalLoadJob] = {}
+        self._anonymous_tables: list[str] = []
+        data_dir = pathlib.Path(data_dir or DEFAULT_DATA_DIR)
+        if data_dir.is_dir():
+            for csv_path in sorted(data_dir.glob("*.csv")):
+                self.load_csv(self.default_dataset, csv_path.stem, csv_path)
+            for dataset_dir in sorted(p for p in data_dir.iterdir() if p.is_dir()):
+                for csv_path in sorted(dataset_dir.glob("*.csv")):
+                    self.load_csv(dataset_dir.name, csv_path.stem, csv_path)
+
+    def load_dataframe(self, dataset_id: str, table_id: str, df: pd.DataFrame):
+        """Creates (or replaces) a table from a DataFrame."""
+        schema = [
+            bigquery.SchemaField(str(column), _field_type(df[column]))
+            for column in df.columns
+        ]
+        with self._lock:
+            df.to_sql(
+                f"{dataset_id}.{table_id}",
+                self._connection,
+                if_exists="replace",
+                index=False,
+            )
+            self._schemas[(dataset_id, table_id)] = schema
+
+    def load_csv(self, dataset_id: str, table_id: str, csv_path: str | pathlib.Path):
+        """Creates (or replaces) a table from a CSV file with a header row."""
+        self.load_dataframe(dataset_id, table_id, pd.read_csv(csv_path))
+
+    def load_table_from_file(
+        self,
+        file_obj: Any,
+        destination: Any,
+        job_config: bigquery.LoadJobConfig | None = None,
+        job_id: str | None = None,
+        **kwargs,
+    ) -> LocalLoadJob:
+        """Loads a Parquet or CSV file, honouring the write disposition.
+
+        Like BigQuery, a job ID can only be used once.
+
+        Raises:
+            exceptions.Conflict: The job ID was already used.
+        """
+        del kwargs  # Unused.
+        job_config = job_config or bigquery.LoadJobConfig()
+        job_id = job_id or f"local_{uuid.uuid4().hex}"
+        with self._lock:
+            if job_id in self._jobs:
+                raise exceptions.Conflict(f"Already Exists: Job {job_id}")
+        if job_config.source_format == bigquery.SourceFormat.PARQUET:
+            df = pq.read_table(file_obj).to_pandas()
+        else:
+            df = pd.read_csv(file_obj)
+        dataset_id, table_id = _table_parts(destination, self.default_dataset)
+        if (
+            job_config.write_disposition == bigquery.WriteDisposition.WRITE_APPEND
+            and (dataset_id, table_id) in self._schemas
+        ):
+            with self._lock:
+                df.to_sql(
+                    f"{dataset_id}.{table_id}",
+                    self._connection,
+                    if_exists="append",
+                    index=False,
+                )
+        else:
+            self.load_dataframe(dataset_id, table_id, df)
+        job = LocalLoadJob(job_id, len(df))
+        with self._lock:
+            self._jobs[job_id] = job
+        return job
+
+    def get_job(self, job_id: str, **kwargs) -> LocalLoadJob:
+        del kwargs  # Unused.
+        with self._lock:
+            if job_id not in self._jobs:
+                raise exceptions.NotFound(f"Not found: Job {job_id}")
+            return self._jobs[job_id]
+
+    def list_tables(self, dataset: Any) -> Iterator[bigquery.TableReference]:
+        dataset_id = dataset if isinstance(dataset, str) else dataset.dataset_id
+        dataset_id = dataset_id.split(".")[-1]
+        dataset_ref = bigquery.DatasetReference(self.project, dataset_id)
+        return iter(
+            [dataset_ref.table(t) for d, t in sorted(self._schemas) if d == dataset_id]
+        )
+
+    def get_table(self, table: Any) -> bigquery.Table:
+        dataset_id, table_id = _table_parts(table, self.default_dataset)
+        if (dataset_id, table_id) not in self._schemas:
+            raise exceptions.NotFound(f"Not found: Table {dataset_id}.{table_id}")
+        table_obj = bigquery.Table(
+            bigquery.DatasetReference(self.project, dataset_id).table(table_id),
+            schema=self._schemas[(dataset_id, table_id)],
+        )
+        table_obj._properties["type"] = "TABLE"  # pylint: disable=protected-access
+        return table_obj
+
+    def list_rows(self, table: Any, max_results: int | None = None, **kwargs):
+        del kwargs  # Unused.
+        dataset_id, table_id = _table_parts(table, self.default_dataset)
+        schema = self.get_table(table).schema
+        sql = f'SELECT * FROM "{dataset_id}.{table_id}"'
+        if max_results is not None:
+            sql += f" LIMIT {int(max_results)}"
+        with self._lock:
+            rows = self._connection.execute(sql).fetchall()
+        return LocalRowIterator(schema, rows)
+
+    def list_models(self, dataset: Any) -> Iterator[Any]:
+        del dataset  # BigQuery ML is not available locally.
+        return iter([])
+
+    def transpile(self, sql: str) -> str:
+        """Translates a BigQuery query to SQLite against the local tables."""
+        ast = sqlglot.parse_one(sql, read="bigquery")
+        ctes = {cte.alias_or_name for cte in ast.find_all(sqlglot.exp.CTE)}
+        for table in ast.find_all(sqlglot.exp.Table):
+            if not table.db and table.name in ctes:
+                continue
+            dataset_id = table.db or self.default_dataset
+            table.set("catalog", None)
+            table.set("db", None)
+            table.set(
+                "this",
+                sqlglot.exp.Identifier(this=f"{dataset_id}.{table.name}", quoted=True),
+            )
+        return ast.sql(dialect="sqlite")
+
+    def query(self, query: str, **kwargs) -> LocalQueryJob:
+        del kwargs  # Job configuration is ignored locally.
+        try:
+            sql = self.transpile(query)
+            with self._lock:
+                cursor = self._connection.execute(sql)
+                rows = cursor.fetchall()
+                names = [column[0] for column in cursor.description or []]
+        except (sqlglot.errors.SqlglotError, sqlite3.Error) as e:
+            return LocalQueryJob(None, exceptions.BadRequest(str(e)))
+        schema = [
+            bigquery.SchemaField(
+                name, _value_type(next((r[i] for r in rows if r[i] is not None), ""))
+            )
+            for i, name in enumerate(names)
+        ]
+        destination = self._store_result(schema, rows)
+        return LocalQueryJob(LocalRowIterator(schema, rows), None, destination)
+
+    def _store_result(
+        self, schema: list[bigquery.SchemaField], rows: list[tuple]
+    ) -> bigquery.TableReference | None:
+        """Keeps a query result in an anonymous table; returns its reference."""
+        names = [field.name for field in schema]
+        if not names or len(set(names)) != len(names):
+            # Like BigQuery, results with duplicate column names are not stored.
+            return None
+        table_id = f"anon_{uuid.uuid4().hex}"
+        with self._lock:
+            pd.DataFrame(rows, columns=names).to_sql(
+                f"{ANONYMOUS_DATASET}.{table_id}",
+                self._connection,
+                index=False,
+            )
+            self._schemas[(ANONYMOUS_DATASET, table_id)] = schema
+            self._anonymous_tables.append(table_id)
+            while len(self._anonymous_tables) > MAX_ANONYMOUS_TABLES:
+                expired = self._anonymous_tables.pop(0)
+                self._connection.execute(
+                    f'DROP TABLE "{ANONYMOUS_DATASET}.{expired}"'
+                )
+                del self._schemas[(ANONYMOUS_DATASET, expired)]
+        return bigquery.DatasetReference(self.project, ANONYMOUS_DATASET).table(
+            table_id
+        )
+
+
+class ReadBackend(Protocol):
+    """The part of the BigQuery Storage Read API used by bulk exports."""
+
+    def create_session(
+        self, table: bigquery.TableReference, max_streams: int
+    ) -> tuple[pa.Schema, list[str]]:
+        """Starts reading a table; returns its schema and stream names."""
+        ...
+
+    def read_stream(self, stream: str, schema: pa.Schema) -> Iterator[pa.RecordBatch]:
+        """Yields the record batches of a stream of a session."""
+        ...
+
+
+class StorageReadClient:
+    """Reads tables as Arrow streams with the BigQuery Storage Read API."""
+
+    def __init__(self, project: str):
+        # Imported on first use: only bulk exports need the Storage API.
+        from google.cloud import (  # pylint: disable=g-import-not-at-top
+            bigquery_storage_v1,
+        )
+
+        self.project = project
+        self._types = bigquery_storage_v1.types
+        self._client = bigquery_storage_v1.BigQueryReadClient()
+
+    def create_session(
+        self, table: bigquery.TableReference, max_streams: int
+    ) -> tuple[pa.Schema, list[str]]:
+        session = self._client.create_read_session(
+            # Reads are billed to the client's project.
+            parent=f"projects/{self.project}",
+            read_session=self._types.ReadSession(
+                table=(
+                    f"projects/{table.project}/datasets/{table.dataset_id}"
+                    f"/tables/{table.table_id}"
+                ),
+                data_format=self._types.DataFormat.ARROW,
+            ),
+            max_stream_count=max_streams,
+        )
+        schema = pa.ipc.read_schema(
+            pa.py_buffer(session.arrow_schema.serialized_schema)
+        )
+        return schema, [stream.name for stream in session.streams]
+
+    def read_stream(self, stream: str, schema: pa.Schema) -> Iterator[pa.RecordBatch]:
+        for response in self._client.read_rows(stream):
+            yield pa.ipc.read_record_batch(
+                pa.py_buffer(response.arrow_record_batch.serialized_record_batch),
+                schema,
+            )
+
+
+class LocalReadClient:
+    """Stand-in for the Storage Read API serving local tables as Arrow streams.
+
+    A session splits a table into at most `max_streams` contiguous row ranges,
+    and fewer for small tables. Each stream yields batches of `batch_rows`
+    rows, serialized and parsed again like the Arrow IPC messages of the real
+    API, so that exports can be benchmarked offline. Like the real API, each
+    stream can be read once.
+    """
+
+    def __init__(self, client: LocalBigQueryClient, batch_rows: int = 10_000):
+        self._client = client
+        self._batch_rows = batch_rows
+        self._lock = threading.Lock()
+        self._streams: dict[str, pa.Table] = {}
+
+    def create_session(
+        self, table: bigquery.TableReference, max_streams: int
+    ) -> tuple[pa.Schema, list[str]]:
+        rows = self._client.list_rows(table)
+        schema = _arrow_schema(rows.schema)
+        data = pa.Table.from_batches(
+            list(rows.to_arrow_iterable(self._batch_rows)), schema=schema
+        )
+        num_streams = min(max_streams, -(-data.num_rows // self._batch_rows))
+        session = f"projects/{self._client.project}/locations/local/sessions/"
+        session += uuid.uuid4().hex
+        names = []
+        with self._lock:
+            for i in range(num_streams):
+                start = i * data.num_rows // num_streams
+                end = (i + 1) * data.num_rows // num_streams
+                names.append(f"{session}/streams/{i}")
+                self._streams[names[-1]] = data.slice(start, end - start)
+        return schema, names
+
+    def read_stream(self, stream: str, schema: pa.Schema) -> Iterator[pa.RecordBatch]:
+        with self._lock:
+            if stream not in self._streams:
+                raise exceptions.NotFound(f"Not found: Stream {stream}")
+            data = self._streams.pop(stream)
+        for batch in data.to_batches(max_chunksize=self._batch_rows):
+            yield pa.ipc.read_record_batch(batch.serialize(), schema)
+
+
+_READ_BACKENDS: dict[str, Callable[[Any], ReadBackend]] = {}
+
+
+def register_read_backend(name: str, factory: Callable[[Any], ReadBackend]) -> None:
+    """Registers a read backend factory, called with the backend's client."""
+    _READ_BACKENDS[name] = factory
+
+
+def create_read_client(name: str, client: Any) -> ReadBackend:
+    """Creates a Storage Read API client for the named backend."""
+    if name not in _READ_BACKENDS:
+        raise ValueError(
+            f"Unknown BigQuery backend: {name}. Available: {sorted(_READ_BACKENDS)}"
+        )
+    return _READ_BACKENDS[name](client)
+
+
+register_backend("bigquery", bigquery.Client)
+register_backend(
+    "local",
+    lambda project: LocalBigQueryClient(
+        project,
+        data_dir=os.getenv("BQ_LOCAL_DATA_DIR"),
+        default_dataset=os.getenv("BQ_DATASET_ID"),
+    ),
+)
+register_read_backend("bigquery", lambda client: StorageReadClient(client.project))
+register_read_backend("local", LocalReadClient)
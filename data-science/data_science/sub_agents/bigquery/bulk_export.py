@@ -0,0 +1,223 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Bulk export of query results as Parquet datasets.
+
+`run_bigquery_validation` fetches at most `MAX_NUM_ROWS` rows by iterating
+over `query_job.result()`, which is far too slow for the million-row frames
+of plots or models. `BulkExporter` runs the query and reads its destination
+table through the BigQuery Storage Read API (see `backends.ReadBackend`) as
+parallel Arrow streams. Each stream is written to a Parquet file of its own,
+so the export is a directory that `pd.read_parquet` loads as one frame.
+
+The Storage Read API does not keep the order of rows across streams, so the
+result of a query with a top-level `ORDER BY` is read as a single stream.
+
+The `max_exports` most recent exports are kept; older directories are
+deleted.
+"""
+
+import collections
+import concurrent.futures
+import dataclasses
+import logging
+import pathlib
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import sqlglot
+
+from . import backends
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class ExportedResult:
+    """A query result exported as a Parquet dataset.
+
+    Attributes:
+        export_id: Name of the export.
+        path: Directory of the Parquet files, one per stream.
+        num_rows: Number of rows.
+        columns: Column names.
+        streams: Number of streams the result was read with.
+        num_bytes: Size of the Parquet files.
+        seconds: Time to run the query and write the files.
+    """
+
+    export_id: str
+    path: pathlib.Path
+    num_rows: int
+    columns: list[str]
+    streams: int
+    num_bytes: int
+    seconds: float
+
+
+def _write_stream(
+    read_client: backends.ReadBackend,
+    stream: str,
+    schema: pa.Schema,
+    path: pathlib.Path,
+) -> int:
+    """Writes the batches of a stream to a Parquet file; returns its rows."""
+    num_rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in read_client.read_stream(stream, schema):
+            if batch.num_rows:
+                writer.write_batch(batch)
+                num_rows += batch.num_rows
+    return num_rows
+
+
+def is_ordered(sql: str) -> bool:
+    """Returns whether the rows of a query's result are ordered.
+
+    Queries that do not parse are assumed to be ordered.
+    """
+    try:
+        ast = sqlglot.parse_one(sql, read="bigquery")
+    except sqlglot.errors.SqlglotError:
+        return True
+    return ast.args.get("order") is not None
+
+
+class BulkExporter:
+    """Thread-safe exporter of query results to Parquet datasets."""
+
+    def __init__(
+        self,
+        directory: Optional[str | pathlib.Path] = None,
+        max_exports: int = 8,
+        max_streams: int = 4,
+    ):
+        """Initializes the exporter.
+
+        Args:
+            directory: Directory of the exports. Defaults to a new temporary
+                directory, created on first export.
+            max_exports: Number of exports kept.
+            max_streams: Maximum number of streams read in parallel.
+        """
+        self._directory = pathlib.Path(directory) if directory else None
+        self._max_exports = max_exports
+        self.max_streams = max_streams
+        self._exports = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, export_id: str) -> pathlib.Path:
+        with self._lock:
+            if self._directory is None:
+                self._directory = pathlib.Path(
+                    tempfile.mkdtemp(prefix="bq_exports_")
+                )
+            path = self._directory / export_id
+        path.mkdir(parents=True)
+        return path
+
+    def export_table(
+        self,
+        read_client: backends.ReadBackend,
+        table: Any,
+        max_streams: Optional[int] = None,
+    ) -> ExportedResult:
+        """Exports a table, e.g. the destination of a finished query.
+
+        Args:
+            read_client: The Storage Read API client.
+            table: The table to export.
+            max_streams: Maximum number of streams read in parallel; defaults
+                to `self.max_streams`.
+        """
+        start = time.perf_counter()
+        export_id = f"export_{uuid.uuid4().hex[:12]}"
+        path = self._path(export_id)
+        schema, streams = read_client.create_session(
+            table, max_streams or self.max_streams
+        )
+        if streams:
+            with concurrent.futures.ThreadPoolExecutor(len(streams)) as executor:
+                num_rows = sum(
+                    executor.map(
+                        lambda i: _write_stream(
+                            read_client,
+                            streams[i],
+                            schema,
+                            path / f"part-{i:05d}.parquet",
+                        ),
+                        range(len(streams)),
+                    )
+                )
+        else:
+            # An empty result still loads as a frame with its columns.
+            num_rows = 0
+            pq.write_table(schema.empty_table(), path / "part-00000.parquet")
+        result = ExportedResult(
+            export_id=export_id,
+            path=path,
+            num_rows=num_rows,
+            columns=schema.names,
+            streams=len(streams),
+            num_bytes=sum(part.stat().st_size for part in path.iterdir()),
+            seconds=time.perf_counter() - start,
+        )
+        with self._lock:
+            self._exports[export_id] = result
+            while len(self._exports) > self._max_exports:
+                _, evicted = self._exports.popitem(last=False)
+                shutil.rmtree(evicted.path, ignore_errors=True)
+        logger.info(
+            "Exported %d rows over %d streams to %s in %.2fs.",
+            num_rows,
+            len(streams),
+            path,
+            result.seconds,
+        )
+        return result
+
+    def export_query(
+        self, client: Any, read_client: backends.ReadBackend, sql: str
+    ) -> ExportedResult:
+        """Runs a query and exports its result.
+
+        The result of an ordered query is read as a single stream, which keeps
+        its order.
+
+        Raises:
+            ValueError: The query has no destination table, e.g. a script.
+        """
+        start = time.perf_counter()
+        query_job = client.query(sql)
+        query_job.result()
+        if query_job.destination is None:
+            raise ValueError("The query has no result table to export.")
+        result = self.export_table(
+            read_client,
+            query_job.destination,
+            max_streams=1 if is_ordered(sql) else None,
+        )
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def get(self, export_id: str) -> Optional[ExportedResult]:
+        """Returns an export, or None if unknown or deleted."""
+        with self._lock:
+            return self._exports.get(export_id)
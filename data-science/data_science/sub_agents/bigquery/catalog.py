@@ -0,0 +1,245 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Catalog of the BigQuery datasets the database agent can query.
+
+The catalog is set with `BQ_DATASET_CATALOG`, a comma-separated list of
+`project.dataset` or `dataset` (in `BQ_PROJECT_ID`), and defaults to
+`BQ_DATASET_ID`. Creating the catalog loads nothing. Each question is routed
+to its most relevant dataset by matching its words against dataset, table and
+column names, which only takes table metadata. The DDL schema of a dataset,
+with sample rows, is the expensive part, and is only loaded when a question
+is first routed to the dataset. Only the schemas of the `max_loaded` most
+recently used datasets are kept. The table metadata of all datasets is
+listed when the first question is routed, not when the agents start.
+"""
+
+import collections
+import dataclasses
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+from . import schema_registry
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+@dataclasses.dataclass(frozen=True)
+class DatasetRef:
+    """A BigQuery dataset in the catalog."""
+
+    project: str
+    dataset: str
+
+    def __str__(self) -> str:
+        return f"{self.project}.{self.dataset}"
+
+
+def parse_catalog(spec: str, default_project: str) -> list[DatasetRef]:
+    """Parses a comma-separated list of `project.dataset` or `dataset`."""
+    datasets = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        project, _, dataset = entry.rpartition(".")
+        ref = DatasetRef(project or default_project, dataset)
+        if ref not in datasets:
+            datasets.append(ref)
+    return datasets
+
+
+def terms(text: str) -> set[str]:
+    """Returns the lower-cased words of a text, with simple plural folding.
+
+    Identifiers are split on underscores and dots, so `store_sales` matches a
+    question about "sales per store".
+    """
+    words = set()
+    for word in _WORD_RE.findall(text.lower()):
+        words.add(word)
+        if len(word) > 3 and word.endswith("s"):
+            words.add(word[:-1])
+    return words
+
+
+class DatasetCatalog:
+    """Routes questions to datasets and loads their schemas on demand.
+
+    Schemas are stored in the schema registry. The catalog keeps the
+    fingerprints of the `max_loaded` most recently used datasets and discards
+    colder schemas from the registry; they are reloaded when needed again.
+
+    Attributes:
+        datasets: The datasets of the catalog. The first is the default.
+        loads: Number of schemas loaded.
+    """
+
+    def __init__(
+        self,
+        datasets: Iterable[DatasetRef],
+        load_schema: Callable[[DatasetRef], str | dict[str, str]],
+        list_columns: Callable[[DatasetRef], dict[str, list[str]]],
+        max_loaded: int = 4,
+        registry: Optional[schema_registry.SchemaRegistry] = None,
+    ):
+        """Initializes the catalog.
+
+        Args:
+            datasets: The datasets of the catalog. The first is the default.
+            load_schema: Returns the DDL schema of a dataset, or its renderings
+              by format (see `SchemaRegistry.register`).
+            list_columns: Returns the column names of each table of a dataset.
+            max_loaded: Number of dataset schemas kept loaded.
+            registry: Where schemas are stored. Defaults to the process-wide
+              registry.
+        """
+        self.datasets = list(datasets)
+        if not self.datasets:
+            raise ValueError("The dataset catalog is empty.")
+        self._load_schema = load_schema
+        self._list_columns = list_columns
+        self._max_loaded = max_loaded
+        self._registry = registry or schema_registry.registry
+        self._loaded = collections.OrderedDict()  # DatasetRef -> fingerprint.
+        self._schema_terms = {}  # Terms of the loaded schemas.
+        self._table_terms = {}  # Terms of the dataset, table and column names.
+        self._lock = threading.Lock()
+        self._load_locks = collections.defaultdict(threading.Lock)
+        self.loads = 0
+
+    @property
+    def default(self) -> DatasetRef:
+        return self.datasets[0]
+
+    def resolve(
+        self, project: Optional[str] = None, dataset: Optional[str] = None
+    ) -> DatasetRef:
+        """Returns the catalog dataset with these IDs, by default the first.
+
+        Raises:
+            ValueError: If the dataset is not in the catalog.
+        """
+        if dataset is None:
+            return self.default
+        for ref in self.datasets:
+            if ref.dataset == dataset and project in (None, ref.project):
+                return ref
+        raise ValueError(f"Dataset {project}.{dataset} is not in the catalog.")
+
+    def _cached_fingerprint(self, ref: DatasetRef) -> Optional[str]:
+        with self._lock:
+            fingerprint = self._loaded.get(ref)
+            if fingerprint is None or self._registry.get(fingerprint) is None:
+                return None
+            self._loaded.move_to_end(ref)
+            return fingerprint
+
+    def schema_fingerprint(self, ref: DatasetRef, reload: bool = False) -> str:
+        """Returns the fingerprint of a dataset's schema, loading it if needed.
+
+        Args:
+            ref: The dataset.
+            reload: Whether to reload the schema even if it is loaded.
+
+        Returns:
+            The fingerprint under which the schema is registered.
+        """
+        if not reload:
+            fingerprint = self._cached_fingerprint(ref)
+            if fingerprint is not None:
+                return fingerprint
+        with self._lock:
+            load_lock = self._load_locks[ref]
+        with load_lock:
+            if not reload:
+                # Another session may have loaded it while we waited.
+                fingerprint = self._cached_fingerprint(ref)
+                if fingerprint is not None:
+                    return fingerprint
+            schema = self._load_schema(ref)
+            fingerprint = self._registry.register(schema)
+            ddl_schema = self._registry.get(fingerprint)
+            with self._lock:
+                self._loaded[ref] = fingerprint
+                self._loaded.move_to_end(ref)
+                self._schema_terms[ref] = terms(ddl_schema)
+                self.loads += 1
+                while len(self._loaded) > self._max_loaded:
+                    cold, cold_fingerprint = self._loaded.popitem(last=False)
+                    del self._schema_terms[cold]
+                    self._registry.discard(cold_fingerprint)
+                    logger.debug("Evicted the schema of %s.", cold)
+            return fingerprint
+
+    def _index_tables(self) -> None:
+        """Lists the columns of the datasets not indexed yet, concurrently."""
+        with self._lock:
+            pending = [ref for ref in self.datasets if ref not in self._table_terms]
+        if not pending:
+            return
+
+        def index(ref):
+            try:
+                return ref, self._list_columns(ref)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                # Not cached, so the next question tries again.
+                logger.warning("Could not list the tables of %s: %s", ref, e)
+                return ref, None
+
+        with ThreadPoolExecutor(max_workers=min(8, len(pending))) as executor:
+            indexed = list(executor.map(index, pending))
+        with self._lock:
+            for ref, columns in indexed:
+                if columns is None:
+                    continue
+                names = [ref.dataset, *columns]
+                for table_columns in columns.values():
+                    names.extend(table_columns)
+                self._table_terms[ref] = terms(" ".join(names))
+
+    def route(self, question: str, current: Optional[DatasetRef] = None) -> DatasetRef:
+        """Returns the dataset most relevant to a question.
+
+        Words matching dataset, table or column names count twice as much as
+        words matching the sample values of loaded schemas. Ties, and
+        questions matching nothing, stay on `current`, then the default.
+        """
+        if len(self.datasets) == 1:
+            return self.default
+        self._index_tables()
+        question_terms = terms(question)
+        with self._lock:
+            scores = {
+                ref: 2 * len(question_terms & self._table_terms.get(ref, set()))
+                + len(question_terms & self._schema_terms.get(ref, set()))
+                for ref in self.datasets
+            }
+        best = max(self.datasets, key=lambda ref: (scores[ref], ref == current))
+        if scores[best] == 0:
+            return current or self.default
+        return best
+
+    def describe(self) -> str:
+        """Lists the datasets of the catalog.
+
+        Only the names, so that rendering the root instruction lists no
+        tables: their metadata is indexed by the first routed question.
+        """
+        return "\n".join(f"- `{ref}`" for ref in self.datasets)
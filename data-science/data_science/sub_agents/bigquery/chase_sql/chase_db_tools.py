@@ -15,12 +15,19 @@
 """This code contains the implementation of the tools used for the CHASE-SQL agent."""
 
 import enum
+import logging
 import os
+import threading
 
+from data_science.utils import tracing
+from data_science.utils.vector_index import VectorIndex
 from google.adk.tools import ToolContext
 
+from .. import semantic_cache, session_results, tools
+from ..tools import get_ddl_schema, lookup_cached_sql, route_dataset
 # pylint: disable=g-importing-member
 from .dc_prompt_template import DC_PROMPT_TEMPLATE
+from .example_bank import ExampleBank
 from .llm_utils import GeminiModel
 from .qp_prompt_template import QP_PROMPT_TEMPLATE
 from .sql_postprocessor import sql_translator
@@ -29,6 +36,15 @@ from .sql_postprocessor import sql_translator
 
 BQ_PROJECT_ID = os.getenv("BQ_PROJECT_ID")
 
+# Worked examples kept in the DC and QP prompts; 0 keeps all of them. All are
+# kept by default until the accuracy of fewer is measured against the model.
+FEW_SHOT_EXAMPLES = int(os.getenv("CHASE_FEW_SHOT_EXAMPLES", "0"))
+
+# Stream DC and QP responses and stop once their SQL block is complete.
+STREAM_SQL = os.getenv("CHASE_STREAM_SQL", "1") == "1"
+
+logger = logging.getLogger(__name__)
+
 
 class GenerateSQLType(enum.Enum):
     """Enum for the different types of SQL generation methods.
@@ -41,6 +57,37 @@ class GenerateSQLType(enum.Enum):
     QP = "qp"
 
 
+def _embed_texts(texts):
+    """Embeds texts with the model of the semantic SQL cache."""
+    response = tools.get_llm_client().models.embed_content(
+        model=os.getenv("NL2SQL_EMBEDDING_MODEL", "text-embedding-005"),
+        contents=list(texts),
+    )
+    return [embedding.values for embedding in response.embeddings]
+
+
+example_bank = None
+_example_bank_lock = threading.Lock()
+
+
+def get_example_bank() -> ExampleBank:
+    """Returns the process-wide bank of the DC and QP prompt examples."""
+    global example_bank
+    if example_bank is None:
+        with _example_bank_lock:
+            if example_bank is None:
+                index_path = os.getenv("CHASE_EXAMPLE_INDEX")
+                example_bank = ExampleBank(
+                    {
+                        GenerateSQLType.DC.value: DC_PROMPT_TEMPLATE,
+                        GenerateSQLType.QP.value: QP_PROMPT_TEMPLATE,
+                    },
+                    embed_fn=_embed_texts,
+                    index=VectorIndex.load(index_path) if index_path else None,
+                )
+    return example_bank
+
+
 def exception_wrapper(func):
     """A decorator to catch exceptions in a function and return the exception as a string.
 
@@ -74,11 +121,12 @@ def parse_response(response: str) -> str:
         if "```sql" in response and "```" in response:
             query = response.split("```sql")[1].split("```")[0]
     except ValueError as e:
-        print(f"Error in parsing response: {e}")
+        logger.warning("Error in parsing response: %s", e)
         query = response
     return query.strip()
 
 
+@tracing.traced()
 def initial_bq_nl2sql(
     question: str,
     tool_context: ToolContext,
@@ -92,8 +140,16 @@ def initial_bq_nl2sql(
     Returns:
       str: An SQL statement to answer this question.
     """
-    print("****** Running agent with ChaseSQL algorithm.")
-    ddl_schema = tool_context.state["database_settings"]["bq_ddl_schema"]
+    logger.debug("Running agent with ChaseSQL algorithm.")
+    settings = route_dataset(question, tool_context)
+    # The translator parses the schema as DDL, whatever the prompt's format.
+    ddl_schema = get_ddl_schema(settings)
+    prompt_schema = get_ddl_schema(settings, tools.NL2SQL_SCHEMA_FORMAT)
+    # Earlier results of the session are queryable like the dataset's tables.
+    ddl_schema += session_results.render(tool_context.state)
+    prompt_schema += session_results.render(
+        tool_context.state, tools.NL2SQL_SCHEMA_FORMAT
+    )
     project = tool_context.state["database_settings"]["bq_project_id"]
     db = tool_context.state["database_settings"]["bq_dataset_id"]
     transpile_to_bigquery = tool_context.state["database_settings"][
@@ -111,21 +167,40 @@ def initial_bq_nl2sql(
     model = tool_context.state["database_settings"]["model"]
     temperature = tool_context.state["database_settings"]["temperature"]
     generate_sql_type = tool_context.state["database_settings"]["generate_sql_type"]
-
-    if generate_sql_type == GenerateSQLType.DC.value:
-        prompt = DC_PROMPT_TEMPLATE.format(
-            SCHEMA=ddl_schema, QUESTION=question, BQ_PROJECT_ID=BQ_PROJECT_ID
-        )
-    elif generate_sql_type == GenerateSQLType.QP.value:
-        prompt = QP_PROMPT_TEMPLATE.format(
-            SCHEMA=ddl_schema, QUESTION=question, BQ_PROJECT_ID=BQ_PROJECT_ID
-        )
-    else:
+    tracing.set_attributes(
+        tracing.current_span(),
+        **{
+            "nl2sql.method": "chase",
+            "nl2sql.generate_sql_type": generate_sql_type,
+            "nl2sql.candidates": number_of_candidates,
+            "nl2sql.few_shot_examples": FEW_SHOT_EXAMPLES,
+        },
+    )
+
+    hit = lookup_cached_sql(question, tool_context)
+    if hit and hit["mode"] == semantic_cache.DIRECT:
+        return hit["sql"]
+
+    if generate_sql_type not in (GenerateSQLType.DC.value, GenerateSQLType.QP.value):
         raise ValueError(f"Unsupported generate_sql_type: {generate_sql_type}")
+    # The semantic cache embedded the question with the same model.
+    template = get_example_bank().prompt_template(
+        generate_sql_type,
+        question,
+        FEW_SHOT_EXAMPLES,
+        tools.sql_cache.cached_embedding(question) if tools.sql_cache else None,
+    )
+    if hit:
+        question = f"{question}\n{semantic_cache.format_candidate_hint(hit)}"
+    prompt = template.format(
+        SCHEMA=prompt_schema, QUESTION=question, BQ_PROJECT_ID=project
+    )
 
     model = GeminiModel(model_name=model, temperature=temperature)
     requests = [prompt for _ in range(number_of_candidates)]
-    responses = model.call_parallel(requests, parser_func=parse_response)
+    responses = model.call_parallel(
+        requests, parser_func=parse_response, stop_at_sql_block=STREAM_SQL
+    )
     # Take just the first response.
     responses = responses[0]
 
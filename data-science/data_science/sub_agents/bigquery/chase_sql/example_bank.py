@@ -0,0 +1,207 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Selection of the worked examples of the CHASE-SQL prompts by relevance.
+
+`DC_PROMPT_TEMPLATE` and `QP_PROMPT_TEMPLATE` carry seven or eight worked
+examples, most of the prompt, whatever the question. `ExampleBank` splits each
+template into its instructions, its examples (separated by `===========`)
+and the closing instructions, and embeds the question of every example.
+`prompt_template` then keeps only the `k` examples whose questions are the
+most similar to the one being asked, in their original order.
+
+Example embeddings are computed on first use, or loaded from an index
+written by `save`:
+
+    python -m data_science.sub_agents.bigquery.chase_sql.example_bank \\
+        chase_examples.npz
+
+Examples missing from a loaded index, e.g. after the templates changed, are
+embedded when the bank is first used.
+"""
+
+import dataclasses
+import hashlib
+import logging
+import re
+import threading
+from typing import Callable, Optional, Sequence
+
+from data_science.utils.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+EmbedFn = Callable[[Sequence[str]], list[Sequence[float]]]
+
+EXAMPLE_SEPARATOR = "\n===========\n"
+# Start of the instructions following the last example.
+_CLOSING_MARKER = "\nNow is the real question"
+_QUESTION_PATTERN = re.compile(r"【Question】\s*\nQuestion:\s*\n?(.+)")
+_TITLE_PATTERN = re.compile(r"^Example \d+")
+
+
+@dataclasses.dataclass(frozen=True)
+class Example:
+    """A worked example of a prompt template."""
+
+    text: str
+    question: str
+
+    @property
+    def key(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()[:16]
+
+
+def split_template(template: str) -> tuple[str, list[Example], str]:
+    """Splits a prompt template into its instructions, examples and closing.
+
+    Returns:
+        The text before the first example, the examples and the text after
+        the last one, so that `head + EXAMPLE_SEPARATOR` followed by the
+        examples joined with `EXAMPLE_SEPARATOR`, then `tail`, is `template`.
+    """
+    head, *parts = template.split(EXAMPLE_SEPARATOR)
+    if not parts:
+        return template, [], ""
+    last, closing, tail = parts[-1].partition(_CLOSING_MARKER)
+    parts[-1] = last
+    examples = []
+    for text in parts:
+        match = _QUESTION_PATTERN.search(text)
+        question = match.group(1).strip() if match else text
+        examples.append(Example(text=text, question=question))
+    return head, examples, closing + tail
+
+
+class ExampleBank:
+    """Thread-safe bank of the worked examples of prompt templates."""
+
+    def __init__(
+        self,
+        templates: dict[str, str],
+        embed_fn: EmbedFn,
+        index: Optional[VectorIndex] = None,
+    ):
+        """Initializes the bank.
+
+        Args:
+            templates: Prompt templates, by name.
+            embed_fn: Embeds a batch of texts.
+            index: Example embeddings written by `save`, if any.
+        """
+        self._templates = templates
+        self._parts = {name: split_template(t) for name, t in templates.items()}
+        self._keys = {
+            (name, example.key)
+            for name, (_, examples, _) in self._parts.items()
+            for example in examples
+        }
+        self._embed_fn = embed_fn
+        self._index = index
+        self._lock = threading.Lock()
+
+    def _get_index(self) -> VectorIndex:
+        with self._lock:
+            if self._index is None:
+                self._index = VectorIndex(max_entries=1)
+            indexed = {
+                (payload["template"], payload["key"])
+                for _, payload in self._index.entries()
+            }
+            missing = [
+                {"template": name, "key": example.key, "question": example.question}
+                for name, (_, examples, _) in self._parts.items()
+                for example in examples
+                if (name, example.key) not in indexed
+            ]
+            if missing:
+                self._index.max_entries = len(indexed) + len(missing)
+                self._index.add_many(
+                    self._embed_fn([entry["question"] for entry in missing]),
+                    missing,
+                )
+                logger.info("Embedded %d prompt examples.", len(missing))
+            return self._index
+
+    def examples(self, name: str) -> list[Example]:
+        """Returns the examples of a template, in order."""
+        return list(self._parts[name][1])
+
+    def select(
+        self,
+        name: str,
+        question: str,
+        k: int,
+        vector: Optional[Sequence[float]] = None,
+    ) -> list[Example]:
+        """Returns the `k` examples of a template most similar to a question.
+
+        The examples are returned in their order in the template. `vector` is
+        the embedding of the question, if already computed with the same
+        model.
+        """
+        index = self._get_index()
+        if vector is None:
+            vector = self._embed_fn([question])[0]
+        hits = index.search(
+            vector,
+            k=k,
+            # Also skips entries of examples no longer in the template.
+            where=lambda p: p["template"] == name
+            and (name, p["key"]) in self._keys,
+        )
+        keys = {payload["key"] for _, _, payload in hits}
+        return [example for example in self.examples(name) if example.key in keys]
+
+    def prompt_template(
+        self,
+        name: str,
+        question: str,
+        k: int,
+        vector: Optional[Sequence[float]] = None,
+    ) -> str:
+        """Returns a template with its `k` examples most relevant to a question.
+
+        The returned template has the same placeholders as the original. It is
+        the original if `k` is 0 or at least its number of examples, or if the
+        question cannot be embedded.
+        """
+        head, examples, tail = self._parts[name]
+        if k <= 0 or k >= len(examples):
+            return self._templates[name]
+        try:
+            selected = self.select(name, question, k, vector)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.warning("Sending all prompt examples, failed to embed: %s", e)
+            return self._templates[name]
+        texts = [
+            _TITLE_PATTERN.sub(f"Example {number}", example.text, count=1)
+            for number, example in enumerate(selected, 1)
+        ]
+        return head + EXAMPLE_SEPARATOR + EXAMPLE_SEPARATOR.join(texts) + tail
+
+    def save(self, path: str) -> None:
+        """Writes the example embeddings to a `.npz` index."""
+        self._get_index().save(path)
+
+
+if __name__ == "__main__":
+    # pylint: disable=g-import-not-at-top
+    import sys
+
+    from data_science.sub_agents.bigquery.chase_sql import chase_db_tools
+
+    # pylint: enable=g-import-not-at-top
+    chase_db_tools.get_example_bank().save(sys.argv[1])
+    print(f"Example embeddings written to {sys.argv[1]}")
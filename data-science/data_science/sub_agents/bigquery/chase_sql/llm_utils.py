@@ -15,21 +15,25 @@
 """This code contains the LLM utils for the CHASE-SQL Agent."""
 
 import functools
+import logging
 import os
 import random
+import threading
 import time
+import types
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Callable, List, Optional
+from typing import Any, Callable, List, Optional
 
 import dotenv
 import vertexai
-from google.cloud import aiplatform
-from vertexai.generative_models import (GenerationConfig, HarmBlockThreshold,
-                                        HarmCategory)
+from vertexai.generative_models import (GenerationConfig, GenerationResponse,
+                                        HarmBlockThreshold, HarmCategory)
 from vertexai.preview import caching
 from vertexai.preview.generative_models import GenerativeModel
 
-dotenv.load_dotenv(override=True)
+from data_science.utils import cassette, tracing
+
+logger = logging.getLogger(__name__)
 
 SAFETY_FILTER_CONFIG = {
     HarmCategory.HARM_CATEGORY_UNSPECIFIED: HarmBlockThreshold.BLOCK_NONE,
@@ -39,8 +43,9 @@ SAFETY_FILTER_CONFIG = {
     HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
 }
 
-GCP_PROJECT = os.getenv("GOOGLE_CLOUD_PROJECT")
-GCP_LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION")
+# Set by `init_vertexai()`.
+GCP_PROJECT = None
+GCP_LOCATION = None
 
 GEMINI_AVAILABLE_REGIONS = [
     "europe-west3",
@@ -73,11 +78,80 @@ GEMINI_URL = (
     "projects/{GCP_PROJECT}/locations/{region}/publishers/google/models/{model_name}"
 )
 
-aiplatform.init(
-    project=GCP_PROJECT,
-    location=GCP_LOCATION,
-)
-vertexai.init(project=GCP_PROJECT, location=GCP_LOCATION)
+_vertexai_initialized = False
+_vertexai_lock = threading.Lock()
+
+
+def init_vertexai() -> None:
+    """Initializes the Vertex AI SDK once, on first use of a `GeminiModel`.
+
+    `vertexai.init` also configures `google.cloud.aiplatform`, which shares the
+    same global configuration.
+    """
+    global GCP_PROJECT, GCP_LOCATION, _vertexai_initialized
+    if _vertexai_initialized:
+        return
+    with _vertexai_lock:
+        if _vertexai_initialized:
+            return
+        dotenv.load_dotenv(override=True)
+        GCP_PROJECT = os.getenv("GOOGLE_CLOUD_PROJECT")
+        GCP_LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION")
+        vertexai.init(project=GCP_PROJECT, location=GCP_LOCATION)
+        _vertexai_initialized = True
+
+
+SQL_FENCE = "```sql"
+_CLOSING_FENCE = "```"
+
+
+class SqlBlockParser:
+    """Incremental parser of the first ```sql block of a streamed response.
+
+    The CHASE-SQL tools only use the first ```sql block of a response (see
+    `chase_db_tools.parse_response`), so the rest of the response can be
+    abandoned as soon as that block is closed.
+    """
+
+    def __init__(self):
+        # The response received so far.
+        self.text = ""
+        # Index after the closing fence, once the block is complete.
+        self.end: Optional[int] = None
+        self._sql_start: Optional[int] = None
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None
+
+    def feed(self, chunk: str) -> bool:
+        """Adds a chunk of the response and returns whether the block is closed."""
+        if self.complete or not chunk:
+            return self.complete
+        # A fence may be split across chunks.
+        scan = max(len(self.text) - len(SQL_FENCE) + 1, 0)
+        self.text += chunk
+        if self._sql_start is None:
+            opening = self.text.find(SQL_FENCE, scan)
+            if opening < 0:
+                return False
+            self._sql_start = opening + len(SQL_FENCE)
+        closing = self.text.find(_CLOSING_FENCE, max(scan, self._sql_start))
+        if closing >= 0:
+            self.end = closing + len(_CLOSING_FENCE)
+        return self.complete
+
+    def response(self) -> str:
+        """The response up to the end of the SQL block, if complete."""
+        return self.text[: self.end] if self.complete else self.text
+
+
+def _chunk_text(chunk: Any) -> str:
+    try:
+        return chunk.text
+    except (AttributeError, ValueError):
+        # Chunks without text, e.g. the last one with the finish reason.
+        return ""
 
 
 def retry(max_attempts=8, base_delay=1, backoff_factor=2):
@@ -100,8 +174,12 @@ def retry(max_attempts=8, base_delay=1, backoff_factor=2):
             while attempts < max_attempts:
                 try:
                     return func(*args, **kwargs)
+                except cassette.CassetteMiss:
+                    raise
                 except Exception as e:  # pylint: disable=broad-exception-caught
-                    print(f"Attempt {attempts + 1} failed with error: {e}")
+                    logger.warning(
+                        "Attempt %d failed with error: %s", attempts + 1, e
+                    )
                     attempts += 1
                     if attempts >= max_attempts:
                         raise e
@@ -126,6 +204,7 @@ class GeminiModel:
         temperature: float = 0.01,
         **kwargs,
     ):
+        init_vertexai()
         self.model_name = model_name
         self.finetuned_model = finetuned_model
         self.arguments = kwargs
@@ -147,8 +226,30 @@ class GeminiModel:
         else:
             self.model = GenerativeModel(model_name=model_name)
 
+    def _generate_until_sql_block(self, prompt: str, config: dict) -> dict:
+        """Streams a response until its first ```sql block is closed."""
+        parser = SqlBlockParser()
+        stream = self.model.generate_content(
+            prompt,
+            generation_config=GenerationConfig(**config),
+            safety_settings=SAFETY_FILTER_CONFIG,
+            stream=True,
+        )
+        try:
+            for chunk in stream:
+                if parser.feed(_chunk_text(chunk)):
+                    break
+        finally:
+            # Abandons the rest of the stream.
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        return {"text": parser.response(), "stopped_early": parser.complete}
+
     @retry(max_attempts=12, base_delay=2, backoff_factor=2)
-    def call(self, prompt: str, parser_func=None) -> str:
+    def call(
+        self, prompt: str, parser_func=None, stop_at_sql_block: bool = False
+    ) -> str:
         """Calls the Gemini model with the given prompt.
 
         Args:
@@ -156,18 +257,64 @@ class GeminiModel:
             parser_func (callable, optional): A function that processes the LLM
               output. It takes the model"s response as input and returns the
               processed result.
+            stop_at_sql_block (bool): Streams the response and stops as soon as
+              its first ```sql block is closed.
 
         Returns:
             str: The processed response from the model.
         """
-        response = self.model.generate_content(
-            prompt,
-            generation_config=GenerationConfig(
-                temperature=self.temperature,
-                **self.arguments,
-            ),
-            safety_settings=SAFETY_FILTER_CONFIG,
-        ).text
+        with tracing.span(
+            "llm.generate_content", **{"llm.model": self.model_name}
+        ) as llm_span:
+            config = {"temperature": self.temperature, **self.arguments}
+            recorder = cassette.get_cassette()
+            if stop_at_sql_block:
+                start = time.perf_counter()
+
+                def generate():
+                    return self._generate_until_sql_block(prompt, config)
+
+                if recorder is None:
+                    streamed = generate()
+                else:
+                    streamed = recorder.call(
+                        "vertexai.generate_content_stream",
+                        self.model_name,
+                        {"prompt": prompt, "config": config},
+                        generate,
+                        lambda r: r,
+                        lambda r: r,
+                    )
+                response = types.SimpleNamespace(text=streamed["text"])
+                tracing.set_attributes(
+                    llm_span,
+                    **{
+                        "llm.stream_stopped_early": streamed["stopped_early"],
+                        "llm.time_to_sql_ms": (time.perf_counter() - start) * 1000,
+                    },
+                )
+            else:
+
+                def generate():
+                    return self.model.generate_content(
+                        prompt,
+                        generation_config=GenerationConfig(**config),
+                        safety_settings=SAFETY_FILTER_CONFIG,
+                    )
+
+                if recorder is None:
+                    response = generate()
+                else:
+                    response = recorder.call(
+                        "vertexai.generate_content",
+                        self.model_name,
+                        {"prompt": prompt, "config": config},
+                        generate,
+                        lambda r: r.to_dict(),
+                        GenerationResponse.from_dict,
+                    )
+            tracing.set_llm_usage(llm_span, response, prompt)
+        response = response.text
         if parser_func:
             return parser_func(response)
         return response
@@ -178,6 +325,7 @@ class GeminiModel:
         parser_func: Optional[Callable[[str], str]] = None,
         timeout: int = 60,
         max_retries: int = 5,
+        stop_at_sql_block: bool = False,
     ) -> List[Optional[str]]:
         """Calls the Gemini model for multiple prompts in parallel using threads with retry logic.
 
@@ -186,6 +334,8 @@ class GeminiModel:
             parser_func (callable, optional): A function to process each response.
             timeout (int): The maximum time (in seconds) to wait for each thread.
             max_retries (int): The maximum number of retries for timed-out threads.
+            stop_at_sql_block (bool): Stops each response at its first ```sql
+              block; see `call`.
 
         Returns:
             List[Optional[str]]:
@@ -198,12 +348,14 @@ class GeminiModel:
             retries = 0
             while retries <= max_retries:
                 try:
-                    return self.call(prompt, parser_func)
+                    return self.call(prompt, parser_func, stop_at_sql_block)
                 except Exception as e:  # pylint: disable=broad-exception-caught
-                    print(f"Error for prompt {index}: {str(e)}")
+                    logger.warning("Error for prompt %d: %s", index, e)
                     retries += 1
                     if retries <= max_retries:
-                        print(f"Retrying ({retries}/{max_retries}) for prompt {index}")
+                        logger.info(
+                            "Retrying (%d/%d) for prompt %d", retries, max_retries, index
+                        )
                         time.sleep(1)  # Small delay before retrying
                     else:
                         return f"Error after retries: {str(e)}"
@@ -220,14 +372,14 @@ class GeminiModel:
                 try:
                     results[index] = future.result()
                 except Exception as e:  # pylint: disable=broad-exception-caught
-                    print(f"Unhandled error for prompt {index}: {e}")
+                    logger.error("Unhandled error for prompt %d: %s", index, e)
                     results[index] = "Unhandled Error"
 
         # Handle remaining unfinished tasks after the timeout
         for future in future_to_index:
             index = future_to_index[future]
             if not future.done():
-                print(f"Timeout occurred for prompt {index}")
+                logger.warning("Timeout occurred for prompt %d", index)
                 results[index] = "Timeout"
 
         return results
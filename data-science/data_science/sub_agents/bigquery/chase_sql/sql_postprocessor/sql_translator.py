@@ -14,12 +14,18 @@
 
 """Translator from SQLite to BigQuery."""
 
+import collections
+import logging
 import re
+import threading
 from typing import Any, Final
 
 import regex
 import sqlglot
 import sqlglot.optimizer
+import sqlglot.optimizer.qualify
+from data_science.utils import tracing
+from sqlglot.tokens import TokenType
 
 from ..llm_utils import GeminiModel  # pylint: disable=g-importing-member
 from .correction_prompt_template import (
@@ -37,6 +43,38 @@ SQLGlotSchemaType = dict[str, Any]
 
 BirdSampleType = dict[str, Any]
 
+logger = logging.getLogger(__name__)
+
+# Counters of all translators; see `stats()`.
+_stats = collections.Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(**increments: int) -> None:
+    with _stats_lock:
+        _stats.update(increments)
+
+
+def stats() -> dict[str, int]:
+    """Returns the counters of the translations of this process.
+
+    -   `translations`: calls of `SqlTranslator.translate`.
+    -   `output_dialect`: queries that were already valid in the output dialect
+        and were returned without being transpiled or corrected.
+    -   `correction_passes`: `_fix_errors` passes run.
+    -   `correction_passes_skipped`: enabled `_fix_errors` passes that were not
+        run, because the query was already valid.
+    -   `correction_calls`: LLM correction calls made by the passes run.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats() -> None:
+    """Resets the counters of `stats()`."""
+    with _stats_lock:
+        _stats.clear()
+
 
 def _isinstance_list_of_str_tuples_lists(obj: Any) -> bool:
     """Checks if the object is a list of tuples or listsof strings."""
@@ -95,6 +133,8 @@ class SqlTranslator:
     a tool to perform the translation.
 
     The translation is done by the following steps:
+    0. If the input SQL query already parses as the output dialect and all its
+       tables and columns resolve against the schema, it is returned as is.
     1. (Optional) If there are errors in the input SQL query, the input SQL query
        is first modified by the LLM to address the errors.
     2. The input SQL query is then translated to a SQL query in the output SQL
@@ -345,6 +385,47 @@ class SqlTranslator:
             return str(e), sql_query
         return None, sql_query
 
+    @classmethod
+    def _is_valid_output_dialect(
+        cls, sql_query: str, schema_dict: SQLGlotSchemaType | None
+    ) -> bool:
+        """Checks whether a query needs neither translation nor correction.
+
+        That is when the query parses in the output dialect, every table it
+        reads (other than CTEs) has its dataset, and every column resolves
+        against the schema.
+        """
+        if not schema_dict:
+            return False
+        try:
+            tokens = sqlglot.tokenize(sql_query, read=cls.OUTPUT_DIALECT)
+            # SQLite reads double quotes as identifiers, GoogleSQL as strings.
+            if any(
+                token.token_type == TokenType.STRING and sql_query[token.start] == '"'
+                for token in tokens
+            ):
+                return False
+            sql_query_ast = sqlglot.parse_one(
+                sql=sql_query,
+                read=cls.OUTPUT_DIALECT,
+                error_level=sqlglot.ErrorLevel.IMMEDIATE,
+            )
+            ctes = {cte.alias for cte in sql_query_ast.find_all(sqlglot.exp.CTE)}
+            if any(
+                not table.db and table.name not in ctes
+                for table in sql_query_ast.find_all(sqlglot.exp.Table)
+            ):
+                return False
+            sqlglot.optimizer.qualify.qualify(
+                sql_query_ast,
+                dialect=cls.OUTPUT_DIALECT,
+                schema=schema_dict,
+                validate_qualify_columns=True,
+            )
+        except sqlglot.errors.SqlglotError:
+            return False
+        return True
+
     def _fix_errors(
         self,
         sql_query: str,
@@ -386,8 +467,13 @@ class SqlTranslator:
         )
         errors, sql_query = errors_and_sql
         responses = sql_query  # Default to the input SQL query after error check.
+        _count(
+            correction_passes=1,
+            correction_calls=number_of_candidates if errors else 0,
+        )
         if errors:
-            print("Processing input errors")
+            logger.debug("Processing errors: %s", errors)
+            tracing.current_span().add_event("sql.correction", {"errors": errors})
             if schema_dict:
                 # If the schema is provided, then insert it into the prompt.
                 schema_insert = f"\nThe database schema is:\n{schema_dict}\n"
@@ -415,6 +501,7 @@ class SqlTranslator:
                     responses = responses[0]
         return responses
 
+    @tracing.traced("SqlTranslator.translate")
     def translate(
         self,
         sql_query: str,
@@ -435,7 +522,21 @@ class SqlTranslator:
         Returns:
           The translated SQL query.
         """
-        print("****** sql_query at translator entry:", sql_query)
+        logger.debug("sql_query at translator entry: %s", sql_query)
+        is_output_dialect = self._is_valid_output_dialect(
+            sql_query, self.rewrite_schema_for_sqlglot(ddl_schema)
+        )
+        tracing.set_attributes(
+            tracing.current_span(), **{"sql.output_dialect": is_output_dialect}
+        )
+        _count(translations=1)
+        if is_output_dialect:
+            _count(
+                output_dialect=1,
+                correction_passes_skipped=bool(self._process_input_errors)
+                + bool(self._tool_output_errors),
+            )
+            return sql_query.strip()
         if self._process_input_errors:
             sql_query = self._fix_errors(
                 sql_query,
@@ -445,7 +546,7 @@ class SqlTranslator:
                 ddl_schema=ddl_schema,
                 apply_heuristics=True,
             )
-        print("****** sql_query after fix_errors:", sql_query)
+        logger.debug("sql_query after fix_errors: %s", sql_query)
         sql_query = sqlglot.transpile(
             sql=sql_query,
             read=self.INPUT_DIALECT,
@@ -454,7 +555,7 @@ class SqlTranslator:
         )[
             0
         ]  # Transpile returns a list of strings.
-        print("****** sql_query after transpile:", sql_query)
+        logger.debug("sql_query after transpile: %s", sql_query)
         if self._tool_output_errors:
             sql_query = self._fix_errors(
                 sql_query,
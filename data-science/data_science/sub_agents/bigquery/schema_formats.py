@@ -0,0 +1,139 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Renderings of a dataset's schema and sample rows for LLM prompts.
+
+-   `ddl`: a `CREATE OR REPLACE TABLE` statement per table, followed by an
+    `INSERT INTO ... VALUES` statement per sample row.
+-   `compact`: one line per table with `column:TYPE` pairs, then one line of
+    the distinct sample values of each column. Column descriptions are
+    listed once and referenced by number, since tables often share them.
+
+For example, in the compact format:
+
+    -- Columns are name:TYPE; [] marks an ARRAY and [dN] description N.
+    -- d1: Units sold that day
+    `p.sales.train`(id:INT64, country:STRING, num_sold:FLOAT64[d1])
+      id: 0 | 1 | 2
+      country: 'Canada' | 'Finland'
+      num_sold: NULL | 973.0
+"""
+
+import dataclasses
+from typing import Any
+
+DDL = "ddl"
+COMPACT = "compact"
+SCHEMA_FORMATS = (DDL, COMPACT)
+
+# Longer sample strings are cut in the compact format.
+MAX_COMPACT_VALUE_CHARS = 40
+
+
+@dataclasses.dataclass
+class Column:
+    """A column of a table."""
+
+    name: str
+    field_type: str
+    mode: str = "NULLABLE"
+    description: str | None = None
+
+
+@dataclasses.dataclass
+class TableSchema:
+    """The columns and sample rows of a table."""
+
+    table_ref: str
+    columns: list[Column]
+    rows: list[tuple[Any, ...]]
+
+
+def _ddl_value(value: Any) -> str:
+    if isinstance(value, str):
+        return f"'{value}'"
+    if value is None:
+        return "NULL"
+    return f"{value}"
+
+
+def render_ddl(tables: list[TableSchema]) -> str:
+    """Renders tables as DDL statements with INSERT statements of the samples."""
+    ddl_statements = ""
+    for table in tables:
+        ddl_statement = f"CREATE OR REPLACE TABLE `{table.table_ref}` (\n"
+        for column in table.columns:
+            ddl_statement += f"  `{column.name}` {column.field_type}"
+            if column.mode == "REPEATED":
+                ddl_statement += " ARRAY"
+            if column.description:
+                ddl_statement += f" COMMENT '{column.description}'"
+            ddl_statement += ",\n"
+        ddl_statement = ddl_statement[:-2] + "\n);\n\n"
+        if table.rows:
+            ddl_statement += f"-- Example values for table `{table.table_ref}`:\n"
+            for row in table.rows:
+                ddl_statement += f"INSERT INTO `{table.table_ref}` VALUES\n"
+                ddl_statement += (
+                    "(" + ",".join(_ddl_value(value) for value in row) + ");\n\n"
+                )
+        ddl_statements += ddl_statement
+    return ddl_statements
+
+
+def _compact_value(value: Any) -> str:
+    if isinstance(value, str):
+        if len(value) > MAX_COMPACT_VALUE_CHARS:
+            value = value[: MAX_COMPACT_VALUE_CHARS - 3] + "..."
+        return f"'{value}'"
+    if value is None:
+        return "NULL"
+    return f"{value}"
+
+
+def render_compact(tables: list[TableSchema]) -> str:
+    """Renders tables one line each, with columnized distinct sample values."""
+    descriptions: dict[str, int] = {}
+    lines = []
+    for table in tables:
+        columns = []
+        for column in table.columns:
+            text = f"{column.name}:{column.field_type}"
+            if column.mode == "REPEATED":
+                text += "[]"
+            if column.description:
+                number = descriptions.setdefault(
+                    column.description, len(descriptions) + 1
+                )
+                text += f"[d{number}]"
+            columns.append(text)
+        lines.append(f"`{table.table_ref}`({', '.join(columns)})")
+        for index, column in enumerate(table.columns):
+            values = list(
+                dict.fromkeys(_compact_value(row[index]) for row in table.rows)
+            )
+            if values:
+                lines.append(f"  {column.name}: {' | '.join(values)}")
+    header = ["-- Columns are name:TYPE; [] marks an ARRAY and [dN] description N."]
+    header += [f"-- d{number}: {text}" for text, number in descriptions.items()]
+    return "\n".join(header + lines) + "\n"
+
+
+def render(tables: list[TableSchema], schema_format: str = DDL) -> str:
+    """Renders tables in one of `SCHEMA_FORMATS`."""
+    if schema_format == DDL:
+        return render_ddl(tables)
+    if schema_format == COMPACT:
+        return render_compact(tables)
+    raise ValueError(f"Unknown schema format: {schema_format}")
@@ -0,0 +1,86 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Process-wide registry of DDL schemas, referenced by fingerprint.
+
+The DDL schema of a dataset, with its sample rows, can be megabytes. Session
+state only holds the schema's fingerprint (`schema_fingerprint` in the
+database settings) and tools resolve the DDL from this registry, so each
+schema version is stored once per process instead of being copied into, and
+serialized with, every session.
+
+A schema can be registered with renderings in other formats (see
+`schema_formats`); the fingerprint is always that of the DDL.
+"""
+
+import collections
+import threading
+from typing import Optional
+
+from .schema_formats import DDL
+from .semantic_cache import schema_hash
+
+
+class SchemaRegistry:
+    """Thread-safe map from schema fingerprint to DDL and other renderings.
+
+    Keeps the `max_versions` most recently registered or resolved schemas.
+    """
+
+    def __init__(self, max_versions: int = 16):
+        self._max_versions = max_versions
+        self._schemas = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, schema: str | dict[str, str]) -> str:
+        """Stores a schema and returns its fingerprint.
+
+        Args:
+            schema: The DDL, or the renderings of the schema by format, which
+              include the DDL.
+        """
+        renderings = {DDL: schema} if isinstance(schema, str) else dict(schema)
+        fingerprint = schema_hash(renderings[DDL])
+        with self._lock:
+            self._schemas[fingerprint] = renderings
+            self._schemas.move_to_end(fingerprint)
+            while len(self._schemas) > self._max_versions:
+                self._schemas.popitem(last=False)
+        return fingerprint
+
+    def get(
+        self, fingerprint: Optional[str], schema_format: str = DDL
+    ) -> Optional[str]:
+        """Returns the schema with this fingerprint, or None if not registered.
+
+        Falls back to the DDL if the schema was not rendered in `schema_format`.
+        """
+        with self._lock:
+            renderings = self._schemas.get(fingerprint)
+            if renderings is None:
+                return None
+            self._schemas.move_to_end(fingerprint)
+            return renderings.get(schema_format, renderings[DDL])
+
+    def discard(self, fingerprint: str) -> None:
+        """Removes a schema, if registered."""
+        with self._lock:
+            self._schemas.pop(fingerprint, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._schemas)
+
+
+registry = SchemaRegistry()
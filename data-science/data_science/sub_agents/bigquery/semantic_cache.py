@@ -0,0 +1,234 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Semantic cache of verified NL2SQL results.
+
+Questions answered by the database agent are embedded once their SQL has
+passed `run_bigquery_validation`, and stored together with the SQL and a hash
+of the schema they were generated against. A new question is embedded and
+compared against the cache:
+
+- similarity >= `direct_threshold`: the cached SQL is returned directly and the
+  generation LLM call is skipped.
+- similarity >= `candidate_threshold`: the cached SQL is passed to the
+  generation prompt as a reference candidate.
+
+Every served hit is tracked until the SQL is validated, so the cache reports
+the fraction of hits that produced valid SQL, and entries that repeatedly fail
+validation are dropped.
+
+With an `index_path`, changes are saved on a background timer at most every
+`save_interval` seconds, and at exit, rather than in the tool call.
+"""
+
+import atexit
+import collections
+import hashlib
+import logging
+import os
+import threading
+from typing import Any, Callable, Optional, Sequence
+
+from data_science.utils.vector_index import VectorIndex
+
+EmbedFn = Callable[[str], Sequence[float]]
+
+DIRECT = "direct"
+CANDIDATE = "candidate"
+
+# Entries whose served SQL fails validation this many times are evicted.
+MAX_ENTRY_FAILURES = 2
+
+
+def schema_hash(ddl_schema: str) -> str:
+    """Returns a short, stable hash of a schema string."""
+    return hashlib.sha256(ddl_schema.encode("utf-8")).hexdigest()[:16]
+
+
+def _normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+class SemanticSqlCache:
+    """Embedding-indexed cache of (question, SQL, schema hash) entries.
+
+    Attributes:
+      direct_threshold: Minimum cosine similarity for serving cached SQL
+        directly.
+      candidate_threshold: Minimum cosine similarity for passing cached SQL to
+        the generator as a candidate.
+    """
+
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        direct_threshold: float = 0.97,
+        candidate_threshold: float = 0.88,
+        max_entries: int = 10000,
+        index_path: Optional[str] = None,
+        save_interval: float = 5.0,
+    ):
+        self._embed_fn = embed_fn
+        self.direct_threshold = direct_threshold
+        self.candidate_threshold = candidate_threshold
+        self._index_path = index_path
+        if index_path and os.path.exists(index_path):
+            self._index = VectorIndex.load(index_path, max_entries=max_entries)
+        else:
+            self._index = VectorIndex(max_entries=max_entries)
+        self._lock = threading.Lock()
+        # Recently computed embeddings, so that storing a validated question
+        # does not embed it a second time.
+        self._embeddings: collections.OrderedDict[str, Sequence[float]] = (
+            collections.OrderedDict()
+        )
+        self._stats = collections.Counter()
+        self._save_interval = save_interval
+        self._save_timer: Optional[threading.Timer] = None
+        self._dirty = False
+        if index_path:
+            atexit.register(self.flush)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _embed(self, question: str) -> Sequence[float]:
+        key = _normalize_question(question)
+        with self._lock:
+            if key in self._embeddings:
+                self._embeddings.move_to_end(key)
+                return self._embeddings[key]
+        embedding = self._embed_fn(question)
+        with self._lock:
+            self._embeddings[key] = embedding
+            if len(self._embeddings) > 256:
+                self._embeddings.popitem(last=False)
+        return embedding
+
+    def cached_embedding(self, question: str) -> Optional[Sequence[float]]:
+        """Returns the embedding of a recently looked up question, if kept."""
+        with self._lock:
+            return self._embeddings.get(_normalize_question(question))
+
+    def lookup(self, question: str, schema: str) -> Optional[dict[str, Any]]:
+        """Finds the best cached entry for a question.
+
+        Args:
+          question: The natural language question.
+          schema: The hash of the schema the SQL must have been generated for.
+
+        Returns:
+          None on a miss, otherwise a dict with the cached `question`, `sql`,
+          `similarity`, `entry_id` and `mode` (`DIRECT` or `CANDIDATE`).
+        """
+        try:
+            embedding = self._embed(question)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logging.warning("Semantic cache lookup failed to embed: %s", e)
+            return None
+        results = self._index.search(
+            embedding, k=1, where=lambda payload: payload["schema_hash"] == schema
+        )
+        self._stats["lookups"] += 1
+        if not results or results[0][0] < self.candidate_threshold:
+            self._stats["misses"] += 1
+            return None
+        similarity, entry_id, payload = results[0]
+        mode = DIRECT if similarity >= self.direct_threshold else CANDIDATE
+        self._stats[f"{mode}_hits"] += 1
+        return {
+            "question": payload["question"],
+            "sql": payload["sql"],
+            "similarity": similarity,
+            "entry_id": entry_id,
+            "mode": mode,
+        }
+
+    def add(self, question: str, sql: str, schema: str) -> None:
+        """Stores a question whose SQL passed validation."""
+        try:
+            embedding = self._embed(question)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logging.warning("Semantic cache failed to embed question: %s", e)
+            return
+        payload = {"question": question, "sql": sql, "schema_hash": schema}
+        existing = self._index.search(
+            embedding, k=1, where=lambda p: p["schema_hash"] == schema
+        )
+        if existing and existing[0][0] >= self.direct_threshold:
+            # A paraphrase is already cached: keep the most recent SQL for it.
+            self._index.update(existing[0][1], {**existing[0][2], "sql": sql})
+        else:
+            self._index.add(embedding, {**payload, "failures": 0})
+        self._stats["stores"] += 1
+        self._schedule_save()
+
+    def _schedule_save(self) -> None:
+        """Saves the index once `save_interval` has passed, batching changes."""
+        if not self._index_path:
+            return
+        with self._lock:
+            self._dirty = True
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(self._save_interval, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def flush(self) -> None:
+        """Saves pending changes of the index to `index_path` now."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            dirty, self._dirty = self._dirty, False
+        if dirty:
+            self._index.save(self._index_path)
+
+    def record_outcome(self, hit: dict[str, Any], valid: bool) -> None:
+        """Records whether SQL served from a cache hit passed validation."""
+        self._stats[f"{hit['mode']}_hits_{'valid' if valid else 'invalid'}"] += 1
+        if valid or hit["mode"] != DIRECT:
+            # Candidates are rewritten by the generator, so a failure says
+            # little about the cached entry itself.
+            return
+        payload = self._index.get(hit["entry_id"])
+        if payload is None:
+            return
+        failures = payload.get("failures", 0) + 1
+        if failures >= MAX_ENTRY_FAILURES:
+            self._index.remove(hit["entry_id"])
+            self._stats["evictions"] += 1
+        else:
+            self._index.update(hit["entry_id"], {**payload, "failures": failures})
+        self._schedule_save()
+
+    def stats(self) -> dict[str, Any]:
+        """Returns hit/miss counters and the validated-hit ratio per mode."""
+        stats: dict[str, Any] = dict(self._stats)
+        stats["entries"] = len(self._index)
+        for mode in (DIRECT, CANDIDATE):
+            valid = self._stats[f"{mode}_hits_valid"]
+            judged = valid + self._stats[f"{mode}_hits_invalid"]
+            stats[f"{mode}_hit_precision"] = valid / judged if judged else None
+        return stats
+
+
+def format_candidate_hint(hit: dict[str, Any]) -> str:
+    """Formats a candidate hit for inclusion in an NL2SQL prompt."""
+    return (
+        "A previously verified SQL query for a similar question is given"
+        " below. Reuse it if it answers the question, otherwise adapt it.\n"
+        f"Similar question: {hit['question']}\n"
+        f"Verified SQL:\n{hit['sql']}\n"
+    )
@@ -0,0 +1,140 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Registry of the recent query results of a session.
+
+Follow-up questions such as "now break that down by month" would otherwise
+be answered by scanning the base tables again. BigQuery writes the result of
+every query to an anonymous table, which is kept for about a day and can be
+queried by the user who ran the query; the local backend keeps its results
+in memory the same way (see `LocalQueryJob.destination`).
+
+`run_bigquery_validation` records the destination table of each complete
+result in the session state, keeping the `MAX_SESSION_RESULTS` most recent
+ones. Only the table references, columns and the questions they answer are
+kept in the state, never the rows. The NL2SQL prompts list these tables next
+to the dataset schema, so follow-up SQL can read the small prior result.
+"""
+
+import os
+import re
+from typing import Any, Iterable, Optional
+
+from . import schema_formats
+
+MAX_SESSION_RESULTS = int(os.getenv("BQ_SESSION_RESULTS", "3"))
+
+STATE_KEY = "session_results"
+
+_HEADER = (
+    "-- Results of earlier questions in this conversation. A follow-up question"
+    " can query\n-- these tables instead of the base tables.\n"
+)
+
+
+def _table_ref(destination: Any) -> str:
+    if isinstance(destination, str):
+        return destination.replace("`", "")
+    return f"{destination.project}.{destination.dataset_id}.{destination.table_id}"
+
+
+def record(
+    state,
+    destination: Any,
+    schema: Iterable[Any],
+    num_rows: int,
+    sql: str,
+    question: Optional[str] = None,
+) -> Optional[dict]:
+    """Records a query result in the session state.
+
+    Args:
+        state: The session state.
+        destination: The table holding the result, as a table reference or a
+            `project.dataset.table` string.
+        schema: The `SchemaField`s of the result.
+        num_rows: The number of rows of the result.
+        sql: The query that produced the result.
+        question: The question the query answers, if known.
+
+    Returns:
+        The recorded entry, or None if results are not recorded.
+    """
+    if MAX_SESSION_RESULTS <= 0 or destination is None:
+        return None
+    entry = {
+        "table": _table_ref(destination),
+        "columns": [
+            [field.name, field.field_type, field.mode or "NULLABLE"]
+            for field in schema
+        ],
+        "num_rows": num_rows,
+        "sql": sql,
+        "question": question,
+    }
+    if not entry["columns"]:
+        return None
+    extend(state, [entry])
+    return entry
+
+
+def extend(state, entries: list[dict]) -> None:
+    """Records entries returned by `record`, e.g. in a copy of the state."""
+    tables = {entry["table"] for entry in entries}
+    previous = [r for r in state.get(STATE_KEY) or [] if r["table"] not in tables]
+    # Reassigned rather than mutated, so that the session records the change.
+    state[STATE_KEY] = (previous + list(entries))[-MAX_SESSION_RESULTS:]
+
+
+def results(state) -> list[dict]:
+    """Returns the recorded results of a session, oldest first."""
+    return list(state.get(STATE_KEY) or [])
+
+
+def render(state, schema_format: str = schema_formats.DDL) -> str:
+    """Renders the recorded results as a schema for the NL2SQL prompts.
+
+    Returns:
+        The tables of the recorded results, after the questions they answer,
+        or an empty string if there are none.
+    """
+    entries = results(state)
+    if not entries:
+        return ""
+    text = _HEADER
+    for entry in entries:
+        answers = " ".join((entry["question"] or entry["sql"]).split())
+        text += f"-- `{entry['table']}`: {entry['num_rows']} rows of \"{answers}\"\n"
+    return text + schema_formats.render(
+        [
+            schema_formats.TableSchema(
+                table_ref=entry["table"],
+                columns=[
+                    schema_formats.Column(name, field_type, mode)
+                    for name, field_type, mode in entry["columns"]
+                ],
+                rows=[],
+            )
+            for entry in entries
+        ],
+        schema_format,
+    )
+
+
+def references(state, sql: str) -> bool:
+    """Whether a query reads any of the recorded results of a session."""
+    text = sql.replace("`", "")
+    return any(
+        re.search(rf"\b{re.escape(entry['table'])}\b", text) for entry in results(state)
+    )
@@ -14,67 +14,382 @@
 
 """This file contains the tools used by the database agent."""
 
+import asyncio
+import concurrent.futures
 import datetime
 import logging
 import os
 import re
+import threading
 
+from data_science.utils import cassette, result_encoder, tracing
 from data_science.utils.utils import get_env_var
 from google.adk.tools import ToolContext
 from google.cloud import bigquery
 from google.genai import Client
 
+from . import (
+    admission,
+    backends,
+    bulk_export,
+    schema_formats,
+    schema_registry,
+    semantic_cache,
+    session_results,
+)
+from . import catalog as dataset_catalog
 from .chase_sql import chase_constants
 
+logger = logging.getLogger(__name__)
+
 # Assume that `BQ_PROJECT_ID` is set in the environment. See the
 # `data_agent` README for more details.
 project = os.getenv("BQ_PROJECT_ID", None)
 location = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
-llm_client = Client(vertexai=True, project=project, location=location)
+
+# Created on first use by `get_llm_client()`, not at import time.
+llm_client = None
+_llm_client_lock = threading.Lock()
+
+# Either `bigquery` or `local`; see `backends.py`.
+BQ_BACKEND = os.getenv("BQ_BACKEND", "bigquery")
 
 MAX_NUM_ROWS = 80
 
+# Encoding of query results in `run_bigquery_validation` responses and in the
+# data science agent's request; see `result_encoder.py`. The token budget and
+# value length only apply to the tool response, which the agent reads, not to
+# the data handed over for analysis.
+QUERY_RESULT_FORMAT = os.getenv("QUERY_RESULT_FORMAT", result_encoder.CSV)
+QUERY_RESULT_TOKEN_BUDGET = int(os.getenv("QUERY_RESULT_TOKEN_BUDGET", "2000"))
+QUERY_RESULT_MAX_VALUE_CHARS = int(os.getenv("QUERY_RESULT_MAX_VALUE_CHARS", "100"))
+
+# Concurrent table metadata requests when the catalog indexes a dataset.
+CATALOG_METADATA_WORKERS = 8
+
+# Schema rendering in the NL2SQL prompts; see `schema_formats.py`.
+NL2SQL_SCHEMA_FORMAT = os.getenv("BIGQUERY_AGENT_SCHEMA_FORMAT", schema_formats.DDL)
+
+
+def get_llm_client() -> Client:
+    """Get the shared Gemini client, creating it on first use."""
+    global llm_client
+    if llm_client is None:
+        with _llm_client_lock:
+            if llm_client is None:
+                llm_client = cassette.wrap_genai_client(
+                    lambda: Client(vertexai=True, project=project, location=location)
+                )
+    return llm_client
+
+
+def _embed_question(question: str) -> list[float]:
+    """Embeds a question for the semantic SQL cache."""
+    response = get_llm_client().models.embed_content(
+        model=os.getenv("NL2SQL_EMBEDDING_MODEL", "text-embedding-005"),
+        contents=question,
+    )
+    return response.embeddings[0].values
+
+
+# Semantic cache of validated SQL, shared by all sessions of this process.
+sql_cache = (
+    semantic_cache.SemanticSqlCache(
+        embed_fn=_embed_question,
+        direct_threshold=float(os.getenv("NL2SQL_CACHE_DIRECT_THRESHOLD", "0.97")),
+        candidate_threshold=float(
+            os.getenv("NL2SQL_CACHE_CANDIDATE_THRESHOLD", "0.88")
+        ),
+        index_path=os.getenv("NL2SQL_CACHE_PATH") or None,
+    )
+    if os.getenv("NL2SQL_SEMANTIC_CACHE", "0") == "1"
+    else None
+)
+
 
 database_settings = None
 bq_client = None
+bq_read_client = None
+catalog = None
+_bq_client_lock = threading.Lock()
+_catalog_lock = threading.Lock()
+_database_settings_lock = threading.Lock()
 
 
 def get_bq_client():
-    """Get BigQuery client."""
+    """Get BigQuery client for the backend selected by `BQ_BACKEND`."""
     global bq_client
     if bq_client is None:
-        bq_client = bigquery.Client(project=get_env_var("BQ_PROJECT_ID"))
+        with _bq_client_lock:
+            if bq_client is None:
+                bq_client = backends.create_client(
+                    BQ_BACKEND, project=get_env_var("BQ_PROJECT_ID")
+                )
     return bq_client
 
 
-def get_database_settings():
-    """Get database settings."""
-    global database_settings
-    if database_settings is None:
-        database_settings = update_database_settings()
-    return database_settings
+def get_bq_read_client() -> backends.ReadBackend:
+    """Get the Storage Read API client of the backend selected by `BQ_BACKEND`."""
+    global bq_read_client
+    if bq_read_client is None:
+        with _bq_client_lock:
+            if bq_read_client is None:
+                bq_read_client = backends.create_read_client(
+                    BQ_BACKEND, get_bq_client()
+                )
+    return bq_read_client
 
 
-def update_database_settings():
-    """Update database settings."""
-    global database_settings
-    ddl_schema = get_bigquery_schema(
-        get_env_var("BQ_DATASET_ID"),
-        client=get_bq_client(),
-        project_id=get_env_var("BQ_PROJECT_ID"),
+# Concurrency caps of the BigQuery jobs of all sessions; see `admission.py`.
+admission_controller = admission.AdmissionController(
+    max_concurrent=int(os.getenv("BQ_MAX_CONCURRENT_JOBS", "10")),
+    max_per_session=int(os.getenv("BQ_MAX_SESSION_JOBS", "4")),
+    max_per_priority={
+        admission.TRAINING: int(os.getenv("BQ_MAX_TRAINING_JOBS", "2")),
+    },
+)
+
+
+# Complete query results for the data science agent; see `bulk_export.py`.
+bulk_exporter = bulk_export.BulkExporter(
+    os.getenv("BQ_EXPORT_DIR") or None,
+    max_streams=int(os.getenv("BQ_EXPORT_MAX_STREAMS", "4")),
+)
+
+
+@tracing.traced()
+async def export_query_result(
+    sql: str, session: str
+) -> bulk_export.ExportedResult:
+    """Exports the complete result of a query as a Parquet dataset.
+
+    Waits for admission without blocking the event loop, and runs the export
+    in a thread.
+
+    Args:
+        sql (str): A query that passed `run_bigquery_validation`, without the
+            row limit added there.
+        session (str): Admission key of the session, see
+            `admission.session_key`.
+
+    Returns:
+        bulk_export.ExportedResult: The export.
+
+    Raises:
+        admission.AdmissionTimeout: Too many BigQuery jobs are running.
+    """
+    async with admission_controller.admit_async(session, admission.ANALYTICS):
+        result = await asyncio.to_thread(
+            bulk_exporter.export_query, get_bq_client(), get_bq_read_client(), sql
+        )
+    tracing.set_attributes(
+        tracing.current_span(),
+        **{
+            "bq.export_rows": result.num_rows,
+            "bq.export_streams": result.streams,
+            "bq.export_bytes": result.num_bytes,
+        },
     )
-    database_settings = {
-        "bq_project_id": get_env_var("BQ_PROJECT_ID"),
-        "bq_dataset_id": get_env_var("BQ_DATASET_ID"),
-        "bq_ddl_schema": ddl_schema,
+    return result
+
+
+def _load_catalog_schema(ref: dataset_catalog.DatasetRef) -> dict[str, str]:
+    tables = describe_bigquery_dataset(
+        ref.dataset, client=get_bq_client(), project_id=ref.project
+    )
+    return {
+        schema_format: schema_formats.render(tables, schema_format)
+        for schema_format in schema_formats.SCHEMA_FORMATS
+    }
+
+
+def _list_catalog_columns(ref: dataset_catalog.DatasetRef) -> dict[str, list[str]]:
+    client = get_bq_client()
+    dataset_ref = bigquery.DatasetReference(ref.project, ref.dataset)
+    table_ids = [table.table_id for table in client.list_tables(dataset_ref)]
+    if not table_ids:
+        return {}
+    # One metadata round trip per table, so they are fetched concurrently.
+    with concurrent.futures.ThreadPoolExecutor(
+        min(CATALOG_METADATA_WORKERS, len(table_ids))
+    ) as executor:
+        tables = executor.map(
+            lambda table_id: client.get_table(dataset_ref.table(table_id)),
+            table_ids,
+        )
+        return {
+            table_id: [field.name for field in table.schema]
+            for table_id, table in zip(table_ids, tables)
+        }
+
+
+def get_catalog() -> dataset_catalog.DatasetCatalog:
+    """Get the catalog of datasets set by `BQ_DATASET_CATALOG`.
+
+    Defaults to the single dataset `BQ_DATASET_ID`. No schema is loaded until a
+    dataset is used.
+    """
+    global catalog
+    if catalog is None:
+        with _catalog_lock:
+            if catalog is None:
+                catalog = dataset_catalog.DatasetCatalog(
+                    dataset_catalog.parse_catalog(
+                        os.getenv("BQ_DATASET_CATALOG")
+                        or get_env_var("BQ_DATASET_ID"),
+                        get_env_var("BQ_PROJECT_ID"),
+                    ),
+                    load_schema=_load_catalog_schema,
+                    list_columns=_list_catalog_columns,
+                    max_loaded=int(os.getenv("BQ_CATALOG_MAX_LOADED", "4")),
+                )
+    return catalog
+
+
+def _dataset_settings(ref: dataset_catalog.DatasetRef, fingerprint: str) -> dict:
+    return {
+        "bq_project_id": ref.project,
+        "bq_dataset_id": ref.dataset,
+        # The settings are copied into session state, so they only reference
+        # the DDL schema; resolve it with `get_ddl_schema`.
+        "schema_fingerprint": fingerprint,
         # Include ChaseSQL-specific constants.
         **chase_constants.chase_sql_constants_dict,
     }
+
+
+def get_database_settings(project_id=None, dataset_id=None):
+    """Get database settings of a catalog dataset, loading its schema on first use.
+
+    Args:
+        project_id (str): The project of the dataset.
+        dataset_id (str): The dataset. Defaults to the catalog's first dataset.
+
+    Returns:
+        dict: The database settings.
+    """
+    ref = get_catalog().resolve(project_id, dataset_id)
+    if ref != get_catalog().default:
+        return _dataset_settings(ref, get_catalog().schema_fingerprint(ref))
+    if database_settings is None:
+        with _database_settings_lock:
+            if database_settings is None:
+                update_database_settings()
     return database_settings
 
 
-def get_bigquery_schema(dataset_id, client=None, project_id=None):
-    """Retrieves schema and generates DDL with example values for a BigQuery dataset.
+def update_database_settings(project_id=None, dataset_id=None):
+    """Reload the schema of a catalog dataset and return its database settings.
+
+    Args:
+        project_id (str): The project of the dataset.
+        dataset_id (str): The dataset. Defaults to the catalog's first dataset.
+
+    Returns:
+        dict: The database settings.
+    """
+    global database_settings
+    ref = get_catalog().resolve(project_id, dataset_id)
+    settings = _dataset_settings(
+        ref, get_catalog().schema_fingerprint(ref, reload=True)
+    )
+    if ref == get_catalog().default:
+        database_settings = settings
+    return settings
+
+
+def get_ddl_schema(settings: dict, schema_format: str = schema_formats.DDL) -> str:
+    """Get the DDL schema referenced by database settings.
+
+    Reloads the schema of the settings' dataset if the referenced version is
+    no longer registered, e.g. after its eviction or for a session persisted
+    before a restart.
+
+    Args:
+        settings (dict): Database settings, as stored in session state.
+        schema_format (str): One of `schema_formats.SCHEMA_FORMATS`.
+
+    Returns:
+        str: The schema, rendered in `schema_format`.
+    """
+    fingerprint = settings.get("schema_fingerprint")
+    ddl_schema = schema_registry.registry.get(fingerprint, schema_format)
+    if ddl_schema is not None:
+        return ddl_schema
+    try:
+        ref = get_catalog().resolve(
+            settings.get("bq_project_id"), settings.get("bq_dataset_id")
+        )
+    except ValueError:
+        ref = get_catalog().default
+    current = get_catalog().schema_fingerprint(ref)
+    if current != fingerprint:
+        logger.info(
+            "Schema %s is not registered; using the current schema %s of %s.",
+            fingerprint,
+            current,
+            ref,
+        )
+    return schema_registry.registry.get(current, schema_format)
+
+
+def sync_database_settings(state) -> None:
+    """Points session state at the current schema of the session's dataset.
+
+    Sessions start on the catalog's default dataset. With several datasets in
+    the catalog, no schema is loaded until a question is routed to a dataset
+    (see `route_dataset`).
+
+    Args:
+        state: The session state.
+    """
+    current = state.get("database_settings")
+    if current is None and len(get_catalog().datasets) > 1:
+        return
+    current = current or {}
+    try:
+        settings = get_database_settings(
+            current.get("bq_project_id"), current.get("bq_dataset_id")
+        )
+    except ValueError:
+        settings = get_database_settings()
+    if state.get("schema_fingerprint") != settings["schema_fingerprint"]:
+        state["database_settings"] = settings
+        state["schema_fingerprint"] = settings["schema_fingerprint"]
+
+
+def route_dataset(question: str, tool_context: ToolContext) -> dict:
+    """Routes a question to its most relevant catalog dataset.
+
+    Loads the dataset's schema if needed and points the session state at it.
+
+    Args:
+        question (str): Natural language question.
+        tool_context (ToolContext): The tool context.
+
+    Returns:
+        dict: The database settings of the dataset.
+    """
+    current = tool_context.state.get("database_settings")
+    current_ref = None
+    if current:
+        try:
+            current_ref = get_catalog().resolve(
+                current.get("bq_project_id"), current.get("bq_dataset_id")
+            )
+        except ValueError:
+            pass
+    ref = get_catalog().route(question, current_ref)
+    settings = get_database_settings(ref.project, ref.dataset)
+    if tool_context.state.get("schema_fingerprint") != settings["schema_fingerprint"]:
+        tool_context.state["database_settings"] = settings
+        tool_context.state["schema_fingerprint"] = settings["schema_fingerprint"]
+    tracing.set_attributes(tracing.current_span(), **{"nl2sql.dataset": str(ref)})
+    return settings
+
+
+def describe_bigquery_dataset(dataset_id, client=None, project_id=None):
+    """Retrieves the columns and a few example rows of every table of a dataset.
 
     Args:
         dataset_id (str): The ID of the BigQuery dataset (e.g., 'my_dataset').
@@ -82,7 +397,7 @@ def get_bigquery_schema(dataset_id, client=None, project_id=None):
         project_id (str): The ID of your Google Cloud Project.
 
     Returns:
-        str: A string containing the generated DDL statements.
+        list[schema_formats.TableSchema]: The tables, without views.
     """
 
     if client is None:
@@ -91,7 +406,7 @@ def get_bigquery_schema(dataset_id, client=None, project_id=None):
     # dataset_ref = client.dataset(dataset_id)
     dataset_ref = bigquery.DatasetReference(project_id, dataset_id)
 
-    ddl_statements = ""
+    tables = []
 
     for table in client.list_tables(dataset_ref):
         table_ref = dataset_ref.table(table.table_id)
@@ -101,42 +416,99 @@ def get_bigquery_schema(dataset_id, client=None, project_id=None):
         if table_obj.table_type != "TABLE":
             continue
 
-        ddl_statement = f"CREATE OR REPLACE TABLE `{table_ref}` (\n"
+        # Add example values if available
+        rows = client.list_rows(table_ref, max_results=5).to_dataframe()
+        tables.append(
+            schema_formats.TableSchema(
+                table_ref=str(table_ref),
+                columns=[
+                    schema_formats.Column(
+                        field.name, field.field_type, field.mode, field.description
+                    )
+                    for field in table_obj.schema
+                ],
+                rows=[tuple(row.values) for _, row in rows.iterrows()],
+            )
+        )
 
-        for field in table_obj.schema:
-            ddl_statement += f"  `{field.name}` {field.field_type}"
-            if field.mode == "REPEATED":
-                ddl_statement += " ARRAY"
-            if field.description:
-                ddl_statement += f" COMMENT '{field.description}'"
-            ddl_statement += ",\n"
+    return tables
 
-        ddl_statement = ddl_statement[:-2] + "\n);\n\n"
 
-        # Add example values if available (limited to first row)
-        rows = client.list_rows(table_ref, max_results=5).to_dataframe()
-        if not rows.empty:
-            ddl_statement += f"-- Example values for table `{table_ref}`:\n"
-            for _, row in rows.iterrows():  # Iterate over DataFrame rows
-                ddl_statement += f"INSERT INTO `{table_ref}` VALUES\n"
-                example_row_str = "("
-                for value in row.values:  # Now row is a pandas Series and has values
-                    if isinstance(value, str):
-                        example_row_str += f"'{value}',"
-                    elif value is None:
-                        example_row_str += "NULL,"
-                    else:
-                        example_row_str += f"{value},"
-                example_row_str = (
-                    example_row_str[:-1] + ");\n\n"
-                )  # remove trailing comma
-                ddl_statement += example_row_str
-
-        ddl_statements += ddl_statement
-
-    return ddl_statements
+def get_bigquery_schema(
+    dataset_id, client=None, project_id=None, schema_format=schema_formats.DDL
+):
+    """Retrieves schema and generates DDL with example values for a BigQuery dataset.
+
+    Args:
+        dataset_id (str): The ID of the BigQuery dataset (e.g., 'my_dataset').
+        client (bigquery.Client): A BigQuery client.
+        project_id (str): The ID of your Google Cloud Project.
+        schema_format (str): One of `schema_formats.SCHEMA_FORMATS`.
+
+    Returns:
+        str: A string containing the generated DDL statements.
+    """
+    return schema_formats.render(
+        describe_bigquery_dataset(dataset_id, client=client, project_id=project_id),
+        schema_format,
+    )
+
+
+def lookup_cached_sql(question: str, tool_context: ToolContext) -> dict | None:
+    """Looks up a question in the semantic SQL cache.
+
+    The question and any hit are kept in the session state, so that
+    `run_bigquery_validation` can store the validated SQL and track whether
+    the served SQL was valid.
+
+    Args:
+        question (str): Natural language question.
+        tool_context (ToolContext): The tool context.
+
+    Returns:
+        dict | None: The cache hit (see `SemanticSqlCache.lookup`), or None.
+    """
+    tool_context.state["nl2sql_question"] = question
+    tool_context.state["nl2sql_cache_hit"] = None
+    if sql_cache is None:
+        return None
+    hit = sql_cache.lookup(
+        question, tool_context.state["database_settings"]["schema_fingerprint"]
+    )
+    tool_context.state["nl2sql_cache_hit"] = hit
+    tracing.set_attributes(
+        tracing.current_span(),
+        **{
+            "nl2sql.cache_hit": hit["mode"] if hit else "miss",
+            "nl2sql.cache_similarity": hit["similarity"] if hit else None,
+        },
+    )
+    return hit
+
+
+def _update_sql_cache(sql_string: str, tool_context: ToolContext, valid: bool):
+    """Feeds a validation outcome back into the semantic SQL cache."""
+    if sql_cache is None:
+        return
+    hit = tool_context.state.get("nl2sql_cache_hit")
+    if hit:
+        sql_cache.record_outcome(hit, valid)
+        tool_context.state["nl2sql_cache_hit"] = None
+    question = tool_context.state.get("nl2sql_question")
+    if valid and question:
+        # SQL reading the session's earlier results is not reusable elsewhere.
+        if (
+            not hit or hit["mode"] != semantic_cache.DIRECT
+        ) and not session_results.references(tool_context.state, sql_string):
+            sql_cache.add(
+                question,
+                sql_string,
+                tool_context.state["database_settings"]["schema_fingerprint"],
+            )
+        tool_context.state["nl2sql_question"] = None
 
 
+@tracing.traced()
 def initial_bq_nl2sql(
     question: str,
     tool_context: ToolContext,
@@ -165,6 +537,7 @@ You are a BigQuery SQL expert tasked with answering user's questions about BigQu
 - **FILTERS:** You should write query effectively  to reduce and minimize the total rows to be returned. For example, you can use filters (like `WHERE`, `HAVING`, etc. (like 'COUNT', 'SUM', etc.) in the SQL query.
 - **LIMIT ROWS:**  The maximum number of rows returned should be less than {MAX_NUM_ROWS}.
 
+{CACHE_HINT}
 **Schema:**
 
 The database structure is defined by the following table schemas (possibly with sample rows):
@@ -172,7 +545,7 @@ The database structure is defined by the following table schemas (possibly with
 ```
 {SCHEMA}
 ```
-
+{SESSION_RESULTS}
 **Natural language question:**
 
 ```
@@ -183,29 +556,53 @@ The database structure is defined by the following table schemas (possibly with
 
    """
 
-    ddl_schema = tool_context.state["database_settings"]["bq_ddl_schema"]
+    ddl_schema = get_ddl_schema(
+        route_dataset(question, tool_context), NL2SQL_SCHEMA_FORMAT
+    )
+    prior_results = session_results.render(tool_context.state, NL2SQL_SCHEMA_FORMAT)
+
+    hit = lookup_cached_sql(question, tool_context)
+    if hit and hit["mode"] == semantic_cache.DIRECT:
+        tool_context.state["sql_query"] = hit["sql"]
+        return hit["sql"]
 
     prompt = prompt_template.format(
-        MAX_NUM_ROWS=MAX_NUM_ROWS, SCHEMA=ddl_schema, QUESTION=question
+        MAX_NUM_ROWS=MAX_NUM_ROWS,
+        SCHEMA=ddl_schema,
+        QUESTION=question,
+        SESSION_RESULTS=(
+            "\n**Previous results:**\n\n```\n" + prior_results + "```\n"
+            if prior_results
+            else ""
+        ),
+        CACHE_HINT=(
+            "\n**Reference:**\n\n" + semantic_cache.format_candidate_hint(hit)
+            if hit
+            else ""
+        ),
     )
 
-    response = llm_client.models.generate_content(
-        model=os.getenv("BASELINE_NL2SQL_MODEL"),
-        contents=prompt,
-        config={"temperature": 0.1},
-    )
+    model = os.getenv("BASELINE_NL2SQL_MODEL")
+    with tracing.span("llm.generate_content", **{"llm.model": model}) as llm_span:
+        response = get_llm_client().models.generate_content(
+            model=model,
+            contents=prompt,
+            config={"temperature": 0.1},
+        )
+        tracing.set_llm_usage(llm_span, response, prompt)
 
     sql = response.text
     if sql:
         sql = sql.replace("```sql", "").replace("```", "").strip()
 
-    print("\n sql:", sql)
+    logger.debug("Generated SQL: %s", sql)
 
     tool_context.state["sql_query"] = sql
 
     return sql
 
 
+@tracing.traced()
 def run_bigquery_validation(
     sql_string: str,
     tool_context: ToolContext,
@@ -223,20 +620,27 @@ def run_bigquery_validation(
     3. **Syntax and Execution:** Sends the cleaned SQL to BigQuery for validation.
        If the query is syntactically correct and executable, it retrieves the
        results.
+       The query runs as an interactive job of `admission_controller`.
     4. **Result Analysis:**  Checks if the query produced any results. If so, it
-       formats the first few rows of the result set for inspection.
+       encodes as many rows as fit in `QUERY_RESULT_TOKEN_BUDGET` as a table,
+       naming the columns once (see `result_encoder.py`). All rows are kept in
+       the session state for the data science agent.
+    5. **Session Results:** Records the table holding a complete result, so
+       that follow-up questions can query it (see `session_results.py`).
 
     Args:
         sql_string (str): The SQL query string to validate.
         tool_context (ToolContext): The tool context to use for validation.
 
     Returns:
-        str: A message indicating the validation outcome. This includes:
-             - "Valid SQL. Results: ..." if the query is valid and returns data.
-             - "Valid SQL. Query executed successfully (no results)." if the query
-                is valid but returns no data.
-             - "Invalid SQL: ..." if the query is invalid, along with the error
-                message from BigQuery.
+        dict: The validation outcome, with:
+             - "query_result": the encoded rows if the query is valid and
+                returns data, "row_count" their number and, if only the first
+                rows fit in the token budget, "rows_shown" the number encoded.
+             - "error_message": None if the query returned data, otherwise
+                "Valid SQL. Query executed successfully (no results)." if the
+                query is valid but returns no data, or "Invalid SQL: ..." with
+                the error message from BigQuery if the query is invalid.
     """
 
     def cleanup_sql(sql_string):
@@ -254,17 +658,20 @@ def run_bigquery_validation(
         # 4. Replace escaped newlines (those not preceded by a backslash)
         sql_string = sql_string.replace("\\n", "\n")
 
-        # 5. Add limit clause if not present
-        if "limit" not in sql_string.lower():
-            sql_string = sql_string + " limit " + str(MAX_NUM_ROWS)
-
         return sql_string
 
-    logging.info("Validating SQL: %s", sql_string)
+    logger.debug("Validating SQL: %s", sql_string)
     sql_string = cleanup_sql(sql_string)
-    logging.info("Validating SQL (after cleanup): %s", sql_string)
+    # Without the limit below, for bulk exports of the complete result.
+    full_sql = sql_string
+    # Add limit clause if not present
+    has_limit = "limit" in sql_string.lower()
+    if not has_limit:
+        sql_string = sql_string + " limit " + str(MAX_NUM_ROWS)
+    logger.debug("Validating SQL (after cleanup): %s", sql_string)
 
     final_result = {"query_result": None, "error_message": None}
+    valid = False
 
     # More restrictive check for BigQuery - disallow DML and DDL
     if re.search(
@@ -273,11 +680,23 @@ def run_bigquery_validation(
         final_result["error_message"] = (
             "Invalid SQL: Contains disallowed DML/DDL operations."
         )
+        _update_sql_cache(sql_string, tool_context, valid)
         return final_result
 
     try:
-        query_job = get_bq_client().query(sql_string)
-        results = query_job.result()  # Get the query results
+        with admission_controller.admit(
+            admission.session_key(tool_context.state), admission.INTERACTIVE
+        ):
+            query_job = get_bq_client().query(sql_string)
+            results = query_job.result()  # Get the query results
+        tracing.set_attributes(
+            tracing.current_span(),
+            **{
+                "bq.job_id": query_job.job_id,
+                "bq.bytes_processed": query_job.total_bytes_processed,
+                "bq.cache_hit": getattr(query_job, "cache_hit", None),
+            },
+        )
 
         if results.schema:  # Check if query returned data
             rows = [
@@ -293,21 +712,59 @@ def run_bigquery_validation(
             ][
                 :MAX_NUM_ROWS
             ]  # Convert BigQuery RowIterator to list of dicts
-            # return f"Valid SQL. Results: {rows}"
-            final_result["query_result"] = rows
+            encoded = result_encoder.encode_rows(
+                rows,
+                QUERY_RESULT_FORMAT,
+                max_tokens=QUERY_RESULT_TOKEN_BUDGET,
+                max_value_chars=QUERY_RESULT_MAX_VALUE_CHARS,
+            )
+            final_result["query_result"] = encoded.text
+            final_result["row_count"] = encoded.total_rows
+            if encoded.rows_shown < encoded.total_rows:
+                final_result["rows_shown"] = encoded.rows_shown
 
             tool_context.state["query_result"] = rows
+            tool_context.state["query_sql"] = full_sql
+            tracing.set_attributes(
+                tracing.current_span(),
+                **{
+                    "bq.row_count": len(rows),
+                    "bq.rows_shown": encoded.rows_shown,
+                },
+            )
+            # A result cut at MAX_NUM_ROWS by the added limit would mislead
+            # follow-up questions, so only complete results are recorded.
+            num_rows = getattr(results, "total_rows", None) or len(rows)
+            if has_limit or num_rows < MAX_NUM_ROWS:
+                session_results.record(
+                    tool_context.state,
+                    getattr(query_job, "destination", None),
+                    results.schema,
+                    num_rows,
+                    sql_string,
+                    tool_context.state.get("nl2sql_question"),
+                )
 
         else:
             final_result["error_message"] = (
                 "Valid SQL. Query executed successfully (no results)."
             )
+        valid = True
 
+    except admission.AdmissionTimeout as e:
+        # The SQL was never run, so it is neither valid nor invalid.
+        final_result["error_message"] = f"BigQuery is busy: {e} Try again later."
+        return final_result
     except (
         Exception
     ) as e:  # Catch generic exceptions from BigQuery  # pylint: disable=broad-exception-caught
         final_result["error_message"] = f"Invalid SQL: {e}"
 
-    print("\n run_bigquery_validation final_result: \n", final_result)
+    # Cached without the row limit added above, which is added again when the
+    # cached SQL is validated.
+    _update_sql_cache(full_sql, tool_context, valid)
+
+    tracing.current_span().set_attribute("sql.valid", valid)
+    logger.debug("run_bigquery_validation final_result: %s", final_result)
 
     return final_result
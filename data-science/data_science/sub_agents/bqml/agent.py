@@ -13,6 +13,8 @@
 # limitations under the License.
 
 """Data Science Agent V2: generate nl2py and use code interpreter to run the code."""
+import functools
+import logging
 import os
 from google.adk.agents import Agent
 from google.adk.tools import ToolContext
@@ -23,60 +25,72 @@ from google.adk.agents.callback_context import CallbackContext
 from data_science.sub_agents.bqml.tools import (
     check_bq_models,
     execute_bqml_code,
+    fetch_bqml_results,
     rag_response,
 )
+from data_science.utils import cassette, tracing
+from data_science.utils.instructions import SchemaInstructionProvider
+from data_science.utils.tools import precompiled
 from .prompts import return_instructions_bqml
 
 
 from data_science.sub_agents.bigquery.agent import database_agent as bq_db_agent
 from data_science.sub_agents.bigquery.tools import (
-    get_database_settings as get_bq_database_settings,
+    get_ddl_schema as get_bq_ddl_schema,
+    sync_database_settings as sync_bq_database_settings,
 )
 
+logger = logging.getLogger(__name__)
+
+bq_db_agent_tool = AgentTool(agent=bq_db_agent)
+
 
 def setup_before_agent_call(callback_context: CallbackContext):
     """Setup the agent."""
 
     # setting up database settings in session.state
-    if "database_settings" not in callback_context.state:
+    if "all_db_settings" not in callback_context.state:
         db_settings = dict()
         db_settings["use_database"] = "BigQuery"
         callback_context.state["all_db_settings"] = db_settings
 
-    # setting up schema in instruction
+    # setting up schema in session.state; the instruction provider renders it
     if callback_context.state["all_db_settings"]["use_database"] == "BigQuery":
-        callback_context.state["database_settings"] = get_bq_database_settings()
-        schema = callback_context.state["database_settings"]["bq_ddl_schema"]
+        sync_bq_database_settings(callback_context.state)
+
 
-        callback_context._invocation_context.agent.instruction = (
-            return_instructions_bqml()
-            + f"""
+bqml_instruction = SchemaInstructionProvider(
+    return_instructions_bqml,
+    """
 
    </BQML Reference for this query>
     
     <The BigQuery schema of the relevant data with a few sample rows>
     {schema}
     </The BigQuery schema of the relevant data with a few sample rows>
-    """
-        )
+    """,
+    functools.partial(
+        get_bq_ddl_schema, schema_format=os.getenv("BQML_AGENT_SCHEMA_FORMAT", "ddl")
+    ),
+)
 
 
+@tracing.traced("bqml.call_db_agent")
 async def call_db_agent(
     question: str,
     tool_context: ToolContext,
 ):
     """Tool to call database (nl2sql) agent."""
-    print(
-        "\n call_db_agent.use_database:"
-        f' {tool_context.state["all_db_settings"]["use_database"]}'
+    logger.debug(
+        "call_db_agent.use_database: %s",
+        tool_context.state["all_db_settings"]["use_database"],
     )
-    database_agent = (
-        bq_db_agent
+    agent_tool = (
+        bq_db_agent_tool
         if tool_context.state["all_db_settings"]["use_database"] == "BigQuery"
-        # else pg_db_agent
+        # else pg_db_agent_tool
         else None
     )
-    agent_tool = AgentTool(agent=database_agent)
     db_agent_output = await agent_tool.run_async(
         args={"request": question}, tool_context=tool_context
     )
@@ -87,7 +101,15 @@ async def call_db_agent(
 root_agent = Agent(
     model=os.getenv("BQML_AGENT_MODEL"),
     name="bq_ml_agent",
-    instruction=return_instructions_bqml(),
+    instruction=bqml_instruction,
     before_agent_callback=setup_before_agent_call,
-    tools=[execute_bqml_code, check_bq_models, call_db_agent, rag_response],
+    before_model_callback=cassette.before_model_callback,
+    after_model_callback=cassette.after_model_callback,
+    tools=precompiled(
+        execute_bqml_code,
+        fetch_bqml_results,
+        check_bq_models,
+        call_db_agent,
+        rag_response,
+    ),
 )
@@ -0,0 +1,277 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Incremental ingestion of the BQML reference guide into the local index.
+
+`IncrementalIndexer.ingest` keeps a vector index (see `reference_retriever`)
+in sync with a set of documents at a cost proportional to what changed:
+
+-   A manifest next to the index records the content hash of every ingested
+    file and the hashes of its chunks. Unchanged files are skipped.
+-   Chunks are identified by the hash of their text, so a chunk that is
+    already indexed (from this or another file) is not embedded again, and
+    chunks no file references any more are removed.
+-   New chunks are embedded in batches by parallel workers, under a
+    requests-per-minute limit.
+-   The index and manifest are checkpointed as batches complete. A file only
+    enters the manifest once all its chunks are indexed, so an interrupted
+    run resumes by embedding only the missing chunks.
+"""
+
+import concurrent.futures
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from data_science.utils.vector_index import VectorIndex
+
+from .reference_retriever import EmbedFn, chunk_text
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+# Upper bound on the chunks of the index; VectorIndex evicts beyond it.
+MAX_CHUNKS = 1_000_000
+
+
+def content_hash(text: str) -> str:
+    """Returns a short, stable hash of a text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls evenly at `max_per_minute`."""
+
+    def __init__(
+        self,
+        max_per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._interval = 60.0 / max_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Blocks until the caller may make its next call."""
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            self._sleep(slot - now)
+
+
+def _write_atomically(path: str, write: Callable[[str], None]) -> None:
+    # NumPy appends `.npz` to names without it, so the suffix is kept.
+    temporary = f"{path}.tmp{os.path.splitext(path)[1]}"
+    write(temporary)
+    os.replace(temporary, path)
+
+
+class IncrementalIndexer:
+    """Keeps a vector index of chunked documents up to date.
+
+    Attributes:
+        index_path: Path of the `.npz` index.
+        manifest_path: Path of the JSON manifest.
+    """
+
+    def __init__(
+        self,
+        index_path: str,
+        embed_fn: EmbedFn,
+        embedding_model: str = "",
+        chunk_size: int = 512,
+        overlap: int = 100,
+        batch_size: int = 64,
+        max_workers: int = 4,
+        rate_limiter: Optional[RateLimiter] = None,
+        checkpoint_every: int = 8,
+    ):
+        """Initializes the indexer.
+
+        Args:
+            index_path: Path of the `.npz` index.
+            embed_fn: Embeds a batch of texts.
+            embedding_model: Name of the embedding model. Changing it, or the
+                chunking, re-embeds every document.
+            chunk_size: Words per chunk.
+            overlap: Words shared by consecutive chunks.
+            batch_size: Chunks embedded per `embed_fn` call.
+            max_workers: Number of concurrent `embed_fn` calls.
+            rate_limiter: Limits the rate of `embed_fn` calls.
+            checkpoint_every: Number of embedded batches between checkpoints.
+        """
+        self.index_path = index_path
+        self.manifest_path = f"{index_path}.manifest.json"
+        self._embed_fn = embed_fn
+        self._settings = {
+            "version": MANIFEST_VERSION,
+            "embedding_model": embedding_model,
+            "chunk_size": chunk_size,
+            "overlap": overlap,
+        }
+        self._batch_size = batch_size
+        self._max_workers = max_workers
+        self._rate_limiter = rate_limiter
+        self._checkpoint_every = checkpoint_every
+
+    def _load(self) -> tuple[VectorIndex, dict[str, Any]]:
+        manifest = {"settings": self._settings, "files": {}}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("settings") == self._settings:
+                manifest = stored
+            else:
+                logger.info("Chunking or embedding model changed; re-indexing.")
+                return VectorIndex(max_entries=MAX_CHUNKS), manifest
+        if os.path.exists(self.index_path):
+            return VectorIndex.load(self.index_path, max_entries=MAX_CHUNKS), manifest
+        return VectorIndex(max_entries=MAX_CHUNKS), manifest
+
+    def _save(self, index: VectorIndex, manifest: dict[str, Any]) -> None:
+        _write_atomically(self.index_path, index.save)
+
+        def write_manifest(path):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=1, sort_keys=True)
+
+        _write_atomically(self.manifest_path, write_manifest)
+
+    def _embed(self, batch: list[dict[str, Any]]) -> list:
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+        return self._embed_fn([chunk["text"] for chunk in batch])
+
+    def ingest(self, documents: dict[str, str]) -> dict[str, int]:
+        """Brings the index in line with `documents`.
+
+        Args:
+            documents: Text of each document, by source name. Sources of
+                previous runs that are missing are removed from the index.
+
+        Returns:
+            Counts of unchanged, changed and removed files and of embedded,
+            reused and removed chunks.
+        """
+        index, manifest = self._load()
+        files = manifest["files"]
+        indexed = {payload["hash"]: entry_id for entry_id, payload in index.entries()}
+        stats = dict.fromkeys(
+            (
+                "files_unchanged",
+                "files_changed",
+                "files_removed",
+                "chunks_embedded",
+                "chunks_reused",
+                "chunks_removed",
+            ),
+            0,
+        )
+
+        changed = {}
+        for source, text in documents.items():
+            digest = content_hash(text)
+            entry = files.get(source)
+            if (
+                entry
+                and entry["sha256"] == digest
+                and all(h in indexed for h in entry["chunks"])
+            ):
+                stats["files_unchanged"] += 1
+                continue
+            chunks = {}
+            for chunk in chunk_text(
+                text, self._settings["chunk_size"], self._settings["overlap"]
+            ):
+                chunks.setdefault(content_hash(chunk), chunk)
+            changed[source] = {"sha256": digest, "chunks": chunks}
+            files.pop(source, None)
+            stats["files_changed"] += 1
+        for source in [s for s in files if s not in documents]:
+            del files[source]
+            stats["files_removed"] += 1
+
+        referenced = {h for entry in files.values() for h in entry["chunks"]}
+        referenced.update(h for entry in changed.values() for h in entry["chunks"])
+        for chunk_hash, entry_id in indexed.items():
+            if chunk_hash not in referenced:
+                index.remove(entry_id)
+                stats["chunks_removed"] += 1
+
+        missing = {}  # hash -> chunk payload
+        for source, entry in changed.items():
+            for chunk_hash, text in entry["chunks"].items():
+                if chunk_hash in indexed:
+                    stats["chunks_reused"] += 1
+                else:
+                    missing.setdefault(
+                        chunk_hash,
+                        {"hash": chunk_hash, "source": source, "text": text},
+                    )
+        pending = {
+            source: {h for h in entry["chunks"] if h in missing}
+            for source, entry in changed.items()
+        }
+
+        def complete(chunk_hashes):
+            for source in list(pending):
+                pending[source].difference_update(chunk_hashes)
+                if not pending[source]:
+                    del pending[source]
+                    files[source] = {
+                        "sha256": changed[source]["sha256"],
+                        "chunks": list(changed[source]["chunks"]),
+                    }
+
+        complete(())
+        chunks = list(missing.values())
+        batches = [
+            chunks[start : start + self._batch_size]
+            for start in range(0, len(chunks), self._batch_size)
+        ]
+        done = 0
+        with concurrent.futures.ThreadPoolExecutor(self._max_workers) as executor:
+            futures = {executor.submit(self._embed, batch): batch for batch in batches}
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    batch = futures[future]
+                    index.add_many(future.result(), batch)
+                    stats["chunks_embedded"] += len(batch)
+                    complete({chunk["hash"] for chunk in batch})
+                    done += 1
+                    if done % self._checkpoint_every == 0:
+                        self._save(index, manifest)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                self._save(index, manifest)
+                logger.warning(
+                    "Ingestion interrupted after %d of %d batches; rerun to"
+                    " resume.",
+                    done,
+                    len(batches),
+                )
+                raise
+        self._save(index, manifest)
+        logger.info("Ingestion finished: %s", stats)
+        return stats
@@ -0,0 +1,154 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""TTL cache of the BigQuery ML models of each dataset.
+
+The BQML agent checks the existing models repeatedly within a conversation.
+Listings are cached per dataset for `ttl_seconds`, and the listing of a
+dataset is invalidated when BQML code creates, replaces, alters or drops a
+model in it (see `modified_model_datasets`).
+"""
+
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import sqlglot
+from sqlglot import exp
+
+logger = logging.getLogger(__name__)
+
+# Fallback for statements sqlglot cannot parse, e.g. `ALTER MODEL`.
+_MODEL_DDL_RE = re.compile(
+    r"\b(?:CREATE(?:\s+OR\s+REPLACE)?|ALTER|DROP)\s+MODEL\s+"
+    r"(?:IF\s+(?:NOT\s+)?EXISTS\s+)?`?([\w.-]+)`?",
+    re.IGNORECASE,
+)
+
+
+def qualify_dataset(dataset_id: str, default_project: str) -> str:
+    """Returns `project.dataset` for `dataset` or `project.dataset`."""
+    return dataset_id if "." in dataset_id else f"{default_project}.{dataset_id}"
+
+
+def _model_dataset(
+    model_name: str, default_project: str, default_dataset: str
+) -> str:
+    parts = model_name.replace("`", "").split(".")
+    if len(parts) >= 3:
+        return f"{parts[-3]}.{parts[-2]}"
+    if len(parts) == 2:
+        return f"{default_project}.{parts[0]}"
+    return qualify_dataset(default_dataset, default_project)
+
+
+def modified_model_datasets(
+    bqml_code: str, default_project: str, default_dataset: str
+) -> set[str]:
+    """Returns the datasets whose models are created, altered or dropped.
+
+    Args:
+        bqml_code: BigQuery ML script.
+        default_project: Project of model names without one.
+        default_dataset: Dataset of model names without one.
+
+    Returns:
+        The `project.dataset` IDs whose model listings change.
+    """
+    names = []
+    try:
+        statements = sqlglot.parse(bqml_code, read="bigquery")
+    except sqlglot.errors.ParseError:
+        statements = None
+    if statements is None:
+        names = _MODEL_DDL_RE.findall(bqml_code)
+    else:
+        for statement in statements:
+            if isinstance(statement, (exp.Create, exp.Drop)):
+                if str(statement.args.get("kind") or "").upper() != "MODEL":
+                    continue
+                tables = statement.args.get("tables") or [statement.this]
+                names.extend(
+                    table.sql(dialect="bigquery")
+                    for table in tables
+                    if isinstance(table, exp.Table)
+                )
+            elif isinstance(statement, exp.Command):
+                names.extend(
+                    _MODEL_DDL_RE.findall(statement.sql(dialect="bigquery"))
+                )
+    return {_model_dataset(name, default_project, default_dataset) for name in names}
+
+
+class ModelCatalogCache:
+    """Thread-safe TTL cache of model listings per dataset.
+
+    Attributes:
+        hits: Number of listings served from the cache.
+        misses: Number of listings fetched.
+    """
+
+    def __init__(
+        self,
+        list_models: Callable[[str], list[dict[str, Any]]],
+        ttl_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initializes the cache.
+
+        Args:
+            list_models: Returns the models of a `project.dataset`.
+            ttl_seconds: How long a listing is served from the cache.
+            clock: Returns the current time in seconds.
+        """
+        self._list_models = list_models
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._listings = {}  # dataset -> (fetched at, models)
+        # Bumped by `invalidate`, so a listing fetched concurrently with a
+        # model change is not cached.
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, dataset: str) -> tuple[list[dict[str, Any]], bool]:
+        """Returns the models of a dataset and whether they came from the cache."""
+        with self._lock:
+            cached = self._listings.get(dataset)
+            if cached and self._clock() - cached[0] < self._ttl_seconds:
+                self.hits += 1
+                return cached[1], True
+            generation = self._generation
+        fetched_at = self._clock()
+        models = self._list_models(dataset)
+        with self._lock:
+            if generation == self._generation:
+                self._listings[dataset] = (fetched_at, models)
+            self.misses += 1
+        return models, False
+
+    def invalidate(self, dataset: Optional[str] = None) -> None:
+        """Drops the listing of a dataset, or of all datasets."""
+        with self._lock:
+            self._generation += 1
+            if dataset is None:
+                self._listings.clear()
+            else:
+                self._listings.pop(dataset, None)
+        logger.debug(
+            "Invalidated the model listing of %s.", dataset or "all datasets"
+        )
@@ -44,6 +44,7 @@ def return_instructions_bqml() -> str:
             *   `rag_response`: Use this tool to get information from the BQML Reference Guide. Formulate your query carefully to get the most relevant results.
             *   `check_bq_models`: Use this tool to list existing BQML models in the specified dataset.
             *   `execute_bqml_code`: Use this tool to run BQML code. **Only use this tool AFTER the user has approved the code.**
+            *   `fetch_bqml_results`: Large results of `execute_bqml_code` only show their first rows and a result ID. Use this tool with that result ID and an offset to see more rows, only when the user needs them.
             *   `call_db_agent`: Use this tool to execute SQL queries for data exploration and analysis.
 
             **IMPORTANT:**
@@ -0,0 +1,222 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Two-tier retrieval of BQML reference guide chunks.
+
+The BQML agent asks the reference guide the same syntax questions over and
+over. `ReferenceRetriever.retrieve` puts a query cache in front of the
+retrieval itself, and reports which of these served a query:
+
+-   `exact_cache`: a previous query with the same normalized text.
+-   `semantic_cache`: a previous query whose embedding is at least
+    `cache_threshold` similar.
+-   `local_index`: a `VectorIndex` of pre-computed chunk embeddings of the
+    reference guide (see `build_index`), when one is configured.
+-   `remote`: the Vertex AI RAG corpus otherwise.
+
+Retrieved chunks are added to the cache. Every query records the latency of
+the tier that served it in `stats`.
+"""
+
+import collections
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from data_science.utils.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+EmbedFn = Callable[[Sequence[str]], list[Sequence[float]]]
+# Returns up to `top_k` chunks for a query.
+RetrieveFn = Callable[[str, int], list[dict[str, Any]]]
+
+EXACT_CACHE = "exact_cache"
+SEMANTIC_CACHE = "semantic_cache"
+LOCAL_INDEX = "local_index"
+REMOTE = "remote"
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def chunk_text(text: str, chunk_size: int = 512, overlap: int = 100) -> list[str]:
+    """Splits text into chunks of `chunk_size` words overlapping by `overlap`.
+
+    Mirrors the chunking the RAG corpus is ingested with, in words instead of
+    tokens.
+    """
+    words = text.split()
+    if not words:
+        return []
+    step = max(chunk_size - overlap, 1)
+    return [
+        " ".join(words[start : start + chunk_size])
+        for start in range(0, max(len(words) - overlap, 1), step)
+    ]
+
+
+def build_index(
+    documents: dict[str, str],
+    embed_fn: EmbedFn,
+    chunk_size: int = 512,
+    overlap: int = 100,
+    batch_size: int = 64,
+) -> VectorIndex:
+    """Chunks and embeds documents into a vector index.
+
+    Args:
+        documents: Text of each document, by source name.
+        embed_fn: Embeds a batch of texts.
+        chunk_size: Words per chunk.
+        overlap: Words shared by consecutive chunks.
+        batch_size: Chunks embedded per `embed_fn` call.
+
+    Returns:
+        An index whose payloads hold the `source` and `text` of each chunk.
+    """
+    chunks = [
+        {"source": source, "text": chunk}
+        for source, text in documents.items()
+        for chunk in chunk_text(text, chunk_size, overlap)
+    ]
+    index = VectorIndex(max_entries=max(len(chunks), 1))
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start : start + batch_size]
+        index.add_many(embed_fn([chunk["text"] for chunk in batch]), batch)
+    return index
+
+
+def format_chunks(chunks: Iterable[dict[str, Any]]) -> str:
+    """Formats chunks as numbered, whitespace-collapsed passages."""
+    return "\n\n".join(
+        f"[{i}] {chunk.get('source') or 'BQML reference guide'}\n"
+        + re.sub(r"\s+", " ", chunk["text"]).strip()
+        for i, chunk in enumerate(chunks, 1)
+    )
+
+
+class ReferenceRetriever:
+    """Thread-safe two-tier retriever of reference guide chunks."""
+
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        remote_retrieve: Optional[RetrieveFn] = None,
+        local_index: Optional[VectorIndex] = None,
+        top_k: int = 3,
+        min_similarity: float = 0.5,
+        cache_threshold: float = 0.95,
+        max_cached: int = 1024,
+    ):
+        """Initializes the retriever.
+
+        Args:
+            embed_fn: Embeds a batch of texts, with the model the local index
+                was built with.
+            remote_retrieve: Retrieves chunks from the RAG corpus. Used when
+                there is no local index.
+            local_index: Index built with `build_index`.
+            top_k: Number of chunks returned.
+            min_similarity: Minimum similarity of local index chunks.
+            cache_threshold: Minimum similarity of a cached query to serve its
+                chunks.
+            max_cached: Number of queries kept in each cache.
+        """
+        if remote_retrieve is None and local_index is None:
+            raise ValueError("Either remote_retrieve or local_index is required.")
+        self._embed_fn = embed_fn
+        self._remote_retrieve = remote_retrieve
+        self._local_index = local_index
+        self.top_k = top_k
+        self.min_similarity = min_similarity
+        self.cache_threshold = cache_threshold
+        self._max_cached = max_cached
+        self._exact = collections.OrderedDict()
+        self._semantic = VectorIndex(max_entries=max_cached)
+        self._lock = threading.Lock()
+        self._counts = collections.Counter()
+        self._latency_ms = collections.Counter()
+
+    def _cache(self, key: str, vector, chunks: list[dict[str, Any]]) -> None:
+        with self._lock:
+            self._exact[key] = chunks
+            self._exact.move_to_end(key)
+            while len(self._exact) > self._max_cached:
+                self._exact.popitem(last=False)
+        if vector is not None:
+            self._semantic.add(vector, {"chunks": chunks})
+
+    def _lookup(self, query: str) -> tuple[list[dict[str, Any]], str]:
+        key = _normalize_query(query)
+        with self._lock:
+            chunks = self._exact.get(key)
+            if chunks is not None:
+                self._exact.move_to_end(key)
+                return chunks, EXACT_CACHE
+
+        try:
+            vector = self._embed_fn([query])[0]
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            if self._local_index is not None:
+                raise
+            logger.warning("Reference retriever failed to embed query: %s", e)
+            vector = None
+        if vector is not None:
+            hits = self._semantic.search(vector, k=1)
+            if hits and hits[0][0] >= self.cache_threshold:
+                chunks = hits[0][2]["chunks"]
+                self._cache(key, None, chunks)
+                return chunks, SEMANTIC_CACHE
+
+        if self._local_index is not None:
+            chunks = [
+                payload
+                for similarity, _, payload in self._local_index.search(
+                    vector, k=self.top_k
+                )
+                if similarity >= self.min_similarity
+            ]
+            tier = LOCAL_INDEX
+        else:
+            chunks = self._remote_retrieve(query, self.top_k)
+            tier = REMOTE
+        # An empty response may be transient, so it is not served again.
+        if chunks:
+            self._cache(key, vector, chunks)
+        return chunks, tier
+
+    def retrieve(self, query: str) -> tuple[list[dict[str, Any]], str]:
+        """Returns the chunks for a query and the tier that served them."""
+        start = time.perf_counter()
+        chunks, tier = self._lookup(query)
+        latency_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._counts[tier] += 1
+            self._latency_ms[tier] += latency_ms
+        return chunks, tier
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Returns the number of queries and mean latency of each tier."""
+        with self._lock:
+            return {
+                tier: {
+                    "queries": count,
+                    "mean_ms": self._latency_ms[tier] / count,
+                }
+                for tier, count in self._counts.items()
+            }
@@ -0,0 +1,260 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Columnar storage of BigQuery ML results.
+
+`ML.PREDICT` and `ML.EVALUATE` over large tables return far more rows than
+fit in the LLM context. Results are streamed, one Arrow record batch at a
+time, into a Parquet file per result. The agent is given a bounded preview,
+summary statistics of the numeric columns and a result ID with which it can
+page through the remaining rows. A result can only be read by the session
+that wrote it.
+"""
+
+import collections
+import dataclasses
+import logging
+import pathlib
+import tempfile
+import threading
+import uuid
+from typing import Any, Iterable, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class ColumnSummary:
+    """Running statistics of a numeric column."""
+
+    count: int = 0
+    total: float = 0.0
+    min: Any = None
+    max: Any = None
+
+    def update(self, column: pa.Array) -> None:
+        count = len(column) - column.null_count
+        if not count:
+            return
+        min_max = pc.min_max(column)
+        low, high = min_max["min"].as_py(), min_max["max"].as_py()
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self.total += float(pc.sum(column).as_py())
+        self.count += count
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+        }
+
+
+@dataclasses.dataclass
+class StoredResult:
+    """A result written to the store.
+
+    Attributes:
+        result_id: Handle with which the rows are read back.
+        path: Parquet file holding the rows.
+        num_rows: Number of rows.
+        columns: Column names.
+        preview: The first rows, as dictionaries.
+        summary: Count, mean, min and max of each numeric column.
+        owner: Key of the session that wrote the result.
+    """
+
+    result_id: str
+    path: pathlib.Path
+    num_rows: int
+    columns: list[str]
+    preview: list[dict[str, Any]]
+    summary: dict[str, dict[str, Any]]
+    owner: str = ""
+
+
+def _is_numeric(data_type: pa.DataType) -> bool:
+    return (
+        pa.types.is_integer(data_type)
+        or pa.types.is_floating(data_type)
+        or pa.types.is_decimal(data_type)
+    )
+
+
+def format_rows(rows: list[dict[str, Any]], max_chars: int) -> tuple[str, int]:
+    """Formats rows one per line, within `max_chars`.
+
+    Returns:
+        The text and the number of rows it holds.
+    """
+    lines = []
+    size = 0
+    for row in rows:
+        line = str(row)
+        if lines and size + len(line) + 1 > max_chars:
+            break
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines), len(lines)
+
+
+class ResultStore:
+    """Thread-safe store of query results as Parquet files.
+
+    Keeps the `max_results` most recently written results; older files are
+    deleted.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str | pathlib.Path] = None,
+        max_results: int = 32,
+        preview_rows: int = 20,
+    ):
+        """Initializes the store.
+
+        Args:
+            directory: Directory of the Parquet files. Defaults to a new
+                temporary directory, created on first write.
+            max_results: Number of results kept.
+            preview_rows: Number of rows kept in memory for the preview.
+        """
+        self._directory = pathlib.Path(directory) if directory else None
+        self._max_results = max_results
+        self._preview_rows = preview_rows
+        self._results = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, result_id: str) -> pathlib.Path:
+        with self._lock:
+            if self._directory is None:
+                self._directory = pathlib.Path(
+                    tempfile.mkdtemp(prefix="bqml_results_")
+                )
+            self._directory.mkdir(parents=True, exist_ok=True)
+            return self._directory / f"{result_id}.parquet"
+
+    def write(
+        self, batches: Iterable[pa.RecordBatch], owner: str = ""
+    ) -> StoredResult:
+        """Streams record batches into a new result.
+
+        Only one batch and the preview rows are held in memory at a time.
+
+        Args:
+            batches: The rows of the result.
+            owner: Key of the session writing the result; only it can read
+                the result back.
+        """
+        result_id = uuid.uuid4().hex[:12]
+        path = self._path(result_id)
+        writer = None
+        schema = None
+        num_rows = 0
+        preview = []
+        summaries = {}
+        try:
+            for batch in batches:
+                if writer is None:
+                    schema = batch.schema
+                    writer = pq.ParquetWriter(path, schema)
+                    summaries = {
+                        field.name: ColumnSummary()
+                        for field in schema
+                        if _is_numeric(field.type)
+                    }
+                if not batch.num_rows:
+                    continue
+                # Each batch is one row group, so pages are read by row group.
+                writer.write_batch(batch, row_group_size=batch.num_rows)
+                if len(preview) < self._preview_rows:
+                    preview.extend(
+                        batch.slice(0, self._preview_rows - len(preview)).to_pylist()
+                    )
+                for name, summary in summaries.items():
+                    summary.update(batch.column(name))
+                num_rows += batch.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if schema is None:
+            schema = pa.schema([])
+            pq.write_table(schema.empty_table(), path)
+        result = StoredResult(
+            result_id=result_id,
+            path=path,
+            num_rows=num_rows,
+            columns=schema.names,
+            preview=preview,
+            summary={
+                name: summary.as_dict() for name, summary in summaries.items()
+            },
+            owner=owner,
+        )
+        with self._lock:
+            self._results[result_id] = result
+            while len(self._results) > self._max_results:
+                _, evicted = self._results.popitem(last=False)
+                evicted.path.unlink(missing_ok=True)
+        logger.debug("Stored %d rows as result %s in %s", num_rows, result_id, path)
+        return result
+
+    def get(self, result_id: str, owner: str = "") -> Optional[StoredResult]:
+        """Returns a stored result, or None if unknown, evicted or not owned.
+
+        A result of another session is reported as unknown, so that result
+        IDs reveal nothing across sessions.
+        """
+        with self._lock:
+            result = self._results.get(result_id)
+        if result is None or result.owner != owner:
+            return None
+        return result
+
+    def read(
+        self, result_id: str, offset: int, limit: int, owner: str = ""
+    ) -> list[dict[str, Any]]:
+        """Returns rows [offset, offset + limit) of a result.
+
+        Only the row groups overlapping the requested rows are read.
+
+        Raises:
+            KeyError: The result is unknown, was evicted or is not owned by
+                `owner`.
+        """
+        result = self.get(result_id, owner)
+        if result is None:
+            raise KeyError(result_id)
+        parquet_file = pq.ParquetFile(result.path)
+        row_groups = []
+        first_row = None
+        start = 0
+        for i in range(parquet_file.num_row_groups):
+            end = start + parquet_file.metadata.row_group(i).num_rows
+            if end > offset and start < offset + limit:
+                row_groups.append(i)
+                if first_row is None:
+                    first_row = start
+            start = end
+        if not row_groups:
+            return []
+        table = parquet_file.read_row_groups(row_groups)
+        return table.slice(offset - first_row, limit).to_pylist()
@@ -12,12 +12,87 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import concurrent.futures
+import logging
+import threading
 import time
 import os
+from typing import Optional
+
+from google.adk.tools import ToolContext
 from google.cloud import bigquery
-from vertexai import rag
+
+from data_science.sub_agents.bigquery import admission
+from data_science.sub_agents.bigquery.tools import (
+    admission_controller,
+    get_bq_client,
+    get_llm_client,
+)
+from data_science.utils import tracing
+from data_science.utils.vector_index import VectorIndex
+
+from . import model_cache, reference_retriever, result_store
+
+logger = logging.getLogger(__name__)
+
+
+def _get_client(project_id: str | None = None):
+    """Returns the shared client, or a BigQuery client for another project."""
+    client = get_bq_client()
+    if project_id and project_id != client.project:
+        return bigquery.Client(project=project_id)
+    return client
+
+
+# Concurrent `get_model` requests when a model listing is fetched.
+MODEL_INFO_WORKERS = 8
+
+
+def _timestamp(value):
+    return value.isoformat() if value else None
+
+
+def _model_info(client, model) -> dict:
+    """Returns the name, type, timestamps and training status of a model."""
+    info = {
+        "name": model.model_id,
+        "type": model.model_type,
+        "created": _timestamp(model.created),
+        "modified": _timestamp(model.modified),
+    }
+    try:
+        # Listings omit the training runs; they are only fetched on a cache
+        # miss.
+        training_runs = client.get_model(model.reference).training_runs
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.debug("Could not get model %s: %s", model.model_id, e)
+        return info
+    info["training_runs"] = len(training_runs)
+    if training_runs:
+        info["last_training_start"] = training_runs[-1].get("startTime")
+    return info
 
 
+def _list_models(dataset: str) -> list[dict]:
+    client = _get_client()
+    logger.debug("Listing models contained in '%s'", dataset)
+    models = list(client.list_models(dataset))
+    if not models:
+        return []
+    # One `get_model` round trip per model, so they are fetched concurrently.
+    with concurrent.futures.ThreadPoolExecutor(
+        min(MODEL_INFO_WORKERS, len(models))
+    ) as executor:
+        return list(executor.map(lambda model: _model_info(client, model), models))
+
+
+# Model listings per `project.dataset`, shared by all sessions.
+models_cache = model_cache.ModelCatalogCache(
+    _list_models, ttl_seconds=float(os.getenv("BQML_MODEL_CACHE_TTL", "300"))
+)
+
+
+@tracing.traced()
 def check_bq_models(dataset_id: str) -> str:
     """Lists models in a BigQuery dataset and returns them as a string.
 
@@ -26,55 +101,109 @@ def check_bq_models(dataset_id: str) -> str:
 
     Returns:
         A string representation of a list of dictionaries, where each dictionary
-        contains the 'name' and 'type' of a model in the specified dataset.
-        Returns an empty string "[]" if no models are found.
+        contains the 'name', 'type', 'created' and 'modified' time and, when
+        available, the number of training runs of a model in the specified
+        dataset. Returns an empty string "[]" if no models are found.
     """
 
     try:
-        client = bigquery.Client()
-
-        models = client.list_models(dataset_id)
-        model_list = []  # Initialize as a list
-
-        print(f"Models contained in '{dataset_id}':")
-        for model in models:
-            model_id = model.model_id
-            model_type = model.model_type
-            model_list.append({"name": model_id, "type": model_type})
-
+        dataset = model_cache.qualify_dataset(dataset_id, _get_client().project)
+        model_list, cached = models_cache.get(dataset)
+        tracing.set_attributes(
+            tracing.current_span(), **{"bqml.model_cache_hit": cached}
+        )
         return str(model_list)
 
     except Exception as e:
         return f"An error occurred: {str(e)}"
 
 
-def execute_bqml_code(bqml_code: str, project_id: str, dataset_id: str) -> str:
+# Rows of `execute_bqml_code` results, paged with `fetch_bqml_results`.
+results_store = result_store.ResultStore(
+    os.getenv("BQML_RESULTS_DIR") or None,
+    preview_rows=int(os.getenv("BQML_RESULT_PREVIEW_ROWS", "20")),
+)
+# Upper bound on the characters of rows returned to the agent at once.
+MAX_RESULT_CHARS = 8000
+
+
+def _describe_result(stored: result_store.StoredResult) -> str:
+    """Returns the preview of a stored result and how to page through it."""
+    text, shown = result_store.format_rows(stored.preview, MAX_RESULT_CHARS)
+    if shown == stored.num_rows:
+        return text
+    parts = [
+        text,
+        f"Showing {shown} of {stored.num_rows} rows. Result ID:"
+        f" {stored.result_id}. Call `fetch_bqml_results` with this ID and an"
+        " offset to see more rows.",
+    ]
+    if stored.summary:
+        parts.append(f"Summary of the numeric columns: {stored.summary}")
+    return "\n".join(parts)
+
+
+@tracing.traced()
+def execute_bqml_code(
+    bqml_code: str,
+    project_id: str,
+    dataset_id: str,
+    tool_context: Optional[ToolContext] = None,
+) -> str:
     """
     Executes BigQuery ML code.
+
+    The code runs as a training job of the shared admission controller, so it
+    waits while too many BigQuery jobs are running.
     """
 
     # timeout_seconds = 1500
 
-    client = bigquery.Client(project=project_id)
+    client = _get_client(project_id)
+    try:
+        modified_datasets = model_cache.modified_model_datasets(
+            bqml_code, project_id or client.project, dataset_id
+        )
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning("Could not parse BigQuery ML code: %s", e)
+        modified_datasets = None
 
+    # Without a session, e.g. in scripts, all jobs share one key.
+    session = admission.session_key(tool_context.state) if tool_context else ""
     try:
-        query_job = client.query(bqml_code)
-        start_time = time.time()
-
-        while not query_job.done():
-            elapsed_time = time.time() - start_time
-            # if elapsed_time > timeout_seconds:
-            #     return (
-            #         "Timeout: BigQuery job did not complete within"
-            #         f" {timeout_seconds} seconds. Job ID: {query_job.job_id}"
-            #     )
-
-            print(
-                f"Query Job Status: {query_job.state}, Elapsed Time:"
-                f" {elapsed_time:.2f} seconds. Job ID: {query_job.job_id}"
-            )
-            time.sleep(5)
+        with admission_controller.admit(session, admission.TRAINING):
+            query_job = client.query(bqml_code)
+            start_time = time.time()
+
+            while not query_job.done():
+                elapsed_time = time.time() - start_time
+                # if elapsed_time > timeout_seconds:
+                #     return (
+                #         "Timeout: BigQuery job did not complete within"
+                #         f" {timeout_seconds} seconds. Job ID: {query_job.job_id}"
+                #     )
 
+                logger.info(
+                    "Query Job Status: %s, Elapsed Time: %.2f seconds. Job ID: %s",
+                    query_job.state,
+                    elapsed_time,
+                    query_job.job_id,
+                )
+                time.sleep(5)
+
+        # Write-through: model listings changed by the job are refetched.
+        if modified_datasets is None:
+            models_cache.invalidate()
+        for dataset in modified_datasets or ():
+            models_cache.invalidate(dataset)
+
+        tracing.set_attributes(
+            tracing.current_span(),
+            **{
+                "bq.job_id": query_job.job_id,
+                "bq.bytes_processed": query_job.total_bytes_processed,
+            },
+        )
         if query_job.error_result:
             return f"Error executing BigQuery ML code: {query_job.error_result}"
 
@@ -82,41 +211,121 @@ def execute_bqml_code(bqml_code: str, project_id: str, dataset_id: str) -> str:
             return f"Exception during BigQuery ML execution: {query_job.exception()}"
 
         results = query_job.result()
-        if results.total_rows > 0:
-            result_string = ""
-            for row in results:
-                result_string += str(dict(row.items())) + "\n"
-            return f"BigQuery ML code executed successfully. Results:\n{result_string}"
-        else:
+        if not results.total_rows:
             return "BigQuery ML code executed successfully."
+        stored = results_store.write(results.to_arrow_iterable(), owner=session)
+        return (
+            "BigQuery ML code executed successfully. Results:\n"
+            + _describe_result(stored)
+        )
 
     except Exception as e:
         return f"An error occurred: {str(e)}"
 
 
-def rag_response(query: str) -> str:
-    """Retrieves contextually relevant information from a RAG corpus.
+@tracing.traced()
+def fetch_bqml_results(
+    result_id: str,
+    offset: int,
+    limit: int = 50,
+    tool_context: Optional[ToolContext] = None,
+) -> str:
+    """Returns more rows of a result of `execute_bqml_code`.
 
     Args:
-        query (str): The query string to search within the corpus.
+        result_id: The result ID returned by `execute_bqml_code`.
+        offset: Index of the first row to return, starting at 0.
+        limit: Maximum number of rows to return.
 
     Returns:
-        vertexai.rag.RagRetrievalQueryResponse: The response containing retrieved
-        information from the corpus.
+        The rows, one dictionary per line, and the range of rows shown.
     """
-    corpus_name = os.getenv("BQML_RAG_CORPUS_NAME")
+    # Only the session that ran the code can read its results.
+    session = admission.session_key(tool_context.state) if tool_context else ""
+    stored = results_store.get(result_id, session)
+    if stored is None:
+        return f"Unknown or expired result ID: {result_id}"
+    offset = max(offset, 0)
+    rows = results_store.read(result_id, offset, max(limit, 1), session)
+    text, shown = result_store.format_rows(rows, MAX_RESULT_CHARS)
+    if not shown:
+        return f"No rows at offset {offset}; the result has {stored.num_rows} rows."
+    return (
+        f"{text}\nShowing rows {offset} to {offset + shown - 1} of"
+        f" {stored.num_rows}."
+    )
+
+
+def _embed_texts(texts):
+    """Embeds texts with the model of the reference guide corpus."""
+    response = get_llm_client().models.embed_content(
+        model=os.getenv("BQML_RAG_EMBEDDING_MODEL", "text-embedding-005"),
+        contents=list(texts),
+    )
+    return [embedding.values for embedding in response.embeddings]
+
+
+def _retrieve_from_corpus(query: str, top_k: int) -> list[dict]:
+    """Retrieves chunks from the Vertex AI RAG corpus."""
+    # Imported on first use: the Vertex AI SDK takes seconds to import.
+    from vertexai import rag  # pylint: disable=g-import-not-at-top
 
     rag_retrieval_config = rag.RagRetrievalConfig(
-        top_k=3,  # Optional
-        filter=rag.Filter(vector_distance_threshold=0.5),  # Optional
+        top_k=top_k,
+        filter=rag.Filter(vector_distance_threshold=0.5),
     )
     response = rag.retrieval_query(
         rag_resources=[
             rag.RagResource(
-                rag_corpus=corpus_name,
+                rag_corpus=os.getenv("BQML_RAG_CORPUS_NAME"),
             )
         ],
         text=query,
         rag_retrieval_config=rag_retrieval_config,
     )
-    return str(response)
+    return [
+        {"source": context.source_uri, "text": context.text}
+        for context in response.contexts.contexts
+    ]
+
+
+retriever = None
+_retriever_lock = threading.Lock()
+
+
+def get_reference_retriever() -> reference_retriever.ReferenceRetriever:
+    """Returns the process-wide reference guide retriever."""
+    global retriever
+    if retriever is None:
+        with _retriever_lock:
+            if retriever is None:
+                index_path = os.getenv("BQML_RAG_LOCAL_INDEX")
+                retriever = reference_retriever.ReferenceRetriever(
+                    embed_fn=_embed_texts,
+                    remote_retrieve=_retrieve_from_corpus,
+                    local_index=(
+                        VectorIndex.load(index_path) if index_path else None
+                    ),
+                    cache_threshold=float(
+                        os.getenv("BQML_RAG_CACHE_THRESHOLD", "0.95")
+                    ),
+                )
+    return retriever
+
+
+@tracing.traced()
+def rag_response(query: str) -> str:
+    """Retrieves contextually relevant information from the BQML reference guide.
+
+    Args:
+        query (str): The query string to search within the reference guide.
+
+    Returns:
+        str: The most relevant passages of the reference guide, numbered and
+        preceded by their source.
+    """
+    chunks, tier = get_reference_retriever().retrieve(query)
+    tracing.set_attributes(tracing.current_span(), **{"bqml.rag_tier": tier})
+    if not chunks:
+        return "No relevant passages found in the BQML reference guide."
+    return reference_retriever.format_chunks(chunks)
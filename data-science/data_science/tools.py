@@ -18,54 +18,259 @@
 -- then, it use NL2Py to do further data analysis as needed
 """
 
+import asyncio
+import logging
+import os
+from typing import Any, Optional
+
+from google.adk.sessions.state import State
 from google.adk.tools import ToolContext
 from google.adk.tools.agent_tool import AgentTool
 
 from .sub_agents import ds_agent, db_agent
+from .sub_agents.analytics.agent import reads_local_files
+from .sub_agents.bigquery import admission, session_results
+from .sub_agents.bigquery import tools as db_tools
+from .utils import result_encoder, tracing
+
+logger = logging.getLogger(__name__)
+
+# Built once: the agents are module globals, and the tools hold no per-call
+# state.
+db_agent_tool = AgentTool(agent=db_agent)
+ds_agent_tool = AgentTool(agent=ds_agent)
+
+# Database agent runs of `call_db_agents_pipelined` in flight at once.
+MAX_CONCURRENT_DB_AGENTS = int(os.getenv("MAX_CONCURRENT_DB_AGENTS", "4"))
+
+# Keys of the state the ADK code executors keep their session ID under.
+_CODE_EXECUTION_CONTEXT_KEY = "_code_execution_context"
+_EXECUTION_ID_KEY = "execution_session_id"
+
+# State keys of a branch that are not merged into the tool context.
+_BRANCH_KEYS = ("query_result", _CODE_EXECUTION_CONTEXT_KEY)
+
+
+class _BranchContext:
+    """Tool context of one of several concurrent sub-agent runs.
+
+    `AgentTool` copies the state of its tool context into the sub-agent's
+    session and writes the sub-agent's state changes back. Concurrent runs
+    would overwrite each other's `query_result`, so each branch gets a state
+    of its own, merged back by `merge_into`, and delegates everything else to
+    the tool context. Each branch also runs its code in a code executor
+    session of its own, so that concurrent analyses do not share a worker and
+    its variables.
+    """
+
+    def __init__(self, tool_context: ToolContext, index: int):
+        self._tool_context = tool_context
+        self._delta: dict[str, Any] = {}
+        value = dict(tool_context.state.to_dict())
+        self._results = session_results.results(value)
+        context = dict(value.get(_CODE_EXECUTION_CONTEXT_KEY) or {})
+        execution_id = context.get(_EXECUTION_ID_KEY) or admission.session_key(
+            tool_context.state
+        )
+        context[_EXECUTION_ID_KEY] = f"{execution_id}_branch{index}"
+        value[_CODE_EXECUTION_CONTEXT_KEY] = context
+        self.state = State(value=value, delta=self._delta)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._tool_context, name)
+
+    def merge_into(self, state) -> None:
+        """Writes the branch's state changes to `state`.
+
+        `query_result` and the code executor context stay per branch. The
+        query results the branch recorded are added to those of `state`, so
+        that every branch's results are offered to follow-up questions.
+        """
+        for key, value in self._delta.items():
+            if key == session_results.STATE_KEY:
+                session_results.extend(
+                    state, [r for r in value if r not in self._results]
+                )
+            elif key not in _BRANCH_KEYS:
+                state[key] = value
+
+
+async def _run_db_agent(question: str, tool_context) -> str:
+    return await db_agent_tool.run_async(
+        args={"request": question}, tool_context=tool_context
+    )
+
+
+def _format_input_data(input_data: Any) -> str:
+    """Encodes query results for the data science agent, naming columns once.
+
+    All rows and whole values are kept, since the agent analyzes the data.
+    """
+    if isinstance(input_data, dict):
+        # Results of `call_db_agents_pipelined`, by sub-question.
+        return "\n\n".join(
+            f"Data of: {question}\n{_format_input_data(rows)}"
+            for question, rows in input_data.items()
+        )
+    if not isinstance(input_data, list) or not input_data:
+        return str(input_data)
+    return result_encoder.encode_rows(input_data, db_tools.QUERY_RESULT_FORMAT).text
+
+
+async def _export_full_result(tool_context) -> Optional[str]:
+    """Exports the complete result of the last query for the data science agent.
+
+    Returns:
+        Where the Parquet dataset is and how to load it, or None if the rows
+        already fetched must be analyzed instead: the code executor cannot
+        read local files, the last data came from several queries, or the
+        export failed.
+    """
+    rows = tool_context.state.get("query_result")
+    sql = tool_context.state.get("query_sql")
+    if not reads_local_files() or not isinstance(rows, list) or not sql:
+        logger.warning("Analyzing the fetched rows; no bulk export is possible.")
+        return None
+    try:
+        exported = await db_tools.export_query_result(
+            sql, admission.session_key(tool_context.state)
+        )
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning("Analyzing the fetched rows; the bulk export failed: %s", e)
+        return None
+    preview = result_encoder.encode_rows(rows[:5], db_tools.QUERY_RESULT_FORMAT)
+    return (
+        f"The complete result of the query, {exported.num_rows} rows, is in the"
+        f" Parquet dataset `{exported.path}`. Load it with"
+        f" `df = pd.read_parquet('{exported.path}')`. Its first rows:\n"
+        f"{preview.text}"
+    )
+
+
+async def _run_ds_agent(question: str, input_data: Any, tool_context) -> str:
+    question_with_data = f"""
+  Question to answer: {question}
+
+  Actual data to analyze prevoius quesiton is already in the following:
+  {_format_input_data(input_data)}
+
+  """
+
+    return await ds_agent_tool.run_async(
+        args={"request": question_with_data}, tool_context=tool_context
+    )
 
 
+@tracing.traced()
 async def call_db_agent(
     question: str,
     tool_context: ToolContext,
 ):
     """Tool to call database (nl2sql) agent."""
-    print(
-        "\n call_db_agent.use_database:"
-        f' {tool_context.state["all_db_settings"]["use_database"]}'
+    logger.debug(
+        "call_db_agent.use_database: %s",
+        tool_context.state["all_db_settings"]["use_database"],
     )
 
-    agent_tool = AgentTool(agent=db_agent)
-
-    db_agent_output = await agent_tool.run_async(
-        args={"request": question}, tool_context=tool_context
-    )
+    db_agent_output = await _run_db_agent(question, tool_context)
     tool_context.state["db_agent_output"] = db_agent_output
     return db_agent_output
 
 
+@tracing.traced()
 async def call_ds_agent(
     question: str,
     tool_context: ToolContext,
+    full_result: bool = False,
 ):
-    """Tool to call data science (nl2py) agent."""
+    """Tool to call data science (nl2py) agent.
+
+    Args:
+        question: The analysis to run.
+        tool_context: The tool context.
+        full_result: Whether to analyze every row of the last query's result,
+            exported in bulk, instead of the rows `call_db_agent` returned.
+    """
 
     if question == "N/A":
         return tool_context.state["db_agent_output"]
 
     input_data = tool_context.state["query_result"]
+    tracing.current_span().set_attribute("ds.input_rows", len(input_data))
+    if full_result:
+        input_data = await _export_full_result(tool_context) or input_data
 
-    question_with_data = f"""
-  Question to answer: {question}
+    ds_agent_output = await _run_ds_agent(question, input_data, tool_context)
+    tool_context.state["ds_agent_output"] = ds_agent_output
+    return ds_agent_output
 
-  Actual data to analyze prevoius quesiton is already in the following:
-  {input_data}
 
-  """
+@tracing.traced()
+async def call_db_agents_pipelined(
+    questions: list[str],
+    analysis_question: str,
+    tool_context: ToolContext,
+):
+    """Tool to answer independent sub-questions with concurrent database agents.
 
-    agent_tool = AgentTool(agent=ds_agent)
+    Each sub-question is sent to its own database (nl2sql) agent run; the runs
+    are concurrent. When `analysis_question` is not "N/A", the data science
+    (nl2py) agent analyzes each sub-question's data as soon as it is
+    retrieved, while the other queries are still running.
 
-    ds_agent_output = await agent_tool.run_async(
-        args={"request": question_with_data}, tool_context=tool_context
+    Args:
+        questions: Independent data retrieval questions, one per sub-query.
+        analysis_question: Python analysis to apply to the data of every
+            sub-question, or "N/A" for none.
+        tool_context: The tool context.
+
+    Returns:
+        One result per sub-question, in order, with the database agent's
+        output and, if requested, the data science agent's output.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_DB_AGENTS)
+    start = asyncio.get_running_loop().time()
+
+    branches = [
+        _BranchContext(tool_context, index) for index in range(len(questions))
+    ]
+
+    async def answer(index: int, question: str) -> dict[str, Any]:
+        branch = branches[index]
+        branch.state["query_result"] = None
+        with tracing.span("pipeline.sub_question", **{"pipeline.index": index}):
+            async with semaphore:
+                db_agent_output = await _run_db_agent(question, branch)
+            logger.debug(
+                "Sub-question %d retrieved after %.2fs.",
+                index,
+                asyncio.get_running_loop().time() - start,
+            )
+            result = {
+                "question": question,
+                "db_agent_output": db_agent_output,
+                "query_result": branch.state["query_result"],
+            }
+            if analysis_question != "N/A" and result["query_result"] is not None:
+                result["ds_agent_output"] = await _run_ds_agent(
+                    analysis_question, result["query_result"], branch
+                )
+            return result
+
+    results = await asyncio.gather(
+        *(answer(index, question) for index, question in enumerate(questions))
     )
-    tool_context.state["ds_agent_output"] = ds_agent_output
-    return ds_agent_output
+    for branch in branches:
+        branch.merge_into(tool_context.state)
+    tool_context.state["db_agent_output"] = {
+        r["question"]: r["db_agent_output"] for r in results
+    }
+    # A later `call_ds_agent` analyzes the data of every sub-question.
+    tool_context.state["query_result"] = {
+        r["question"]: r.pop("query_result") for r in results
+    }
+    if analysis_question != "N/A":
+        tool_context.state["ds_agent_output"] = {
+            r["question"]: r.get("ds_agent_output") for r in results
+        }
+    return results
@@ -0,0 +1,330 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Record and replay of LLM calls, for deterministic offline runs.
+
+A `Cassette` maps a hash of (call kind, model, config, prompt) to the
+model's response. With `DATA_SCIENCE_CASSETTE` set to a file, every LLM call
+of `data_science` goes through it:
+
+-   the agents' model calls, through the `before_model_callback` and
+    `after_model_callback` of every agent;
+-   the Gemini client of the NL2SQL and BQML tools (`generate_content` and
+    `embed_content`), through `wrap_genai_client`;
+-   `GeminiModel.call` of CHASE-SQL.
+
+`DATA_SCIENCE_CASSETTE_MODE` is one of:
+
+-   `replay`: responses come from the cassette; a call that was not
+    recorded raises `CassetteMiss`. No client is created, so no network or
+    credentials are needed.
+-   `record`: every call goes to the model and its response is recorded.
+-   `auto` (default): recorded calls are replayed, others recorded.
+
+Replayed calls wait `DATA_SCIENCE_CASSETTE_LATENCY_MS` milliseconds (default
+`0`), or the latency measured when they were recorded if it is `recorded`.
+
+Cassettes are JSON lines, gzip-compressed if the file name ends in `.gz`,
+with one response per line; recording appends to the file.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+REPLAY = "replay"
+RECORD = "record"
+AUTO = "auto"
+RECORDED_LATENCY = "recorded"
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode for a call that was not recorded."""
+
+
+def _normalize(value: Any) -> Any:
+    """Converts a request to JSON data, without ADK's random function call IDs."""
+    if hasattr(value, "model_dump"):
+        value = value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, dict):
+        is_function_part = "name" in value and ("args" in value or "response" in value)
+        return {
+            k: _normalize(v)
+            for k, v in value.items()
+            if not (is_function_part and k == "id")
+        }
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def request_key(kind: str, model: Optional[str], request: Any) -> str:
+    """Returns the cassette key of a call."""
+    payload = json.dumps(
+        {"kind": kind, "model": model, "request": _normalize(request)},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """An on-disk store of LLM responses."""
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = AUTO,
+        latency_ms: float | str = 0.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """Initializes the cassette, loading the responses in `path`.
+
+        Args:
+            path: JSON lines file of the recorded responses.
+            mode: `replay`, `record` or `auto`.
+            latency_ms: Milliseconds each replayed call takes, or `recorded`
+              for the latency measured when it was recorded.
+            sleep: Function sleeping for a number of seconds.
+        """
+        if mode not in (REPLAY, RECORD, AUTO):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self._latency_ms = latency_ms
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        # Keys of the ADK model calls in flight, by (invocation, agent).
+        self._pending: dict[tuple[str, str], tuple[str, float]] = {}
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            with self._open("rt") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry
+
+    def _open(self, mode: str):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode, encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _delay(self, entry: dict[str, Any]) -> float:
+        if self._latency_ms == RECORDED_LATENCY:
+            return entry["latency_ms"] / 1000
+        return float(self._latency_ms) / 1000
+
+    def lookup(self, key: str) -> Optional[dict[str, Any]]:
+        """Returns the recorded entry of a key, or None if it must be called.
+
+        Raises:
+            CassetteMiss: In replay mode, if the key was not recorded.
+        """
+        entry = None if self.mode == RECORD else self._entries.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None and self.mode == REPLAY:
+            raise CassetteMiss(f"LLM call {key[:12]} is not in {self.path}.")
+        return entry
+
+    def record(self, key: str, response: Any, latency_ms: float) -> None:
+        """Stores the JSON-serializable response of a key."""
+        entry = {"key": key, "latency_ms": round(latency_ms, 1), "response": response}
+        line = json.dumps(entry, separators=(",", ":"), default=str)
+        with self._lock:
+            self._entries[key] = entry
+            with self._open("at") as f:
+                f.write(line + "\n")
+
+    def call(
+        self,
+        kind: str,
+        model: Optional[str],
+        request: Any,
+        func: Callable[[], Any],
+        encode: Callable[[Any], Any],
+        decode: Callable[[Any], Any],
+    ) -> Any:
+        """Replays a call, or makes it with `func` and records its response.
+
+        Args:
+            kind: Name of the API called, e.g. `genai.generate_content`.
+            model: Name of the model.
+            request: The prompt and config of the call, JSON-serializable.
+            func: Makes the call.
+            encode: Converts a response to JSON-serializable data.
+            decode: Converts recorded data back to a response.
+        """
+        key = request_key(kind, model, request)
+        entry = self.lookup(key)
+        if entry is not None:
+            self._sleep(self._delay(entry))
+            return decode(entry["response"])
+        start = time.perf_counter()
+        response = func()
+        self.record(key, encode(response), (time.perf_counter() - start) * 1000)
+        return response
+
+    async def before_model_callback(self, callback_context, llm_request):
+        """Returns the recorded response of an agent's model call, if any."""
+        # pylint: disable=g-import-not-at-top
+        from google.adk.models.llm_response import LlmResponse
+
+        # pylint: enable=g-import-not-at-top
+        key = request_key(
+            "adk.generate_content",
+            llm_request.model,
+            {"contents": llm_request.contents, "config": llm_request.config},
+        )
+        entry = self.lookup(key)
+        if entry is not None:
+            await asyncio.sleep(self._delay(entry))
+            return LlmResponse.model_validate(entry["response"])
+        with self._lock:
+            self._pending[
+                (callback_context.invocation_id, callback_context.agent_name)
+            ] = (key, time.perf_counter())
+        return None
+
+    async def after_model_callback(self, callback_context, llm_response):
+        """Records the response of an agent's model call."""
+        if llm_response.partial:
+            return None
+        with self._lock:
+            pending = self._pending.pop(
+                (callback_context.invocation_id, callback_context.agent_name), None
+            )
+        if pending is not None:
+            key, start = pending
+            self.record(
+                key,
+                llm_response.model_dump(mode="json", exclude_none=True),
+                (time.perf_counter() - start) * 1000,
+            )
+        return None
+
+
+class _CassetteModels:
+    """The `models` of a genai client, going through a cassette."""
+
+    def __init__(self, cassette: Cassette, client_factory: Callable[[], Any]):
+        self._cassette = cassette
+        self._client_factory = client_factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _models(self):
+        with self._lock:
+            if self._client is None:
+                self._client = self._client_factory()
+        return self._client.models
+
+    def _call(self, method: str, response_type, model, **kwargs):
+        return self._cassette.call(
+            f"genai.{method}",
+            model,
+            kwargs,
+            lambda: getattr(self._models(), method)(model=model, **kwargs),
+            lambda response: response.model_dump(mode="json", exclude_none=True),
+            response_type.model_validate,
+        )
+
+    def generate_content(self, *, model: str, **kwargs):
+        # pylint: disable=g-import-not-at-top
+        from google.genai import types
+
+        # pylint: enable=g-import-not-at-top
+        return self._call(
+            "generate_content", types.GenerateContentResponse, model, **kwargs
+        )
+
+    def embed_content(self, *, model: str, **kwargs):
+        # pylint: disable=g-import-not-at-top
+        from google.genai import types
+
+        # pylint: enable=g-import-not-at-top
+        return self._call("embed_content", types.EmbedContentResponse, model, **kwargs)
+
+
+class _CassetteClient:
+    """Stands in for a genai client; creates the real one on a miss."""
+
+    def __init__(self, cassette: Cassette, client_factory: Callable[[], Any]):
+        self.models = _CassetteModels(cassette, client_factory)
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Returns the cassette of `DATA_SCIENCE_CASSETTE`, or None if unset."""
+    global _cassette
+    path = os.getenv("DATA_SCIENCE_CASSETTE")
+    if not path:
+        return None
+    with _cassette_lock:
+        if _cassette is None or _cassette.path != path:
+            _cassette = Cassette(
+                path,
+                mode=os.getenv("DATA_SCIENCE_CASSETTE_MODE", AUTO),
+                latency_ms=os.getenv("DATA_SCIENCE_CASSETTE_LATENCY_MS", "0"),
+            )
+            logger.info(
+                "Using LLM cassette %s (%s mode, %d responses).",
+                path,
+                _cassette.mode,
+                len(_cassette),
+            )
+        return _cassette
+
+
+def wrap_genai_client(client_factory: Callable[[], Any]) -> Any:
+    """Returns a genai client, going through the cassette if one is set."""
+    cassette = get_cassette()
+    if cassette is None:
+        return client_factory()
+    return _CassetteClient(cassette, client_factory)
+
+
+async def before_model_callback(callback_context, llm_request):
+    """Agent callback replaying recorded model calls; see `Cassette`."""
+    cassette = get_cassette()
+    if cassette is None:
+        return None
+    return await cassette.before_model_callback(callback_context, llm_request)
+
+
+async def after_model_callback(callback_context, llm_response):
+    """Agent callback recording model calls; see `Cassette`."""
+    cassette = get_cassette()
+    if cassette is None:
+        return None
+    return await cassette.after_model_callback(callback_context, llm_response)
@@ -14,10 +14,13 @@
 
 
 import os
+import tempfile
 from google.cloud import bigquery
 from pathlib import Path
 from dotenv import load_dotenv
 
+from data_science.utils.table_loader import TableLoader, TableSpec
+
 # Define the path to the .env file
 env_file_path = Path(__file__).parent.parent.parent / ".env"
 print(env_file_path)
@@ -25,37 +28,43 @@ print(env_file_path)
 # Load environment variables from the specified .env file
 load_dotenv(dotenv_path=env_file_path)
 
+# Parquet parts and progress of the loads, kept across runs to resume them.
+staging_dir = os.getenv("BQ_LOAD_STAGING_DIR") or os.path.join(
+    tempfile.gettempdir(), "data_science_bq_load"
+)
+
 
 def load_csv_to_bigquery(project_id, dataset_name, table_name, csv_filepath):
     """Loads a CSV file into a BigQuery table.
 
+    The file is converted to Parquet parts with a schema inferred from all of
+    its rows, and an interrupted load resumes where it stopped (see
+    `TableLoader`).
+
     Args:
         project_id: The ID of the Google Cloud project.
         dataset_name: The name of the BigQuery dataset.
         table_name: The name of the BigQuery table.
         csv_filepath: The path to the CSV file.
     """
+    load_csvs_to_bigquery(project_id, [TableSpec(csv_filepath, dataset_name, table_name)])
 
-    client = bigquery.Client(project=project_id)
 
-    dataset_ref = client.dataset(dataset_name)
-    table_ref = dataset_ref.table(table_name)
+def load_csvs_to_bigquery(project_id, specs):
+    """Loads CSV files into BigQuery tables concurrently.
 
-    job_config = bigquery.LoadJobConfig(
-        source_format=bigquery.SourceFormat.CSV,
-        skip_leading_rows=1,  # Skip the header row
-        autodetect=True,  # Automatically detect the schema
-    )
-
-    with open(csv_filepath, "rb") as source_file:
-        job = client.load_table_from_file(
-            source_file, table_ref, job_config=job_config
+    Args:
+        project_id: The ID of the Google Cloud project.
+        specs: The `TableSpec` of every CSV file and table.
+    """
+    client = bigquery.Client(project=project_id)
+    loader = TableLoader(client, staging_dir)
+    for stats in loader.load_many(specs):
+        print(
+            f"Loaded {stats['rows']} rows into {stats['table']} with schema"
+            f" {stats['schema']}"
         )
 
-    job.result()  # Wait for the job to complete
-
-    print(f"Loaded {job.output_rows} rows into {dataset_name}.{table_name}")
-
 
 def create_dataset_if_not_exists(project_id, dataset_name):
     """Creates a BigQuery dataset if it does not already exist.
@@ -95,13 +104,15 @@ def main():
     print("Creating dataset.")
     create_dataset_if_not_exists(project_id, dataset_name)
 
-    # Load the train data
-    print("Loading train table.")
-    load_csv_to_bigquery(project_id, dataset_name, "train", train_csv_filepath)
-
-    # Load the test data
-    print("Loading test table.")
-    load_csv_to_bigquery(project_id, dataset_name, "test", test_csv_filepath)
+    # Load the train and test data
+    print("Loading train and test tables.")
+    load_csvs_to_bigquery(
+        project_id,
+        [
+            TableSpec(train_csv_filepath, dataset_name, "train"),
+            TableSpec(test_csv_filepath, dataset_name, "test"),
+        ],
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Instruction providers that add the session's database schema.
+
+Agents are module globals shared by every session, so the schema is not
+written into `agent.instruction`. Instead the agent's instruction is a
+`SchemaInstructionProvider`, which ADK calls with the session's context and
+which renders the instruction from the schema referenced by
+`state["database_settings"]`.
+"""
+
+import collections
+import threading
+from typing import Callable
+
+from google.adk.agents.readonly_context import ReadonlyContext
+
+
+class SchemaInstructionProvider:
+    """ADK `InstructionProvider` appending the session's schema to a base instruction.
+
+    Rendered instructions are memoized per schema fingerprint (the
+    `schema_fingerprint` of the database settings), so sessions on the same
+    schema share one string and turns neither resolve nor rebuild it.
+
+    Attributes:
+        renders: Number of instructions rendered, i.e. memo misses.
+    """
+
+    def __init__(
+        self,
+        base_instruction: Callable[[], str],
+        schema_template: str,
+        resolve_schema: Callable[[dict], str],
+        max_entries: int = 16,
+    ):
+        """Initializes the provider.
+
+        Args:
+            base_instruction: Returns the instruction without the schema.
+            schema_template: Appended to the base instruction, with `{schema}`
+              replaced by the DDL schema.
+            resolve_schema: Returns the DDL schema referenced by the database
+              settings in session state.
+            max_entries: Number of rendered instructions kept.
+        """
+        self._base_instruction = base_instruction
+        self._schema_template = schema_template
+        self._resolve_schema = resolve_schema
+        self._max_entries = max_entries
+        self._rendered = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def __call__(self, context: ReadonlyContext) -> str:
+        settings = context.state.get("database_settings")
+        key = settings.get("schema_fingerprint") if settings else ""
+        with self._lock:
+            rendered = self._rendered.get(key)
+            if rendered is not None:
+                self._rendered.move_to_end(key)
+                return rendered
+
+        rendered = self._base_instruction()
+        if settings:
+            rendered += self._schema_template.format(
+                schema=self._resolve_schema(settings)
+            )
+
+        with self._lock:
+            self._rendered[key] = rendered
+            self._rendered.move_to_end(key)
+            while len(self._rendered) > self._max_entries:
+                self._rendered.popitem(last=False)
+            self.renders += 1
+        return rendered
@@ -12,7 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import os
+import re
+import sys
 from pathlib import Path
 from dotenv import load_dotenv, set_key
 import vertexai
@@ -35,6 +38,15 @@ paths = [
     "gs://cloud-samples-data/adk-samples/data-science/bqml"
 ]  # Supports Google Cloud Storage and Google Drive Links
 
+CHUNK_SIZE = 512
+CHUNK_OVERLAP = 100
+EMBEDDING_REQUESTS_PER_MIN = 1000
+# Maximum number of paths per import request.
+IMPORT_BATCH_SIZE = 25
+
+# Version of every file imported into the corpus.
+manifest_path = env_file_path.parent / ".bqml_rag_manifest.json"
+
 
 # Initialize Vertex AI API once per session
 vertexai.init(project=PROJECT_ID, location="us-central1")
@@ -63,24 +75,112 @@ def create_RAG_corpus():
     return bqml_corpus.name
 
 
+def _load_manifest(corpus_name):
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("corpus") == corpus_name:
+            return manifest
+    return {"corpus": corpus_name, "files": {}}
+
+
+def _save_manifest(manifest):
+    manifest_path.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+
+
+def list_source_files():
+    """Returns a version of every file in `paths`, by URI.
+
+    Files under `gs://` paths are versioned by their MD5 hash. Other paths,
+    e.g. Google Drive links, cannot be listed and are imported once.
+    """
+    from google.cloud import storage  # pylint: disable=g-import-not-at-top
+
+    client = storage.Client(project=PROJECT_ID)
+    files = {}
+    for path in paths:
+        if not path.startswith("gs://"):
+            files[path] = "unversioned"
+            continue
+        bucket, _, prefix = path.removeprefix("gs://").partition("/")
+        for blob in client.list_blobs(bucket, prefix=prefix):
+            if not blob.name.endswith("/"):
+                files[f"gs://{bucket}/{blob.name}"] = blob.md5_hash or blob.etag
+    return files
+
+
+def _file_name(uri: str) -> str:
+    return uri.rstrip("/").rsplit("/", 1)[-1]
+
+
 def ingest_files(corpus_name):
+    """Imports the files of `paths` that are new or changed since the last run.
 
+    The imported version of every file is recorded in a manifest next to the
+    .env file after each import batch, so an interrupted run resumes with the
+    files it had not imported yet. Files that changed or were removed are
+    deleted from the corpus first, matched by their Cloud Storage URI.
+    """
     transformation_config = rag.TransformationConfig(
         chunking_config=rag.ChunkingConfig(
-            chunk_size=512,
-            chunk_overlap=100,
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
         ),
     )
 
-    rag.import_files(
-        corpus_name,
-        paths,
-        transformation_config=transformation_config,  # Optional
-        max_embedding_requests_per_min=1000,  # Optional
+    manifest = _load_manifest(corpus_name)
+    source_files = list_source_files()
+    changed = [
+        uri
+        for uri, version in source_files.items()
+        if manifest["files"].get(uri) != version
+    ]
+    removed = [uri for uri in manifest["files"] if uri not in source_files]
+    print(
+        f"{len(source_files) - len(changed)} files unchanged, {len(changed)} new"
+        f" or changed, {len(removed)} removed."
     )
 
-    # List the files in the rag corpus
-    rag.list_files(corpus_name)
+    stale = set(changed + removed)
+    # Files imported from Cloud Storage are matched by their URI. Others are
+    # only known by their name, the last part of their URI.
+    stale_names = {_file_name(uri) for uri in stale if not uri.startswith("gs://")}
+    deleted_names = set()
+    if stale:
+        for rag_file in rag.list_files(corpus_name):
+            source_uris = set(rag_file.gcs_source.uris)
+            if source_uris & stale:
+                rag.delete_file(rag_file.name)
+            elif not source_uris and rag_file.display_name in stale_names:
+                rag.delete_file(rag_file.name)
+                deleted_names.add(rag_file.display_name)
+    # Unchanged files of the same name were deleted too; import them again.
+    reimported = [
+        uri
+        for uri in source_files
+        if uri not in stale
+        and not uri.startswith("gs://")
+        and _file_name(uri) in deleted_names
+    ]
+    changed += reimported
+    for uri in removed + reimported:
+        del manifest["files"][uri]
+    _save_manifest(manifest)
+
+    for start in range(0, len(changed), IMPORT_BATCH_SIZE):
+        batch = changed[start : start + IMPORT_BATCH_SIZE]
+        response = rag.import_files(
+            corpus_name,
+            batch,
+            transformation_config=transformation_config,
+            max_embedding_requests_per_min=EMBEDDING_REQUESTS_PER_MIN,
+        )
+        if response.failed_rag_files_count:
+            raise RuntimeError(
+                f"{response.failed_rag_files_count} files failed to import;"
+                " rerun to resume."
+            )
+        manifest["files"].update((uri, source_files[uri]) for uri in batch)
+        _save_manifest(manifest)
 
 
 def rag_response(query: str) -> str:
@@ -111,6 +211,54 @@ def rag_response(query: str) -> str:
     return str(response)
 
 
+def build_local_index(docs_dir, index_path):
+    """Builds or updates the offline vector index of the BQML reference guide.
+
+    The index is used by the BQML agent instead of the RAG corpus when
+    `BQML_RAG_LOCAL_INDEX` points to it. Only files that changed since the
+    last run are chunked and embedded (see `IncrementalIndexer`).
+
+    Args:
+        docs_dir: Directory with the reference guide as text, markdown or
+            HTML files, e.g. a copy of the files in `paths` exported to text.
+        index_path: Path of the `.npz` index to write.
+    """
+    from google import genai  # pylint: disable=g-import-not-at-top
+
+    from data_science.sub_agents.bqml.ingestion import (  # pylint: disable=g-import-not-at-top
+        IncrementalIndexer,
+        RateLimiter,
+    )
+
+    client = genai.Client(vertexai=True, project=PROJECT_ID, location="us-central1")
+    embedding_model = os.getenv("BQML_RAG_EMBEDDING_MODEL", "text-embedding-005")
+
+    def embed(texts):
+        response = client.models.embed_content(
+            model=embedding_model,
+            contents=list(texts),
+        )
+        return [embedding.values for embedding in response.embeddings]
+
+    documents = {}
+    for path in sorted(Path(docs_dir).rglob("*")):
+        if path.suffix.lower() in (".txt", ".md", ".html", ".htm"):
+            text = path.read_text(encoding="utf-8", errors="ignore")
+            if path.suffix.lower() in (".html", ".htm"):
+                text = re.sub(r"<[^>]+>", " ", text)
+            documents[str(path.relative_to(docs_dir))] = text
+    indexer = IncrementalIndexer(
+        index_path,
+        embed,
+        embedding_model=embedding_model,
+        chunk_size=CHUNK_SIZE,
+        overlap=CHUNK_OVERLAP,
+        rate_limiter=RateLimiter(EMBEDDING_REQUESTS_PER_MIN),
+    )
+    stats = indexer.ingest(documents)
+    print(f"Indexed {len(documents)} files to {index_path}: {stats}")
+
+
 def write_to_env(corpus_name):
     """Writes the corpus name to the specified .env file.
 
@@ -128,11 +276,18 @@ def write_to_env(corpus_name):
 if __name__ == "__main__":
     # rag_corpus = rag.list_corpora()
 
+    if len(sys.argv) == 4 and sys.argv[1] == "--local_index":
+        build_local_index(sys.argv[2], sys.argv[3])
+        sys.exit()
+
     corpus_name = os.getenv("BQML_RAG_CORPUS_NAME")
 
-    print("Creating the corpus.")
-    corpus_name = create_RAG_corpus()
-    print(f"Corpus name: {corpus_name}")
+    if corpus_name:
+        print(f"Updating the existing corpus: {corpus_name}")
+    else:
+        print("Creating the corpus.")
+        corpus_name = create_RAG_corpus()
+        print(f"Corpus name: {corpus_name}")
 
     print(f"Importing files to corpus: {corpus_name}")
     ingest_files(corpus_name)
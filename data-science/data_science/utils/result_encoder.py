@@ -0,0 +1,123 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tabular encodings of query results for LLM context.
+
+A query result as a list of dicts repeats every column name in every row once
+it is serialized into a prompt or a tool response. The encodings here name
+the columns once:
+
+-   `csv`: comma-separated values, quoted where needed.
+-   `tsv`: tab-separated values; tabs and newlines in values become spaces.
+-   `markdown`: a markdown table; `|` in values is escaped.
+
+`encode_rows` optionally cuts long values and keeps only as many rows as fit
+in a token budget, so a narrow result shows more rows than a wide one.
+"""
+
+import csv
+import dataclasses
+import io
+from typing import Any, Optional
+
+from .utils import estimate_tokens
+
+CSV = "csv"
+TSV = "tsv"
+MARKDOWN = "markdown"
+RESULT_FORMATS = (CSV, TSV, MARKDOWN)
+
+
+@dataclasses.dataclass
+class EncodedRows:
+    """Rows encoded as a table.
+
+    Attributes:
+        text: The header and the encoded rows.
+        rows_shown: Number of rows in `text`.
+        total_rows: Number of rows given.
+        values_cut: Number of values shortened to `max_value_chars`.
+    """
+
+    text: str
+    rows_shown: int
+    total_rows: int
+    values_cut: int = 0
+
+
+def _value(value: Any, max_value_chars: Optional[int]) -> tuple[str, bool]:
+    text = "NULL" if value is None else str(value)
+    if max_value_chars and len(text) > max_value_chars:
+        return text[: max(max_value_chars - 3, 0)] + "...", True
+    return text, False
+
+
+def _line(values: list[str], result_format: str) -> str:
+    if result_format == CSV:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerow(values)
+        return buffer.getvalue()
+    if result_format == TSV:
+        return "\t".join(" ".join(v.split()) for v in values) + "\n"
+    if result_format == MARKDOWN:
+        cells = (" ".join(v.split()).replace("|", "\\|") for v in values)
+        return "| " + " | ".join(cells) + " |\n"
+    raise ValueError(f"Unknown result format: {result_format}")
+
+
+def encode_rows(
+    rows: list[dict[str, Any]],
+    result_format: str = CSV,
+    max_tokens: Optional[int] = None,
+    max_value_chars: Optional[int] = None,
+) -> EncodedRows:
+    """Encodes rows as a table with a single header.
+
+    Args:
+        rows: The rows, as dicts with the same keys.
+        result_format: One of `RESULT_FORMATS`.
+        max_tokens: Token budget of the text, as counted by `estimate_tokens`.
+            Rows that do not fit are left out, but the first row is always
+            kept. None keeps all rows.
+        max_value_chars: Longer values are cut and end with "...". None keeps
+            values whole.
+
+    Returns:
+        The encoded rows.
+    """
+    if not rows:
+        return EncodedRows(text="", rows_shown=0, total_rows=0)
+    columns = list(rows[0])
+    text = _line([str(column) for column in columns], result_format)
+    if result_format == MARKDOWN:
+        text += _line(["---"] * len(columns), result_format)
+    lines = [text]
+    tokens = estimate_tokens(text)
+    values_cut = 0
+    for row in rows:
+        values = [_value(row.get(column), max_value_chars) for column in columns]
+        line = _line([value for value, _ in values], result_format)
+        line_tokens = estimate_tokens(line)
+        if max_tokens is not None and len(lines) > 1:
+            if tokens + line_tokens > max_tokens:
+                break
+        lines.append(line)
+        tokens += line_tokens
+        values_cut += sum(cut for _, cut in values)
+    return EncodedRows(
+        text="".join(lines).rstrip("\n"),
+        rows_shown=len(lines) - 1,
+        total_rows=len(rows),
+        values_cut=values_cut,
+    )
@@ -0,0 +1,368 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Parallel, resumable loading of large CSV files into BigQuery.
+
+`TableLoader.load` splits a CSV file into parts of about `part_bytes` at line
+boundaries and:
+
+1.  Infers one schema for the whole file: every part is read as strings and
+    each column gets the narrowest type (INT64, FLOAT64, BOOL, DATE,
+    DATETIME, STRING) that all its values in every part cast to. Unlike
+    BigQuery's autodetect, which samples rows, no later value can contradict
+    the schema.
+2.  Converts the parts to Parquet with that schema, in parallel. Only a few
+    parts are held in memory at a time.
+3.  Loads the parts in order with explicit schemas: the first part replaces
+    the table, the others append to it. A part's load job ID is fixed when
+    the load starts, so a resumed load never loads a part twice. If the job
+    of an earlier run failed, the part is loaded again under a new job ID,
+    recorded in the manifest.
+
+Progress is recorded in a manifest in the staging directory, per destination
+table. A rerun of an interrupted load of an unchanged CSV file reuses the
+schema and skips converted and loaded parts. The manifest is deleted once all
+parts are loaded, so a later run loads the file again.
+`TableLoader.load_many` loads several tables concurrently.
+
+Parts are split at newlines, so quoted values must not contain line breaks.
+"""
+
+import concurrent.futures
+import csv
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import time
+import uuid
+from typing import Any, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from google.api_core import exceptions
+from google.cloud import bigquery
+
+logger = logging.getLogger(__name__)
+
+# Candidate column types, narrowest first. STRING accepts every value.
+_CANDIDATE_TYPES = (
+    ("INT64", pa.int64()),
+    ("FLOAT64", pa.float64()),
+    ("BOOL", pa.bool_()),
+    ("DATE", pa.date32()),
+    ("DATETIME", pa.timestamp("us")),
+    ("STRING", pa.string()),
+)
+_ARROW_TYPES = dict(_CANDIDATE_TYPES)
+
+
+@dataclasses.dataclass
+class TableSpec:
+    """A CSV file and the table it is loaded into."""
+
+    csv_path: str
+    dataset_id: str
+    table_id: str
+
+
+def split_csv(csv_path: str, part_bytes: int) -> tuple[list[str], list[list[int]]]:
+    """Splits a CSV file into byte ranges that end at line boundaries.
+
+    Returns:
+        The column names of the header row and the [start, end) byte range
+        of every part.
+    """
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        size = os.fstat(f.fileno()).st_size
+        parts = []
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + part_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            parts.append([start, end])
+            start = end
+    column_names = next(csv.reader([header.decode("utf-8-sig")]))
+    return column_names, parts
+
+
+def read_part(
+    csv_path: str,
+    part: list[int],
+    column_names: list[str],
+    column_types: Optional[dict[str, pa.DataType]] = None,
+) -> pa.Table:
+    """Reads a byte range of a CSV file; columns default to strings."""
+    with open(csv_path, "rb") as f:
+        f.seek(part[0])
+        data = f.read(part[1] - part[0])
+    return pacsv.read_csv(
+        pa.BufferReader(data),
+        read_options=pacsv.ReadOptions(column_names=column_names),
+        convert_options=pacsv.ConvertOptions(
+            column_types=column_types
+            or {name: pa.string() for name in column_names},
+            null_values=[""],
+            strings_can_be_null=True,
+        ),
+    )
+
+
+def _accepted_types(table: pa.Table) -> dict[str, set[str]]:
+    """Returns the candidate types every value of each column casts to."""
+    accepted = {}
+    for name, column in zip(table.column_names, table.columns):
+        if column.null_count == len(column):
+            accepted[name] = None  # No evidence either way.
+            continue
+        accepted[name] = {"STRING"}
+        values = column.drop_null()
+        # Most candidates are rejected by the first values, so they are
+        # tried on a sample before casting the whole column.
+        sample = values.slice(0, 1024)
+        for type_name, arrow_type in _CANDIDATE_TYPES:
+            if type_name == "STRING":
+                continue
+            if type_name == "FLOAT64" and "INT64" in accepted[name]:
+                accepted[name].add(type_name)
+                continue
+            try:
+                pc.cast(sample, arrow_type)
+                pc.cast(values, arrow_type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                continue
+            accepted[name].add(type_name)
+    return accepted
+
+
+def narrowest_types(
+    accepted_per_part: list[dict[str, Optional[set[str]]]], column_names: list[str]
+) -> dict[str, str]:
+    """Returns the narrowest type of each column accepted by every part."""
+    types = {}
+    for name in column_names:
+        accepted = {type_name for type_name, _ in _CANDIDATE_TYPES}
+        for part in accepted_per_part:
+            if part[name] is not None:
+                accepted &= part[name]
+        if all(part[name] is None for part in accepted_per_part):
+            accepted = {"STRING"}
+        types[name] = next(
+            type_name for type_name, _ in _CANDIDATE_TYPES if type_name in accepted
+        )
+    return types
+
+
+def _source_fingerprint(csv_path: str, destination: str) -> str:
+    stat = os.stat(csv_path)
+    key = (
+        f"{os.path.abspath(csv_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        f":{destination}"
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+
+
+class TableLoader:
+    """Loads CSV files into BigQuery through Parquet parts."""
+
+    def __init__(
+        self,
+        client: Any,
+        staging_dir: str | pathlib.Path,
+        part_bytes: int = 64 * 1024 * 1024,
+        max_workers: int = 4,
+    ):
+        """Initializes the loader.
+
+        Args:
+            client: BigQuery client (or a local backend).
+            staging_dir: Directory of the Parquet parts and manifests.
+            part_bytes: Approximate CSV bytes per part.
+            max_workers: Number of parts read or converted concurrently.
+        """
+        self._client = client
+        self._staging_dir = pathlib.Path(staging_dir)
+        self._part_bytes = part_bytes
+        self._max_workers = max_workers
+
+    def _destination(self, spec: TableSpec) -> str:
+        return f"{self._client.project}.{spec.dataset_id}.{spec.table_id}"
+
+    def _manifest(self, spec: TableSpec) -> tuple[pathlib.Path, dict[str, Any]]:
+        destination = self._destination(spec)
+        directory = self._staging_dir / destination
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / "manifest.json"
+        fingerprint = _source_fingerprint(spec.csv_path, destination)
+        if path.exists():
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+            if manifest["fingerprint"] == fingerprint:
+                return directory, manifest
+            logger.info("%s changed; starting its load over.", spec.csv_path)
+            shutil.rmtree(directory)
+            directory.mkdir(parents=True)
+        column_names, parts = split_csv(spec.csv_path, self._part_bytes)
+        manifest = {
+            "fingerprint": fingerprint,
+            # Prefix of the load job IDs, unique to this load of the file.
+            "load_id": uuid.uuid4().hex[:12],
+            "column_names": column_names,
+            "schema": None,
+            "parts": [
+                {"range": part, "rows": None, "loaded": False} for part in parts
+            ],
+        }
+        return directory, manifest
+
+    @staticmethod
+    def _save(directory: pathlib.Path, manifest: dict[str, Any]) -> None:
+        temporary = directory / "manifest.json.tmp"
+        temporary.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(temporary, directory / "manifest.json")
+
+    def _infer_schema(
+        self, spec: TableSpec, manifest: dict[str, Any], executor
+    ) -> dict[str, str]:
+        column_names = manifest["column_names"]
+        accepted = executor.map(
+            lambda part: _accepted_types(
+                read_part(spec.csv_path, part["range"], column_names)
+            ),
+            manifest["parts"],
+        )
+        return narrowest_types(list(accepted), column_names)
+
+    def _convert(
+        self, spec: TableSpec, manifest, index: int, directory: pathlib.Path
+    ) -> pathlib.Path:
+        path = directory / f"part-{index:05d}.parquet"
+        part = manifest["parts"][index]
+        if part["rows"] is not None and path.exists():
+            return path
+        table = read_part(
+            spec.csv_path,
+            part["range"],
+            manifest["column_names"],
+            {name: _ARROW_TYPES[t] for name, t in manifest["schema"].items()},
+        )
+        temporary = path.with_suffix(".tmp")
+        pq.write_table(table, temporary)
+        os.replace(temporary, path)
+        part["rows"] = table.num_rows
+        return path
+
+    def _load_part(
+        self, spec: TableSpec, manifest, index: int, path, directory: pathlib.Path
+    ) -> None:
+        part = manifest["parts"][index]
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.PARQUET,
+            schema=[
+                bigquery.SchemaField(name, type_name)
+                for name, type_name in manifest["schema"].items()
+            ],
+            write_disposition=(
+                bigquery.WriteDisposition.WRITE_TRUNCATE
+                if index == 0
+                else bigquery.WriteDisposition.WRITE_APPEND
+            ),
+        )
+        destination = self._destination(spec)
+        first_job_id = f"load_{spec.table_id}_{manifest['load_id']}_{index:05d}"
+        while True:
+            job_id = part.get("job_id") or first_job_id
+            try:
+                with open(path, "rb") as f:
+                    job = self._client.load_table_from_file(
+                        f, destination, job_config=job_config, job_id=job_id
+                    )
+            except exceptions.Conflict:
+                # Submitted by an earlier, interrupted run.
+                job = self._client.get_job(job_id)
+                if job.done() and job.error_result:
+                    # Its ID cannot be reused, so the part gets a new job.
+                    logger.warning(
+                        "Load job %s failed (%s); loading the part again.",
+                        job_id,
+                        job.error_result,
+                    )
+                    part["job_id"] = f"{first_job_id}_{uuid.uuid4().hex[:8]}"
+                    self._save(directory, manifest)
+                    continue
+            job.result()
+            return
+
+    def load(self, spec: TableSpec) -> dict[str, Any]:
+        """Loads one CSV file, resuming an earlier partial load.
+
+        Returns:
+            The table, its schema and counts of rows, bytes and parts.
+        """
+        start = time.perf_counter()
+        directory, manifest = self._manifest(spec)
+        parts = manifest["parts"]
+        skipped = sum(part["loaded"] for part in parts)
+        with concurrent.futures.ThreadPoolExecutor(self._max_workers) as executor:
+            if manifest["schema"] is None:
+                manifest["schema"] = self._infer_schema(spec, manifest, executor)
+                self._save(directory, manifest)
+            pending = [i for i, part in enumerate(parts) if not part["loaded"]]
+            # Parts are converted ahead of the sequential loads, but only
+            # `max_workers` beyond the one being loaded.
+            futures = {}
+            for position, index in enumerate(pending):
+                for ahead in pending[position : position + self._max_workers + 1]:
+                    if ahead not in futures:
+                        futures[ahead] = executor.submit(
+                            self._convert, spec, manifest, ahead, directory
+                        )
+                path = futures.pop(index).result()
+                self._load_part(spec, manifest, index, path, directory)
+                parts[index]["loaded"] = True
+                self._save(directory, manifest)
+                path.unlink()
+        # The load is complete; a later run starts over.
+        shutil.rmtree(directory)
+        stats = {
+            "table": f"{spec.dataset_id}.{spec.table_id}",
+            "schema": manifest["schema"],
+            "rows": sum(part["rows"] or 0 for part in parts),
+            "bytes": os.path.getsize(spec.csv_path),
+            "parts": len(parts),
+            "parts_skipped": skipped,
+            "seconds": time.perf_counter() - start,
+        }
+        logger.info(
+            "Loaded %d rows into %s in %.1fs (%d of %d parts already loaded).",
+            stats["rows"],
+            stats["table"],
+            stats["seconds"],
+            skipped,
+            len(parts),
+        )
+        return stats
+
+    def load_many(
+        self, specs: list[TableSpec], max_tables: int = 4
+    ) -> list[dict[str, Any]]:
+        """Loads several CSV files concurrently; see `load`."""
+        with concurrent.futures.ThreadPoolExecutor(max_tables) as executor:
+            return list(executor.map(self.load, specs))
@@ -0,0 +1,104 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""ADK tools whose function declarations are built once.
+
+An agent listing plain functions in `tools` gets a new `FunctionTool` for
+each of them on every LLM request, and every tool rebuilds its function
+declaration from the signature each time. The agents here list
+`PrecompiledFunctionTool` instances instead, which are built with the agent
+and build their declaration on the first request only. Each request gets a
+deep copy of it, which is still much cheaper than parsing the signature, so
+that a caller mutating its declaration does not change the cached one.
+
+ADK calls synchronous tool functions on the event loop, where a tool waiting
+for BigQuery admission or a job would stall every other session.
+`PrecompiledFunctionTool` runs them in a pool of `SYNC_TOOL_WORKERS` threads
+instead.
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import inspect
+import threading
+from typing import Any, Callable, Optional
+
+from google.adk.tools import FunctionTool
+from google.genai import types
+
+_UNSET = object()
+
+# Threads running the synchronous tools of all sessions. They mostly wait on
+# BigQuery and the LLM, so there are more of them than CPUs.
+SYNC_TOOL_WORKERS = 32
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    SYNC_TOOL_WORKERS, thread_name_prefix="sync_tool"
+                )
+    return _executor
+
+
+def _is_sync_function(target: Callable[..., Any]) -> bool:
+    """Whether ADK would call the target on the event loop and block it."""
+    return not any(
+        check(target) or check(getattr(target, "__call__", None))
+        for check in (
+            inspect.iscoroutinefunction,
+            inspect.isasyncgenfunction,
+            inspect.isgeneratorfunction,
+        )
+    )
+
+
+class PrecompiledFunctionTool(FunctionTool):
+    """`FunctionTool` that caches its declaration and runs off the event loop."""
+
+    def __init__(self, func, **kwargs):
+        super().__init__(func, **kwargs)
+        self._declaration = _UNSET
+
+    def _get_declaration(self) -> Optional[types.FunctionDeclaration]:
+        if self._declaration is _UNSET:
+            self._declaration = super()._get_declaration()
+        if self._declaration is None:
+            return None
+        return self._declaration.model_copy(deep=True)
+
+    async def _invoke_callable(
+        self, target: Callable[..., Any], args_to_call: dict[str, Any]
+    ) -> Any:
+        if not _is_sync_function(target):
+            return await super()._invoke_callable(target, args_to_call)
+        # The context carries the current span into the thread.
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            _get_executor(),
+            functools.partial(context.run, target, **args_to_call),
+        )
+
+
+def precompiled(*funcs) -> list[PrecompiledFunctionTool]:
+    """Wraps each function in a `PrecompiledFunctionTool`."""
+    return [PrecompiledFunctionTool(func) for func in funcs]
@@ -0,0 +1,199 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""OpenTelemetry spans for the data science tools and LLM calls.
+
+Spans are created with the OpenTelemetry API, so they are exported by whatever
+tracer provider the process uses (for example `adk web --trace_to_cloud`).
+Setting `DATA_SCIENCE_TRACE_FILE` to a path additionally writes every finished
+span as one JSON object per line, for offline analysis:
+
+    export DATA_SCIENCE_TRACE_FILE=/tmp/data_science_traces.jsonl
+"""
+
+import contextlib
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from typing import Any, Iterator, Sequence
+
+from opentelemetry import trace
+
+from data_science.utils.utils import estimate_tokens
+
+tracer = trace.get_tracer("data_science")
+
+_provider = None
+_configure_lock = threading.Lock()
+
+
+def set_attributes(current_span: trace.Span, **attributes: Any) -> None:
+    """Sets span attributes, skipping None values."""
+    for key, value in attributes.items():
+        if value is not None:
+            current_span.set_attribute(key, value)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[trace.Span]:
+    """Runs the body in a span that records its latency in `latency_ms`."""
+    with tracer.start_as_current_span(name) as current_span:
+        set_attributes(current_span, **attributes)
+        start = time.perf_counter()
+        try:
+            yield current_span
+        finally:
+            current_span.set_attribute(
+                "latency_ms", (time.perf_counter() - start) * 1000
+            )
+
+
+def traced(name: str | None = None):
+    """Decorator running a function, sync or async, in a `span`.
+
+    The wrapper keeps the signature and docstring of the function, so it can
+    decorate ADK tools.
+    """
+
+    def decorator(func):
+        span_name = name or func.__name__
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def current_span() -> trace.Span:
+    """Returns the active span."""
+    return trace.get_current_span()
+
+
+def set_llm_usage(
+    current_span: trace.Span, response: Any, prompt: str | None = None
+) -> None:
+    """Records the token counts of a Gemini response on a span.
+
+    Falls back to an estimate from the prompt and response text when the
+    response carries no usage metadata.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    tokens_in = getattr(usage, "prompt_token_count", None)
+    tokens_out = getattr(usage, "candidates_token_count", None)
+    if tokens_in is None and prompt is not None:
+        tokens_in = estimate_tokens(prompt)
+    if tokens_out is None:
+        try:
+            tokens_out = estimate_tokens(response.text)
+        except (AttributeError, ValueError):
+            tokens_out = None
+    set_attributes(
+        current_span, **{"llm.tokens_in": tokens_in, "llm.tokens_out": tokens_out}
+    )
+
+
+class JsonlSpanExporter:
+    """OpenTelemetry span exporter writing one JSON object per span.
+
+    Implements the `opentelemetry.sdk.trace.export.SpanExporter` interface
+    without importing the SDK until spans are exported.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[Any]):
+        # pylint: disable=g-import-not-at-top
+        from opentelemetry.sdk.trace.export import SpanExportResult
+
+        # pylint: enable=g-import-not-at-top
+        lines = []
+        for finished in spans:
+            context = finished.get_span_context()
+            lines.append(
+                json.dumps(
+                    {
+                        "name": finished.name,
+                        "trace_id": format(context.trace_id, "032x"),
+                        "span_id": format(context.span_id, "016x"),
+                        "parent_id": (
+                            format(finished.parent.span_id, "016x")
+                            if finished.parent
+                            else None
+                        ),
+                        "start_time_ns": finished.start_time,
+                        "duration_ms": (finished.end_time - finished.start_time)
+                        / 1e6,
+                        "status": finished.status.status_code.name,
+                        "attributes": dict(finished.attributes or {}),
+                    },
+                    default=str,
+                )
+            )
+        with self._lock, open(self._path, "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:  # pylint: disable=unused-argument
+        return True
+
+
+def configure_jsonl_export(path: str) -> None:
+    """Adds a JSONL span exporter to the process' tracer provider.
+
+    If no SDK tracer provider is installed yet, one is created and registered
+    as the global provider.
+    """
+    global _provider
+    # pylint: disable=g-import-not-at-top
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    # pylint: enable=g-import-not-at-top
+    with _configure_lock:
+        provider = trace.get_tracer_provider()
+        if not isinstance(provider, TracerProvider):
+            provider = TracerProvider()
+            trace.set_tracer_provider(provider)
+        provider.add_span_processor(BatchSpanProcessor(JsonlSpanExporter(path)))
+        _provider = provider
+
+
+def flush() -> None:
+    """Flushes spans buffered for the JSONL exporter."""
+    if _provider is not None:
+        _provider.force_flush()
+
+
+if os.getenv("DATA_SCIENCE_TRACE_FILE"):
+    configure_jsonl_export(os.environ["DATA_SCIENCE_TRACE_FILE"])
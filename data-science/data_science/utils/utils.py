@@ -15,10 +15,10 @@
 import json
 import os
 
-from vertexai.preview.extensions import Extension
-
 
 def list_all_extensions():
+  from vertexai.preview.extensions import Extension  # pylint: disable=g-import-not-at-top
+
   extensions = Extension.list(location='us-central1')
   for extension in extensions:
     print('Name:', extension.gca_resource.name)
@@ -45,6 +45,21 @@ def get_env_var(var_name):
     raise ValueError(f'Missing environment variable: {var_name}')
 
 
+def estimate_tokens(text):
+  """Estimates the number of LLM tokens in a text.
+
+  Uses the common approximation of four characters per token, which is close
+  enough for comparing prompt sizes without calling a tokenizer.
+
+  Args:
+    text: The text to estimate.
+
+  Returns:
+    The estimated number of tokens.
+  """
+  return (len(text) + 3) // 4 if text else 0
+
+
 def get_image_bytes(filepath):
   """Reads an image file and returns its bytes.
 
@@ -0,0 +1,232 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Small in-process vector index (NumPy brute force, cosine similarity)."""
+
+import json
+import threading
+from typing import Any, Callable, Optional, Sequence
+
+import numpy as np
+
+
+class VectorIndex:
+    """Brute-force cosine-similarity index over L2-normalized float32 vectors.
+
+    Brute force is exact and, for the tens of thousands of entries a single
+    agent process accumulates, a single matrix-vector product is faster than
+    maintaining a graph index. The index is thread safe.
+
+    Attributes:
+      max_entries: Maximum number of entries kept. When full, the oldest entry
+        is evicted (FIFO).
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # Rows `_start:_end` of `_buffer` hold the vectors, oldest first, and
+        # `_payloads` and `_ids` hold theirs at the same positions. The buffer
+        # grows geometrically and evicted rows are only dropped when it is
+        # compacted, so adding an entry copies no other vector (amortized).
+        self._buffer: Optional[np.ndarray] = None
+        self._start = 0
+        self._end = 0
+        self._payloads: list[Optional[dict[str, Any]]] = []
+        self._ids: list[int] = []
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def _vectors(self) -> Optional[np.ndarray]:
+        if self._buffer is None:
+            return None
+        return self._buffer[self._start : self._end]
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _reserve(self, extra: int, dim: int) -> None:
+        """Makes room for `extra` rows after `_end`; requires the lock."""
+        if self._buffer is None:
+            self._buffer = np.empty((max(extra, 16), dim), dtype=np.float32)
+            return
+        capacity = len(self._buffer)
+        if self._end + extra <= capacity:
+            return
+        size = self._end - self._start
+        if size + extra > capacity // 2:
+            capacity = max(2 * capacity, size + extra)
+            buffer = np.empty((capacity, dim), dtype=np.float32)
+        else:
+            buffer = self._buffer
+        buffer[:size] = self._buffer[self._start : self._end]
+        self._buffer = buffer
+        del self._payloads[: self._start]
+        del self._ids[: self._start]
+        self._start, self._end = 0, size
+
+    def _evict(self, count: int) -> None:
+        """Evicts the `count` oldest entries; requires the lock."""
+        for position in range(self._start, self._start + count):
+            self._payloads[position] = None
+        self._start += count
+
+    def _position(self, entry_id: int) -> Optional[int]:
+        try:
+            return self._ids.index(entry_id, self._start)
+        except ValueError:
+            return None
+
+    def add(self, vector: Sequence[float], payload: dict[str, Any]) -> int:
+        """Adds a vector with its payload and returns the new entry id."""
+        vector = self._normalize(vector)
+        with self._lock:
+            if len(self) >= self.max_entries:
+                self._evict(len(self) - self.max_entries + 1)
+            self._reserve(1, len(vector))
+            self._buffer[self._end] = vector
+            self._end += 1
+            entry_id = self._next_id
+            self._next_id += 1
+            self._payloads.append(payload)
+            self._ids.append(entry_id)
+            return entry_id
+
+    def add_many(
+        self, vectors: Sequence[Sequence[float]], payloads: Sequence[dict[str, Any]]
+    ) -> list[int]:
+        """Adds vectors with their payloads in one copy of the matrix.
+
+        Returns:
+          The new entry ids.
+        """
+        if not len(payloads):
+            return []
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms > 0, norms, 1)
+        payloads = list(payloads)
+        with self._lock:
+            entry_ids = list(range(self._next_id, self._next_id + len(payloads)))
+            self._next_id += len(payloads)
+            # Entries beyond `max_entries` would be evicted straight away.
+            dropped = max(len(payloads) - self.max_entries, 0)
+            matrix, payloads = matrix[dropped:], payloads[dropped:]
+            overflow = len(self) + len(payloads) - self.max_entries
+            if overflow > 0:
+                self._evict(overflow)
+            self._reserve(len(payloads), matrix.shape[1])
+            self._buffer[self._end : self._end + len(payloads)] = matrix
+            self._end += len(payloads)
+            self._payloads.extend(payloads)
+            self._ids.extend(entry_ids[dropped:])
+            return entry_ids
+
+    def entries(self) -> list[tuple[int, dict[str, Any]]]:
+        """Returns the (entry_id, payload) of every entry, oldest first."""
+        with self._lock:
+            return list(
+                zip(self._ids[self._start :], self._payloads[self._start :])
+            )
+
+    def get(self, entry_id: int) -> Optional[dict[str, Any]]:
+        """Returns the payload of an entry, or None if it is not indexed."""
+        with self._lock:
+            position = self._position(entry_id)
+            return None if position is None else self._payloads[position]
+
+    def update(self, entry_id: int, payload: dict[str, Any]) -> None:
+        """Replaces the payload of an existing entry."""
+        with self._lock:
+            position = self._position(entry_id)
+            if position is not None:
+                self._payloads[position] = payload
+
+    def remove(self, entry_id: int) -> None:
+        """Removes an entry from the index, if present."""
+        with self._lock:
+            position = self._position(entry_id)
+            if position is None:
+                return
+            self._buffer[position : self._end - 1] = self._buffer[
+                position + 1 : self._end
+            ]
+            self._end -= 1
+            self._payloads.pop(position)
+            self._ids.pop(position)
+
+    def search(
+        self,
+        vector: Sequence[float],
+        k: int = 1,
+        where: Optional[Callable[[dict[str, Any]], bool]] = None,
+    ) -> list[tuple[float, int, dict[str, Any]]]:
+        """Returns up to `k` (similarity, entry_id, payload) tuples, best first.
+
+        Args:
+          vector: The query vector.
+          k: Number of results to return.
+          where: Optional predicate on the payload; entries for which it returns
+            False are skipped.
+        """
+        query = self._normalize(vector)
+        with self._lock:
+            if not len(self):
+                return []
+            scores = self._vectors @ query
+            order = np.argsort(-scores)
+            results = []
+            for row in order:
+                position = self._start + row
+                payload = self._payloads[position]
+                if where is not None and not where(payload):
+                    continue
+                results.append((float(scores[row]), self._ids[position], payload))
+                if len(results) >= k:
+                    break
+            return results
+
+    def save(self, path: str) -> None:
+        """Saves the index to a `.npz` file."""
+        with self._lock:
+            np.savez_compressed(
+                path,
+                vectors=(
+                    self._vectors
+                    if self._buffer is not None
+                    else np.zeros((0, 0), dtype=np.float32)
+                ),
+                ids=np.asarray(self._ids[self._start :], dtype=np.int64),
+                payloads=np.asarray(json.dumps(self._payloads[self._start :])),
+            )
+
+    @classmethod
+    def load(cls, path: str, max_entries: int = 10000) -> "VectorIndex":
+        """Loads an index previously written with `save`."""
+        index = cls(max_entries=max_entries)
+        with np.load(path) as data:
+            vectors = data["vectors"].astype(np.float32)
+            index._ids = [int(i) for i in data["ids"]]
+            index._payloads = json.loads(str(data["payloads"]))
+        if index._ids:
+            index._buffer = vectors
+            index._end = len(index._ids)
+        index._next_id = max(index._ids, default=-1) + 1
+        return index
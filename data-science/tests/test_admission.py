@@ -0,0 +1,178 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the admission control of BigQuery jobs."""
+
+import asyncio
+import concurrent.futures
+import os
+import sys
+import threading
+import time
+import types
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery import admission, backends
+from data_science.sub_agents.bigquery import tools as bq_tools
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condition not met in time.")
+        time.sleep(0.005)
+
+
+class TestAdmissionController(unittest.TestCase):
+    """Test cases for AdmissionController."""
+
+    def _queue(self, controller, order, session, priority):
+        def run():
+            with controller.admit(session, priority):
+                order.append(priority)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def test_most_urgent_waiting_job_runs_first(self):
+        controller = admission.AdmissionController(max_concurrent=1)
+        order = []
+        with controller.admit("a", admission.ANALYTICS):
+            threads = [
+                self._queue(controller, order, "b", admission.TRAINING),
+                self._queue(controller, order, "c", admission.ANALYTICS),
+            ]
+            _wait_for(
+                lambda: controller.stats()[admission.ANALYTICS]["waiting"]
+                and controller.stats()[admission.TRAINING]["waiting"]
+            )
+            threads.append(
+                self._queue(controller, order, "d", admission.INTERACTIVE)
+            )
+            _wait_for(
+                lambda: controller.stats()[admission.INTERACTIVE]["waiting"]
+            )
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            order, [admission.INTERACTIVE, admission.ANALYTICS, admission.TRAINING]
+        )
+        stats = controller.stats()
+        self.assertEqual(stats["running"], 0)
+        self.assertEqual(stats[admission.ANALYTICS]["admitted"], 2)
+        self.assertGreater(stats[admission.TRAINING]["queue_max_seconds"], 0)
+
+    def test_session_and_priority_caps_and_deadline(self):
+        controller = admission.AdmissionController(
+            max_concurrent=3,
+            max_per_session=1,
+            max_per_priority={admission.TRAINING: 1},
+        )
+        with controller.admit("a", admission.TRAINING):
+            with self.assertRaises(admission.AdmissionTimeout):
+                with controller.admit("a", admission.INTERACTIVE, timeout=0.05):
+                    pass
+            with self.assertRaises(admission.AdmissionTimeout):
+                with controller.admit("b", admission.TRAINING, timeout=0.05):
+                    pass
+            # Jobs of other sessions and classes still run.
+            with controller.admit("b", admission.INTERACTIVE, timeout=0.05):
+                self.assertEqual(controller.stats()["sessions"], 2)
+        stats = controller.stats()
+        self.assertEqual(stats[admission.INTERACTIVE]["timed_out"], 1)
+        self.assertEqual(stats[admission.TRAINING]["timed_out"], 1)
+        self.assertEqual(stats[admission.TRAINING]["waiting"], 0)
+
+    def test_async_wait_does_not_block_the_event_loop(self):
+        controller = admission.AdmissionController(max_concurrent=1)
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        async def wait_for_export():
+            tick_task = asyncio.create_task(ticker())
+            async with controller.admit_async("b", admission.ANALYTICS) as job:
+                tick_task.cancel()
+                return job
+
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            with controller.admit("a", admission.TRAINING):
+                future = executor.submit(asyncio.run, wait_for_export())
+                _wait_for(
+                    lambda: controller.stats()[admission.ANALYTICS]["waiting"]
+                )
+                time.sleep(0.2)
+            job = future.result(timeout=5)
+        self.assertGreater(job.queue_seconds, 0.1)
+        # The loop kept running while the job waited.
+        self.assertGreater(len(ticks), 5)
+        self.assertEqual(controller.stats()["running"], 0)
+
+    def test_async_timeout_and_cancellation_leave_the_queue(self):
+        controller = admission.AdmissionController(max_concurrent=1)
+
+        async def wait(timeout):
+            async with controller.admit_async("b", timeout=timeout):
+                pass
+
+        async def cancel():
+            task = asyncio.create_task(wait(None))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with controller.admit("a"):
+            with self.assertRaises(admission.AdmissionTimeout):
+                asyncio.run(wait(0.05))
+            asyncio.run(cancel())
+            stats = controller.stats()
+            self.assertEqual(stats[admission.INTERACTIVE]["waiting"], 0)
+            self.assertEqual(stats[admission.INTERACTIVE]["timed_out"], 1)
+        asyncio.run(wait(0.05))
+        self.assertEqual(controller.stats()["running"], 0)
+
+    def test_busy_validation_does_not_run_the_query(self):
+        state = {}
+        key = admission.session_key(state)
+        self.assertEqual(admission.session_key(state), key)
+        controller = admission.AdmissionController(max_per_session=1)
+        client = backends.LocalBigQueryClient("p")
+        with mock.patch.multiple(
+            bq_tools, bq_client=client, admission_controller=controller
+        ), mock.patch.object(client, "query", wraps=client.query) as query:
+            with controller.admit(key, admission.TRAINING):
+                controller.timeouts[admission.INTERACTIVE] = 0.05
+                result = bq_tools.run_bigquery_validation(
+                    "SELECT 1 AS x", types.SimpleNamespace(state=state)
+                )
+                query.assert_not_called()
+                self.assertIn("BigQuery is busy", result["error_message"])
+            result = bq_tools.run_bigquery_validation(
+                "SELECT 1 AS x", types.SimpleNamespace(state=state)
+            )
+        self.assertIsNone(result["error_message"])
+        self.assertEqual(controller.stats()[admission.INTERACTIVE]["admitted"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
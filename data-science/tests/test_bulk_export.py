@@ -0,0 +1,132 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for bulk exports of query results."""
+
+import asyncio
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science import tools
+from data_science.sub_agents.bigquery import backends, bulk_export
+from data_science.sub_agents.bigquery import tools as bq_tools
+
+UNORDERED_SQL = (
+    "SELECT id, country, num_sold FROM `p.forecasting_sticker_sales.test`"
+)
+SQL = f"{UNORDERED_SQL} ORDER BY id"
+
+
+class ShuffledReadClient(backends.LocalReadClient):
+    """Read client returning its streams out of order, as the real API may."""
+
+    def create_session(self, table, max_streams):
+        schema, streams = super().create_session(table, max_streams)
+        return schema, streams[::-1]
+
+
+class TestBulkExport(unittest.TestCase):
+    """Test cases for BulkExporter and LocalReadClient."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.client = backends.LocalBigQueryClient(
+            "p", default_dataset="forecasting_sticker_sales"
+        )
+        self.read_client = backends.LocalReadClient(self.client, batch_rows=50)
+        self.exporter = bulk_export.BulkExporter(
+            self.directory.name, max_exports=1, max_streams=4
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_parallel_streams_round_trip(self):
+        exported = self.exporter.export_query(
+            self.client, self.read_client, UNORDERED_SQL
+        )
+        expected = self.client.query(SQL).result().to_dataframe()
+        self.assertEqual(exported.streams, 4)
+        self.assertEqual(len(list(exported.path.glob("part-*.parquet"))), 4)
+        self.assertEqual(exported.num_rows, len(expected))
+        self.assertEqual(exported.columns, ["id", "country", "num_sold"])
+        pd.testing.assert_frame_equal(
+            pd.read_parquet(exported.path).sort_values("id", ignore_index=True),
+            expected,
+            check_dtype=False,
+        )
+
+    def test_ordered_query_keeps_its_order(self):
+        read_client = ShuffledReadClient(self.client, batch_rows=50)
+        expected = self.client.query(SQL).result().to_dataframe()
+        unordered = self.exporter.export_query(
+            self.client, read_client, UNORDERED_SQL
+        )
+        self.assertEqual(unordered.streams, 4)
+        ids = pd.read_parquet(unordered.path)["id"]
+        self.assertFalse(ids.is_monotonic_increasing)
+        cte_sql = f"WITH t AS ({UNORDERED_SQL}) SELECT * FROM t ORDER BY id"
+        for sql in (SQL, cte_sql):
+            exported = self.exporter.export_query(self.client, read_client, sql)
+            self.assertEqual(exported.streams, 1)
+            pd.testing.assert_frame_equal(
+                pd.read_parquet(exported.path), expected, check_dtype=False
+            )
+        # Only a top-level ORDER BY orders the result.
+        self.assertFalse(
+            bulk_export.is_ordered("SELECT * FROM (SELECT id FROM t ORDER BY id)")
+        )
+
+    def test_empty_result_and_eviction(self):
+        empty_sql = f"{UNORDERED_SQL} WHERE FALSE"
+        first = self.exporter.export_query(self.client, self.read_client, empty_sql)
+        self.assertEqual((first.num_rows, first.streams), (0, 0))
+        self.assertEqual(list(pd.read_parquet(first.path).columns), first.columns)
+        second = self.exporter.export_query(self.client, self.read_client, SQL)
+        self.assertFalse(first.path.exists())
+        self.assertIsNone(self.exporter.get(first.export_id))
+        self.assertIs(self.exporter.get(second.export_id), second)
+
+    def test_data_science_agent_gets_the_full_result(self):
+        state = {}
+        with mock.patch.multiple(
+            bq_tools,
+            bq_client=self.client,
+            bq_read_client=self.read_client,
+            bulk_exporter=self.exporter,
+        ), mock.patch.object(tools, "reads_local_files", return_value=True):
+            bq_tools.run_bigquery_validation(SQL, types.SimpleNamespace(state=state))
+            self.assertEqual(len(state["query_result"]), bq_tools.MAX_NUM_ROWS)
+            self.assertEqual(state["query_sql"], SQL)
+            text = asyncio.run(
+                tools._export_full_result(  # pylint: disable=protected-access
+                    types.SimpleNamespace(state=state)
+                )
+            )
+        self.assertIn(
+            f"{len(self.client.query(SQL).result().to_dataframe())} rows", text
+        )
+        self.assertIn("pd.read_parquet(", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the LLM record/replay cassette."""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from google.adk.agents import Agent
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from data_science.utils import cassette
+
+
+class FakeModels:
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, model, contents, config):
+        self.calls += 1
+        return types.GenerateContentResponse(
+            candidates=[
+                types.Candidate(
+                    content=types.Content(
+                        role="model", parts=[types.Part(text=f"{model}: {contents}")]
+                    )
+                )
+            ]
+        )
+
+
+def add(x: int, y: int) -> int:
+    """Adds two numbers."""
+    return x + y
+
+
+class TestCassette(unittest.TestCase):
+    """Test cases for Cassette and its ADK callbacks."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "llm.jsonl.gz")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_genai_client_replays_without_a_client(self):
+        models = FakeModels()
+        recorder = cassette.Cassette(self.path, mode=cassette.RECORD)
+        with mock.patch.object(cassette, "get_cassette", return_value=recorder):
+            client = cassette.wrap_genai_client(lambda: mock.Mock(models=models))
+            client.models.generate_content(
+                model="m", contents="q", config={"temperature": 0.1}
+            )
+
+        sleeps = []
+        player = cassette.Cassette(
+            self.path,
+            mode=cassette.REPLAY,
+            latency_ms=cassette.RECORDED_LATENCY,
+            sleep=sleeps.append,
+        )
+        with mock.patch.object(cassette, "get_cassette", return_value=player):
+            client = cassette.wrap_genai_client(mock.Mock(side_effect=AssertionError))
+            response = client.models.generate_content(
+                model="m", contents="q", config={"temperature": 0.1}
+            )
+            self.assertEqual(response.text, "m: q")
+            self.assertEqual(len(sleeps), 1)
+            with self.assertRaises(cassette.CassetteMiss):
+                client.models.generate_content(
+                    model="m", contents="other", config={"temperature": 0.1}
+                )
+        self.assertEqual(models.calls, 1)
+
+    def test_agent_run_replays_across_function_call_ids(self):
+        agent = Agent(
+            model="gemini-2.0-flash",
+            name="calculator",
+            instruction="Add the numbers.",
+            tools=[add],
+            before_model_callback=cassette.before_model_callback,
+            after_model_callback=cassette.after_model_callback,
+        )
+
+        async def run():
+            runner = InMemoryRunner(agent=agent)
+            session = await runner.session_service.create_session(
+                app_name=runner.app_name, user_id="u"
+            )
+            texts = []
+            async for event in runner.run_async(
+                user_id="u",
+                session_id=session.id,
+                new_message=types.Content(role="user", parts=[types.Part(text="2+3")]),
+            ):
+                if event.content:
+                    texts.extend(p.text for p in event.content.parts if p.text)
+            return texts
+
+        env = {
+            "DATA_SCIENCE_CASSETTE": self.path,
+            "DATA_SCIENCE_CASSETTE_MODE": "replay",
+        }
+        with mock.patch.dict(os.environ, env):
+            player = cassette.get_cassette()
+            # Records the model's responses one by one, as the misses show
+            # which requests the agent makes.
+            missed = []
+            lookup = player.lookup
+            player.lookup = lambda key: missed.append(key) or lookup(key)
+            for response in [
+                {"function_call": {"name": "add", "args": {"x": 2, "y": 3}}},
+                {"text": "5"},
+            ]:
+                with self.assertRaises(cassette.CassetteMiss):
+                    asyncio.run(run())
+                player.record(
+                    missed[-1], {"content": {"role": "model", "parts": [response]}}, 1
+                )
+            hits = player.hits
+            self.assertEqual(asyncio.run(run()), ["5"])
+            self.assertEqual(player.hits - hits, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the multi-dataset catalog."""
+
+import os
+import sys
+import types
+import unittest
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery import backends, schema_registry, tools
+from data_science.sub_agents.bigquery.catalog import (
+    DatasetCatalog,
+    DatasetRef,
+    parse_catalog,
+)
+
+DATASETS = {
+    "retail": {"store_sales": ["store", "amount"], "customers": ["name"]},
+    "hr": {"employees": ["name", "salary"], "departments": ["title"]},
+    "logistics": {"shipments": ["carrier", "weight"]},
+}
+
+
+class TestDatasetCatalog(unittest.TestCase):
+    """Test cases for DatasetCatalog and question routing."""
+
+    def setUp(self):
+        self.client = backends.LocalBigQueryClient("p", default_dataset="retail")
+        for dataset, tables in DATASETS.items():
+            for table, columns in tables.items():
+                self.client.load_dataframe(
+                    dataset, table, pd.DataFrame([{c: "x" for c in columns}])
+                )
+        self._saved = (tools.bq_client, tools.catalog, tools.database_settings)
+        tools.bq_client = self.client
+        tools.database_settings = None
+        tools.catalog = self.catalog = DatasetCatalog(
+            parse_catalog("retail, p.hr, logistics", "p"),
+            load_schema=tools._load_catalog_schema,  # pylint: disable=protected-access
+            list_columns=tools._list_catalog_columns,  # pylint: disable=protected-access
+            max_loaded=2,
+        )
+
+    def tearDown(self):
+        tools.bq_client, tools.catalog, tools.database_settings = self._saved
+
+    def test_parse_catalog(self):
+        self.assertEqual(
+            parse_catalog("a, other.b,a", "p"),
+            [DatasetRef("p", "a"), DatasetRef("other", "b")],
+        )
+
+    def test_routing_loads_only_the_relevant_schema(self):
+        self.assertEqual(self.catalog.loads, 0)
+        state = {}
+        tools.sync_database_settings(state)
+        self.assertEqual(state, {})
+
+        settings = tools.route_dataset(
+            "What is the average salary of employees?",
+            types.SimpleNamespace(state=state),
+        )
+        self.assertEqual(settings["bq_dataset_id"], "hr")
+        self.assertEqual(state["database_settings"], settings)
+        self.assertEqual(self.catalog.loads, 1)
+        self.assertIn("`salary` STRING", tools.get_ddl_schema(settings))
+
+    def test_unmatched_question_stays_on_current_dataset(self):
+        state = {}
+        tools.route_dataset(
+            "Total weight per carrier", types.SimpleNamespace(state=state)
+        )
+        settings = tools.route_dataset(
+            "And the week before?", types.SimpleNamespace(state=state)
+        )
+        self.assertEqual(settings["bq_dataset_id"], "logistics")
+
+    def test_cold_schemas_are_evicted_and_reloaded(self):
+        fingerprints = {
+            ref: self.catalog.schema_fingerprint(ref)
+            for ref in self.catalog.datasets
+        }
+        retail = self.catalog.resolve(dataset="retail")
+        self.assertIsNone(schema_registry.registry.get(fingerprints[retail]))
+        ddl_schema = tools.get_ddl_schema(
+            {
+                "bq_project_id": "p",
+                "bq_dataset_id": "retail",
+                "schema_fingerprint": fingerprints[retail],
+            }
+        )
+        self.assertIn("store_sales", ddl_schema)
+        self.assertEqual(self.catalog.loads, 4)
+
+    def test_failed_listing_is_retried(self):
+        self.assertEqual(
+            self.catalog.describe().splitlines(),
+            ["- `p.retail`", "- `p.hr`", "- `p.logistics`"],
+        )
+        listed = []
+
+        def list_columns(ref):
+            listed.append(ref.dataset)
+            if ref.dataset == "hr" and listed.count("hr") == 1:
+                raise RuntimeError("unavailable")
+            return tools._list_catalog_columns(ref)  # pylint: disable=protected-access
+
+        self.catalog._list_columns = list_columns  # pylint: disable=protected-access
+        question = "What is the average salary of employees?"
+        self.assertEqual(self.catalog.route(question).dataset, "retail")
+        self.assertEqual(self.catalog.route(question).dataset, "hr")
+        self.assertEqual(sorted(listed), ["hr", "hr", "logistics", "retail"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the CHASE-SQL prompt example bank."""
+
+import os
+import sys
+import tempfile
+import unittest
+import zlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery.chase_sql import example_bank
+from data_science.sub_agents.bigquery.chase_sql.dc_prompt_template import (
+    DC_PROMPT_TEMPLATE,
+)
+from data_science.sub_agents.bigquery.chase_sql.qp_prompt_template import (
+    QP_PROMPT_TEMPLATE,
+)
+from data_science.utils.vector_index import VectorIndex
+
+
+class BagOfWords:
+    """Deterministic stand-in for an embedding model, counting its calls."""
+
+    def __init__(self):
+        self.texts = 0
+
+    def __call__(self, texts):
+        self.texts += len(texts)
+        vectors = []
+        for text in texts:
+            vector = [0.0] * 128
+            for word in text.lower().replace("?", " ").replace(",", " ").split():
+                vector[zlib.crc32(word.encode()) % 128] += 1.0
+            vectors.append(vector)
+        return vectors
+
+
+class TestExampleBank(unittest.TestCase):
+    """Test cases for ExampleBank."""
+
+    def setUp(self):
+        self.embed = BagOfWords()
+        self.bank = example_bank.ExampleBank(
+            {"dc": DC_PROMPT_TEMPLATE, "qp": QP_PROMPT_TEMPLATE}, self.embed
+        )
+
+    def test_selects_most_relevant_examples(self):
+        question = "How many flights were there from Boston airport in 2018?"
+        template = self.bank.prompt_template("dc", question, k=2)
+        self.assertIn("San Diego International airport", template)
+        self.assertNotIn("Thai restaurants", template)
+        self.assertIn("Example 2", template)
+        self.assertNotIn("Example 3", template)
+        self.assertLess(len(template), len(DC_PROMPT_TEMPLATE) / 2)
+        prompt = template.format(SCHEMA="s", QUESTION=question, BQ_PROJECT_ID="p")
+        self.assertTrue(prompt.rstrip().endswith("Recursive Divide-and-Conquer."))
+
+    def test_all_examples_keep_the_template(self):
+        self.assertEqual(len(self.bank.examples("qp")), 7)
+        self.assertEqual(
+            self.bank.prompt_template("qp", "Any question", k=0), QP_PROMPT_TEMPLATE
+        )
+        self.assertEqual(self.embed.texts, 0)
+
+        def fail(texts):
+            raise RuntimeError("offline")
+
+        bank = example_bank.ExampleBank({"dc": DC_PROMPT_TEMPLATE}, fail)
+        self.assertEqual(
+            bank.prompt_template("dc", "Any question", k=3), DC_PROMPT_TEMPLATE
+        )
+
+    def test_given_question_embedding_is_used(self):
+        question = "How many flights were there from Boston airport in 2018?"
+        vector = self.embed([question])[0]
+        self.bank.prompt_template("dc", "Ignored", k=2)
+        embedded = self.embed.texts
+        self.assertEqual(
+            self.bank.prompt_template("dc", "Ignored", k=2, vector=vector),
+            self.bank.prompt_template("dc", question, k=2),
+        )
+        # Only the question without a given embedding was embedded.
+        self.assertEqual(self.embed.texts, embedded + 1)
+
+    def test_saved_embeddings_are_reused(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "examples.npz")
+            self.bank.save(path)
+            embedded = self.embed.texts
+            self.assertEqual(embedded, 15)
+            bank = example_bank.ExampleBank(
+                {"dc": DC_PROMPT_TEMPLATE}, self.embed, VectorIndex.load(path)
+            )
+            bank.select("dc", "How many employees earn over $100,000?", k=1)
+        self.assertEqual(self.embed.texts, embedded + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases guarding the import time of the data_science package."""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks import import_time
+from data_science.sub_agents.bigquery import tools
+
+
+class TestImportTime(unittest.TestCase):
+    """Test cases for lazy initialization at import."""
+
+    def test_baseline_import_skips_lazy_modules(self):
+        import_times = import_time.measure_import("data_science", "BASELINE")
+        self.assertIn("data_science", import_times)
+        self.assertEqual(
+            import_time.loaded_forbidden(
+                import_times, import_time.default_forbidden("BASELINE")
+            ),
+            [],
+        )
+
+    def test_parse_importtime(self):
+        log = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:        12 |         12 |   json.decoder\n"
+            "import time:       100 |        112 | json\n"
+        )
+        self.assertEqual(
+            import_time.parse_importtime(log), {"json.decoder": 12, "json": 112}
+        )
+
+    def test_llm_client_is_created_on_first_use(self):
+        previous_client = tools.llm_client
+        tools.llm_client = None
+        try:
+            client = tools.get_llm_client()
+            self.assertIs(tools.get_llm_client(), client)
+        finally:
+            tools.llm_client = previous_client
+
+
+if __name__ == "__main__":
+    unittest.main()
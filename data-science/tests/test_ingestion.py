@@ -0,0 +1,112 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for incremental ingestion of the BQML reference guide."""
+
+import os
+import sys
+import tempfile
+import unittest
+import zlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bqml.ingestion import IncrementalIndexer, RateLimiter
+from data_science.utils.vector_index import VectorIndex
+
+
+def words(prefix, count):
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+
+class TestIncrementalIndexer(unittest.TestCase):
+    """Test cases for IncrementalIndexer and RateLimiter."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.index_path = os.path.join(self.directory.name, "index.npz")
+        self.embedded = []
+        self.fail_after = None
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def embed(self, texts):
+        if self.fail_after is not None and len(self.embedded) >= self.fail_after:
+            raise RuntimeError("quota exceeded")
+        self.embedded.extend(texts)
+        return [[zlib.crc32(t.encode()) % 97 + 1, len(t)] for t in texts]
+
+    def indexer(self):
+        return IncrementalIndexer(
+            self.index_path,
+            self.embed,
+            chunk_size=10,
+            overlap=0,
+            batch_size=2,
+            max_workers=1,
+            checkpoint_every=1,
+        )
+
+    def test_only_changed_chunks_are_embedded(self):
+        documents = {"a.md": words("a", 30), "b.md": words("b", 20)}
+        stats = self.indexer().ingest(documents)
+        self.assertEqual(stats["chunks_embedded"], 5)
+
+        self.embedded.clear()
+        documents["a.md"] = words("a", 20) + " " + words("z", 10)
+        del documents["b.md"]
+        documents["c.md"] = words("a", 10)
+        stats = self.indexer().ingest(documents)
+        self.assertEqual(self.embedded, [words("z", 10)])
+        self.assertEqual(stats["files_changed"], 2)
+        self.assertEqual(stats["files_removed"], 1)
+        self.assertEqual(stats["chunks_reused"], 3)
+        self.assertEqual(stats["chunks_removed"], 3)
+        self.assertEqual(len(VectorIndex.load(self.index_path)), 3)
+
+        self.embedded.clear()
+        stats = self.indexer().ingest(documents)
+        self.assertEqual(self.embedded, [])
+        self.assertEqual(stats["files_unchanged"], 2)
+
+    def test_interrupted_ingestion_resumes(self):
+        documents = {"a.md": words("a", 60)}
+        self.fail_after = 4
+        with self.assertRaises(RuntimeError):
+            self.indexer().ingest(documents)
+        self.assertEqual(len(VectorIndex.load(self.index_path)), 4)
+
+        self.fail_after = None
+        self.embedded.clear()
+        stats = self.indexer().ingest(documents)
+        self.assertEqual(stats["chunks_reused"], 4)
+        self.assertEqual(len(self.embedded), 2)
+
+    def test_rate_limiter_spaces_calls(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter(120, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            limiter.acquire()
+        self.assertEqual(sleeps, [0.5, 0.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the per-session schema instruction providers."""
+
+import os
+import sys
+import types
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science import agent
+from data_science.sub_agents.bigquery import schema_registry, tools
+from data_science.utils.instructions import SchemaInstructionProvider
+
+
+def _settings(schema):
+    return {"schema_fingerprint": schema_registry.registry.register(schema)}
+
+
+def _provider():
+    return SchemaInstructionProvider(
+        lambda: "base", "\nschema: {schema}", tools.get_ddl_schema
+    )
+
+
+def _session(schema):
+    """Returns a context whose state belongs to a session on `schema`."""
+    settings = _settings(schema)
+    return types.SimpleNamespace(
+        state={
+            "database_settings": settings,
+            "schema_fingerprint": settings["schema_fingerprint"],
+        }
+    )
+
+
+class TestSchemaInstructionProvider(unittest.TestCase):
+    """Test cases for SchemaInstructionProvider."""
+
+    def test_instruction_is_memoized_per_fingerprint(self):
+        provider = _provider()
+        first = provider(_session("CREATE TABLE a"))
+        second = provider(_session("CREATE TABLE a"))
+        self.assertEqual(first, "base\nschema: CREATE TABLE a")
+        self.assertIs(first, second)
+        self.assertEqual(provider.renders, 1)
+        self.assertEqual(provider(types.SimpleNamespace(state={})), "base")
+
+    def test_parallel_sessions_are_isolated(self):
+        provider = _provider()
+        schemas = [f"CREATE TABLE t{i} (c{i} INT64)" for i in range(4)]
+
+        def run_session(index):
+            schema = schemas[index % len(schemas)]
+            return schema, provider(_session(schema))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(run_session, range(200)))
+
+        for schema, instruction in results:
+            self.assertEqual(instruction, f"base\nschema: {schema}")
+        self.assertEqual(provider.renders, len(schemas))
+
+    def test_root_callback_does_not_mutate_shared_agent(self):
+        previous_settings = tools.database_settings
+        tools.database_settings = _settings("CREATE TABLE shared")
+        try:
+            context = types.SimpleNamespace(state={})
+            agent.setup_before_agent_call(context)
+        finally:
+            tools.database_settings = previous_settings
+
+        self.assertIs(agent.root_agent.instruction, agent.root_instruction)
+        self.assertEqual(
+            context.state["schema_fingerprint"],
+            schema_registry.registry.register("CREATE TABLE shared"),
+        )
+        self.assertIn("CREATE TABLE shared", agent.root_instruction(context))
+        self.assertNotIn(
+            "CREATE TABLE shared",
+            agent.root_instruction(_session("CREATE TABLE other")),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
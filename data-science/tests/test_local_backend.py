@@ -0,0 +1,87 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the local (SQLite) BigQuery backend."""
+
+import os
+import sys
+import types
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery import backends, tools
+
+DATA_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "data_science", "utils", "data"
+)
+
+
+class TestLocalBackend(unittest.TestCase):
+    """Test cases for LocalBigQueryClient."""
+
+    def setUp(self):
+        self.client = backends.LocalBigQueryClient(
+            project="local-project",
+            data_dir=DATA_DIR,
+            default_dataset="forecasting_sticker_sales",
+        )
+        self._previous_client = tools.bq_client
+        tools.bq_client = self.client
+
+    def tearDown(self):
+        tools.bq_client = self._previous_client
+
+    def test_schema_is_generated_from_csv(self):
+        ddl = tools.get_bigquery_schema(
+            "forecasting_sticker_sales",
+            client=self.client,
+            project_id="local-project",
+        )
+        self.assertIn(
+            "CREATE OR REPLACE TABLE `local-project.forecasting_sticker_sales.test`",
+            ddl,
+        )
+        self.assertIn("`num_sold` INTEGER", ddl)
+        # A table name without a dataset is in the default dataset.
+        self.assertEqual(
+            self.client.get_table("test").schema,
+            self.client.get_table("forecasting_sticker_sales.test").schema,
+        )
+        with self.assertRaises(ValueError):
+            self.client.get_table("forecasting_sticker_sales.")
+
+    def test_bigquery_sql_runs_locally(self):
+        tool_context = types.SimpleNamespace(state={})
+        result = tools.run_bigquery_validation(
+            "SELECT country, SUM(num_sold) AS total"
+            " FROM `local-project.forecasting_sticker_sales.test`"
+            " GROUP BY country ORDER BY total DESC LIMIT 3",
+            tool_context,
+        )
+        self.assertIsNone(result["error_message"])
+        self.assertEqual(result["row_count"], 3)
+        self.assertEqual(len(tool_context.state["query_result"]), 3)
+        self.assertTrue(result["query_result"].startswith("country,total\n"))
+
+    def test_invalid_sql_is_reported(self):
+        result = tools.run_bigquery_validation(
+            "SELECT missing_column FROM `forecasting_sticker_sales.test`",
+            types.SimpleNamespace(state={}),
+        )
+        self.assertTrue(result["error_message"].startswith("Invalid SQL"))
+
+
+if __name__ == "__main__":
+    unittest.main()
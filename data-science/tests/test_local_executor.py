@@ -0,0 +1,83 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the local process code executor."""
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from google.adk.code_executors.code_execution_utils import CodeExecutionInput, File
+
+from data_science.sub_agents.analytics.local_executor import (
+    LocalProcessCodeExecutor,
+)
+
+
+class TestLocalProcessCodeExecutor(unittest.TestCase):
+    """Test cases for LocalProcessCodeExecutor."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = LocalProcessCodeExecutor(pool_size=2, timeout_seconds=5)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.close()
+
+    def run_code(self, code, session="s1", input_files=()):
+        return self.executor.execute_code(
+            None,
+            CodeExecutionInput(
+                code=code, input_files=list(input_files), execution_id=session
+            ),
+        )
+
+    def test_state_is_kept_per_session(self):
+        self.run_code("x = 41", session="a")
+        self.assertEqual(self.run_code("print(x + 1)", session="a").stdout, "42\n")
+        result = self.run_code("print(x)", session="b")
+        self.assertIn("NameError", result.stderr)
+
+    def test_input_files_and_plots(self):
+        result = self.run_code(
+            "df = pd.read_csv('data.csv')\n"
+            "df.plot(x='a', y='b')\n"
+            "print(df['b'].sum())",
+            input_files=[File(name="data.csv", content=b"a,b\n1,2\n3,4\n")],
+        )
+        self.assertEqual(result.stdout, "6\n")
+        self.assertEqual(len(result.output_files), 1)
+        self.assertEqual(result.output_files[0].mime_type, "image/png")
+        self.assertTrue(result.output_files[0].content.startswith(b"\x89PNG"))
+
+    def test_timeout_kills_the_session(self):
+        self.run_code("y = 1", session="slow")
+        result = self.run_code("import time; time.sleep(30)", session="slow")
+        self.assertIn("timed out", result.stderr)
+        self.assertIn("NameError", self.run_code("y", session="slow").stderr)
+
+    def test_warm_execution_is_fast(self):
+        self.run_code("z = np.arange(10)", session="fast")
+        start = time.perf_counter()
+        result = self.run_code("print(int(z.sum()))", session="fast")
+        self.assertEqual(result.stdout, "45\n")
+        self.assertLess(time.perf_counter() - start, 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the BQML model listing cache."""
+
+import os
+import sys
+import time
+import types
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery import backends
+from data_science.sub_agents.bigquery import tools as bq_tools
+from data_science.sub_agents.bqml import tools
+from data_science.sub_agents.bqml.model_cache import (
+    ModelCatalogCache,
+    modified_model_datasets,
+)
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestModelCache(unittest.TestCase):
+    """Test cases for ModelCatalogCache and model DDL detection."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.listings = []
+        self.cache = ModelCatalogCache(
+            lambda dataset: self.listings.append(dataset) or [{"name": "m"}],
+            ttl_seconds=60,
+            clock=self.clock,
+        )
+
+    def test_modified_model_datasets(self):
+        code = """
+            CREATE OR REPLACE MODEL `p.sales.forecast`
+            OPTIONS(model_type='ARIMA_PLUS') AS SELECT 1;
+            DROP MODEL IF EXISTS other.old_model;
+            ALTER MODEL m SET OPTIONS (description='x');
+            SELECT * FROM ML.PREDICT(MODEL `p.reads.m`, (SELECT 1));
+        """
+        self.assertEqual(
+            modified_model_datasets(code, "p", "default_ds"),
+            {"p.sales", "p.other", "p.default_ds"},
+        )
+        self.assertEqual(
+            modified_model_datasets("SELECT 1", "p", "default_ds"), set()
+        )
+
+    def test_listing_is_cached_until_ttl(self):
+        self.assertEqual(self.cache.get("p.d"), ([{"name": "m"}], False))
+        self.assertEqual(self.cache.get("p.d"), ([{"name": "m"}], True))
+        self.clock.now = 61
+        self.assertFalse(self.cache.get("p.d")[1])
+        self.assertEqual(self.listings, ["p.d", "p.d"])
+
+    def test_model_ddl_invalidates_listing(self):
+        saved = (bq_tools.bq_client, tools.models_cache)
+        bq_tools.bq_client = backends.LocalBigQueryClient("p")
+        tools.models_cache = self.cache
+        try:
+            tools.check_bq_models("d")
+            tools.check_bq_models("p.d")
+            tools.execute_bqml_code("SELECT 1", "p", "d")
+            tools.check_bq_models("d")
+            self.assertEqual(self.listings, ["p.d"])
+            tools.execute_bqml_code("DROP MODEL d.m", "p", "d")
+            tools.check_bq_models("d")
+            self.assertEqual(self.listings, ["p.d", "p.d"])
+        finally:
+            bq_tools.bq_client, tools.models_cache = saved
+
+    def test_models_are_described_concurrently(self):
+        models = [
+            types.SimpleNamespace(
+                model_id=f"m{i}",
+                model_type="LINEAR_REG",
+                created=None,
+                modified=None,
+                reference=f"p.d.m{i}",
+            )
+            for i in range(8)
+        ]
+
+        def get_model(reference):
+            time.sleep(0.1)
+            return types.SimpleNamespace(training_runs=[{"startTime": reference}])
+
+        client = types.SimpleNamespace(
+            project="p", list_models=lambda dataset: models, get_model=get_model
+        )
+        with mock.patch.object(bq_tools, "bq_client", client):
+            start = time.perf_counter()
+            listing = tools._list_models("p.d")  # pylint: disable=protected-access
+            elapsed = time.perf_counter() - start
+        self.assertEqual(
+            [model["name"] for model in listing], [m.model_id for m in models]
+        )
+        self.assertEqual(listing[3]["last_training_start"], "p.d.m3")
+        self.assertLess(elapsed, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
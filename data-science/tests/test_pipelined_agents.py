@@ -0,0 +1,146 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the pipelined database and data science agent calls."""
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from google.adk.sessions.state import State
+from google.cloud.bigquery import SchemaField
+
+from data_science import tools
+from data_science.sub_agents.bigquery import session_results
+
+# Seconds each fake database agent run takes, by question.
+DELAYS = {"slow": 0.3, "fast": 0.1, "medium": 0.2}
+
+
+class FakeToolContext:
+
+    def __init__(self):
+        self.state = State(value={"all_db_settings": {}}, delta={})
+
+
+class TestPipelinedAgents(unittest.TestCase):
+    """Test cases for call_db_agents_pipelined."""
+
+    def setUp(self):
+        self.events = []
+        self.execution_ids = set()
+        self.start = time.perf_counter()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    async def fake_db_agent(self, question, tool_context):
+        await asyncio.sleep(DELAYS[question])
+        tool_context.state["query_result"] = [{"question": question}]
+        tool_context.state[f"sql_of_{question}"] = f"SELECT {question}"
+        session_results.record(
+            tool_context.state,
+            f"p.anon.{question}",
+            [SchemaField("question", "STRING")],
+            1,
+            f"SELECT {question}",
+            question,
+        )
+        self.events.append(("db", question, self.elapsed()))
+        return f"rows of {question}"
+
+    async def fake_ds_agent(self, question, input_data, tool_context):
+        self.events.append(("ds", input_data[0]["question"], self.elapsed()))
+        self.execution_ids.add(
+            tool_context.state["_code_execution_context"]["execution_session_id"]
+        )
+        await asyncio.sleep(0.05)
+        return f"{question} of {input_data[0]['question']}"
+
+    def run_tool(self, questions, analysis_question):
+        context = FakeToolContext()
+        with mock.patch.object(
+            tools, "_run_db_agent", self.fake_db_agent
+        ), mock.patch.object(tools, "_run_ds_agent", self.fake_ds_agent):
+            results = asyncio.run(
+                tools.call_db_agents_pipelined(
+                    questions, analysis_question, tool_context=context
+                )
+            )
+        return results, context
+
+    def test_queries_run_concurrently_and_analysis_is_pipelined(self):
+        results, context = self.run_tool(["slow", "fast", "medium"], "mean")
+        # Bounded by the slowest query plus one analysis, not the sum.
+        self.assertLess(self.elapsed(), 0.5)
+        self.assertEqual(
+            [r["ds_agent_output"] for r in results],
+            ["mean of slow", "mean of fast", "mean of medium"],
+        )
+        # The first analysis starts before the slowest query lands.
+        first_ds = next(e for e in self.events if e[0] == "ds")
+        self.assertEqual(first_ds[1], "fast")
+        self.assertLess(first_ds[2], DELAYS["slow"])
+        # Each sub-question kept its own data.
+        self.assertEqual(
+            context.state["query_result"],
+            {q: [{"question": q}] for q in ["slow", "fast", "medium"]},
+        )
+
+    def test_branch_state_is_merged_back(self):
+        _, context = self.run_tool(["slow", "fast", "medium"], "mean")
+        state = context.state.to_dict()
+        for question in ["slow", "fast", "medium"]:
+            self.assertEqual(state[f"sql_of_{question}"], f"SELECT {question}")
+        # Each branch analyzed its data in a code executor session of its own.
+        self.assertEqual(len(self.execution_ids), 3)
+        self.assertNotIn("_code_execution_context", state)
+
+    def test_results_of_every_branch_are_recorded(self):
+        context = FakeToolContext()
+        session_results.record(
+            context.state,
+            "p.anon.earlier",
+            [SchemaField("x", "INT64")],
+            1,
+            "SELECT 1",
+        )
+        with mock.patch.object(
+            tools, "_run_db_agent", self.fake_db_agent
+        ), mock.patch.object(session_results, "MAX_SESSION_RESULTS", 3):
+            asyncio.run(
+                tools.call_db_agents_pipelined(
+                    ["slow", "fast"], "N/A", tool_context=context
+                )
+            )
+        self.assertEqual(
+            [r["table"] for r in session_results.results(context.state)],
+            ["p.anon.earlier", "p.anon.slow", "p.anon.fast"],
+        )
+
+    def test_without_analysis(self):
+        results, context = self.run_tool(["fast"], "N/A")
+        self.assertEqual(
+            results, [{"question": "fast", "db_agent_output": "rows of fast"}]
+        )
+        self.assertNotIn("ds_agent_output", context.state.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
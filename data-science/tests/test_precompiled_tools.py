@@ -0,0 +1,95 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for tools with precompiled function declarations."""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from google.adk.tools import FunctionTool
+
+from data_science import tools
+from data_science.agent import root_agent
+from data_science.utils.tools import PrecompiledFunctionTool
+
+
+class TestPrecompiledTools(unittest.TestCase):
+    """Test cases for PrecompiledFunctionTool."""
+
+    def test_declaration_is_built_once(self):
+        tool = PrecompiledFunctionTool(tools.call_db_agents_pipelined)
+        with mock.patch.object(
+            FunctionTool,
+            "_get_declaration",
+            autospec=True,
+            side_effect=FunctionTool._get_declaration,
+        ) as build:
+            declaration = tool._get_declaration()
+            self.assertEqual(tool._get_declaration(), declaration)
+        build.assert_called_once()
+        self.assertEqual(
+            declaration,
+            FunctionTool(tools.call_db_agents_pipelined)._get_declaration(),
+        )
+
+    def test_mutating_a_declaration_does_not_change_the_cached_one(self):
+        tool = PrecompiledFunctionTool(tools.call_db_agents_pipelined)
+        tool._get_declaration().name = "prefix_call_db_agents_pipelined"
+        self.assertEqual(tool._get_declaration().name, "call_db_agents_pipelined")
+
+    def test_sync_tools_do_not_block_the_event_loop(self):
+        threads = []
+
+        def slow_tool(seconds: float) -> str:
+            """Blocks like a tool waiting on BigQuery."""
+            threads.append(threading.get_ident())
+            time.sleep(seconds)
+            return "done"
+
+        async def run():
+            tool = PrecompiledFunctionTool(slow_tool)
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(
+                    tool.run_async(args={"seconds": 0.2}, tool_context=None)
+                    for _ in range(3)
+                )
+            )
+            return results, time.perf_counter() - start
+
+        results, seconds = asyncio.run(run())
+        self.assertEqual(results, ["done"] * 3)
+        self.assertLess(seconds, 0.5)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_root_agent_tools_are_precompiled(self):
+        self.assertEqual(
+            [
+                tool.name
+                for tool in root_agent.tools
+                if isinstance(tool, PrecompiledFunctionTool)
+            ],
+            ["call_db_agent", "call_db_agents_pipelined", "call_ds_agent"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the BQML reference guide retriever."""
+
+import os
+import sys
+import unittest
+import zlib
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bqml import reference_retriever
+from data_science.sub_agents.bqml.reference_retriever import (
+    ReferenceRetriever,
+    build_index,
+)
+
+DOCUMENTS = {
+    "arima.html": "ARIMA_PLUS models forecast time series data.",
+    "kmeans.html": "KMEANS models cluster rows by distance to centroids.",
+}
+
+
+def embed(texts):
+    """Bag-of-words embedding, so overlapping texts are similar."""
+    vectors = []
+    for text in texts:
+        vector = np.zeros(64)
+        for word in text.lower().replace(".", " ").replace("?", " ").split():
+            vector[zlib.crc32(word.encode()) % 64] += 1
+        vectors.append(vector)
+    return vectors
+
+
+class TestReferenceRetriever(unittest.TestCase):
+    """Test cases for ReferenceRetriever tiers."""
+
+    def setUp(self):
+        self.remote_queries = []
+
+        def remote(query, top_k):
+            self.remote_queries.append(query)
+            return [{"source": "gs://corpus/doc", "text": f"answer to {query}"}]
+
+        self.retriever = ReferenceRetriever(embed, remote_retrieve=remote)
+
+    def test_repeated_queries_are_served_from_cache(self):
+        query = "How do I forecast time series with ARIMA_PLUS"
+        self.assertEqual(self.retriever.retrieve(query)[1], reference_retriever.REMOTE)
+        self.assertEqual(
+            self.retriever.retrieve(f"  {query.upper()} ")[1],
+            reference_retriever.EXACT_CACHE,
+        )
+        chunks, tier = self.retriever.retrieve(f"{query}?")
+        self.assertEqual(tier, reference_retriever.SEMANTIC_CACHE)
+        self.assertEqual(chunks[0]["text"], f"answer to {query}")
+        self.assertEqual(self.remote_queries, [query])
+        self.assertEqual(
+            set(self.retriever.stats()),
+            {
+                reference_retriever.REMOTE,
+                reference_retriever.EXACT_CACHE,
+                reference_retriever.SEMANTIC_CACHE,
+            },
+        )
+
+    def test_empty_responses_are_not_cached(self):
+        responses = [[], [{"source": "gs://corpus/doc", "text": "answer"}]]
+        retriever = ReferenceRetriever(
+            embed, remote_retrieve=lambda query, top_k: responses.pop(0)
+        )
+        query = "How do I forecast time series with ARIMA_PLUS"
+        self.assertEqual(retriever.retrieve(query), ([], reference_retriever.REMOTE))
+        # The query and its paraphrases still reach the corpus.
+        chunks, tier = retriever.retrieve(query)
+        self.assertEqual(chunks[0]["text"], "answer")
+        self.assertEqual(tier, reference_retriever.REMOTE)
+        self.assertEqual(
+            retriever.retrieve(f"{query}?")[1], reference_retriever.SEMANTIC_CACHE
+        )
+
+    def test_local_index_replaces_the_corpus(self):
+        retriever = ReferenceRetriever(
+            embed, local_index=build_index(DOCUMENTS, embed), top_k=1
+        )
+        chunks, tier = retriever.retrieve("cluster rows with KMEANS")
+        self.assertEqual(tier, reference_retriever.LOCAL_INDEX)
+        self.assertEqual([chunk["source"] for chunk in chunks], ["kmeans.html"])
+        self.assertEqual(
+            reference_retriever.format_chunks(chunks),
+            "[1] kmeans.html\n" + DOCUMENTS["kmeans.html"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the tabular encodings of query results."""
+
+import csv
+import io
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science import tools
+from data_science.utils import result_encoder
+from data_science.utils.utils import estimate_tokens
+
+ROWS = [
+    {"country": "Canada", "note": "a, b", "num_sold": 973},
+    {"country": "Finland", "note": None, "num_sold": 12},
+    {"country": "Norway", "note": "x|y\nz", "num_sold": 5},
+]
+
+
+class TestResultEncoder(unittest.TestCase):
+    """Test cases for encode_rows."""
+
+    def test_csv_names_columns_once_and_round_trips(self):
+        encoded = result_encoder.encode_rows(ROWS)
+        self.assertEqual(encoded.text.count("country"), 1)
+        self.assertEqual((encoded.rows_shown, encoded.total_rows), (3, 3))
+        parsed = list(csv.DictReader(io.StringIO(encoded.text)))
+        self.assertEqual(parsed[0]["note"], "a, b")
+        self.assertEqual(parsed[1]["note"], "NULL")
+        self.assertEqual(parsed[2]["note"], "x|y\nz")
+        self.assertLess(estimate_tokens(encoded.text), estimate_tokens(str(ROWS)))
+
+    def test_token_budget_and_value_length(self):
+        rows = [{"id": i, "text": "word " * 50} for i in range(100)]
+        encoded = result_encoder.encode_rows(
+            rows, result_encoder.TSV, max_tokens=200, max_value_chars=20
+        )
+        self.assertLessEqual(estimate_tokens(encoded.text), 200)
+        self.assertEqual(encoded.total_rows, 100)
+        self.assertEqual(encoded.values_cut, encoded.rows_shown)
+        self.assertIn("0\tword word word wo...", encoded.text)
+        narrow = result_encoder.encode_rows(
+            [{"id": i} for i in range(100)], result_encoder.TSV, max_tokens=200
+        )
+        self.assertGreater(narrow.rows_shown, encoded.rows_shown)
+        # The first row is kept whatever the budget.
+        self.assertEqual(
+            result_encoder.encode_rows(rows, max_tokens=1).rows_shown, 1
+        )
+
+    def test_markdown_and_data_science_request(self):
+        text = result_encoder.encode_rows(ROWS, result_encoder.MARKDOWN).text
+        self.assertEqual(
+            text.splitlines()[:2],
+            ["| country | note | num_sold |", "| --- | --- | --- |"],
+        )
+        self.assertIn("| Norway | x\\|y z | 5 |", text)
+        data = tools._format_input_data(  # pylint: disable=protected-access
+            {"Sales by country?": ROWS, "Empty?": None}
+        )
+        self.assertIn("Data of: Sales by country?\ncountry,note,num_sold\n", data)
+        self.assertIn("Data of: Empty?\nNone", data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the BQML result store."""
+
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery import backends
+from data_science.sub_agents.bigquery import tools as bq_tools
+from data_science.sub_agents.bqml import result_store, tools
+
+
+class TestResultStore(unittest.TestCase):
+    """Test cases for ResultStore and the BQML result tools."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = result_store.ResultStore(
+            self.directory.name, max_results=2, preview_rows=3
+        )
+        self.client = backends.LocalBigQueryClient("p")
+        self.client.load_dataframe(
+            "d",
+            "predictions",
+            pd.DataFrame(
+                {"id": range(25), "predicted": [i / 2 for i in range(25)]}
+            ),
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _rows(self):
+        return self.client.query("SELECT * FROM d.predictions").result()
+
+    def test_write_streams_batches(self):
+        stored = self.store.write(
+            self._rows().to_arrow_iterable(max_rows_per_batch=10)
+        )
+        self.assertEqual(stored.num_rows, 25)
+        self.assertEqual(len(stored.preview), 3)
+        self.assertEqual(
+            stored.summary["predicted"],
+            {"count": 25, "mean": 6.0, "min": 0.0, "max": 12.0},
+        )
+        self.assertEqual(
+            [row["id"] for row in self.store.read(stored.result_id, 8, 4)],
+            [8, 9, 10, 11],
+        )
+
+    def test_old_results_are_evicted(self):
+        first = self.store.write(self._rows().to_arrow_iterable())
+        for _ in range(2):
+            self.store.write(self._rows().to_arrow_iterable())
+        self.assertIsNone(self.store.get(first.result_id))
+        self.assertFalse(first.path.exists())
+        with self.assertRaises(KeyError):
+            self.store.read(first.result_id, 0, 1)
+
+    def test_execute_bqml_code_returns_bounded_preview(self):
+        saved = (bq_tools.bq_client, tools.results_store)
+        bq_tools.bq_client = self.client
+        tools.results_store = self.store
+        try:
+            session = types.SimpleNamespace(state={})
+            output = tools.execute_bqml_code(
+                "SELECT * FROM d.predictions", "p", "d", session
+            )
+            self.assertIn("Showing 3 of 25 rows.", output)
+            result_id = output.split("Result ID: ")[1].split(".")[0]
+            self.assertIn(
+                "Showing rows 20 to 24 of 25.",
+                tools.fetch_bqml_results(result_id, 20, 50, session),
+            )
+            # Other sessions cannot read the result.
+            self.assertIn(
+                "Unknown or expired result ID",
+                tools.fetch_bqml_results(
+                    result_id, 0, 50, types.SimpleNamespace(state={})
+                ),
+            )
+            self.assertIsNone(self.store.get(result_id))
+        finally:
+            bq_tools.bq_client, tools.results_store = saved
+
+
+if __name__ == "__main__":
+    unittest.main()
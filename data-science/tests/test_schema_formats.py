@@ -0,0 +1,107 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the schema formats."""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery import (
+    backends,
+    schema_formats,
+    schema_registry,
+    tools,
+)
+
+DATA_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "data_science", "utils", "data"
+)
+
+
+class TestSchemaFormats(unittest.TestCase):
+    """Test cases for the DDL and compact schema renderings."""
+
+    def setUp(self):
+        # The catalog and settings read the dataset from the environment.
+        self._env = mock.patch.dict(
+            os.environ,
+            {
+                "BQ_PROJECT_ID": "local-project",
+                "BQ_DATASET_ID": "forecasting_sticker_sales",
+                "BQ_DATASET_CATALOG": "",
+            },
+        )
+        self._env.start()
+        self._saved = (tools.bq_client, tools.database_settings, tools.catalog)
+        tools.bq_client = backends.LocalBigQueryClient(
+            project="local-project",
+            data_dir=DATA_DIR,
+            default_dataset="forecasting_sticker_sales",
+        )
+        tools.database_settings = None
+        tools.catalog = None
+
+    def tearDown(self):
+        tools.bq_client, tools.database_settings, tools.catalog = self._saved
+        self._env.stop()
+
+    def test_compact_schema_is_smaller_than_ddl(self):
+        settings = tools.get_database_settings()
+        ddl = tools.get_ddl_schema(settings)
+        compact = tools.get_ddl_schema(settings, schema_formats.COMPACT)
+        self.assertIn("`num_sold` INTEGER", ddl)
+        self.assertIn(
+            "`local-project.forecasting_sticker_sales.test`(id:INTEGER,", compact
+        )
+        self.assertIn("num_sold:INTEGER", compact)
+        self.assertLess(len(compact), len(ddl) * 0.75)
+
+    def test_compact_lists_shared_descriptions_once(self):
+        column = schema_formats.Column("amount", "FLOAT64", description="In EUR")
+        tables = [
+            schema_formats.TableSchema(
+                f"p.d.{name}",
+                [schema_formats.Column("tags", "STRING", mode="REPEATED"), column],
+                [(["a"], 1.5), (["a"], None), (["b"], 1.5)],
+            )
+            for name in ("t1", "t2")
+        ]
+        compact = schema_formats.render(tables, schema_formats.COMPACT)
+        self.assertEqual(compact.count("In EUR"), 1)
+        self.assertIn("`p.d.t1`(tags:STRING[], amount:FLOAT64[d1])", compact)
+        self.assertIn("  amount: 1.5 | NULL\n", compact)
+        self.assertIn(
+            "CREATE OR REPLACE TABLE `p.d.t2` (\n  `tags` STRING ARRAY,",
+            schema_formats.render(tables, schema_formats.DDL),
+        )
+
+    def test_registry_falls_back_to_ddl(self):
+        registry = schema_registry.SchemaRegistry()
+        fingerprint = registry.register("CREATE TABLE a")
+        self.assertEqual(
+            registry.get(fingerprint, schema_formats.COMPACT), "CREATE TABLE a"
+        )
+        self.assertEqual(
+            registry.register({"ddl": "CREATE TABLE a", "compact": "`a`()"}),
+            fingerprint,
+        )
+        self.assertEqual(registry.get(fingerprint, schema_formats.COMPACT), "`a`()")
+
+
+if __name__ == "__main__":
+    unittest.main()
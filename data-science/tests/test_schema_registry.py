@@ -0,0 +1,86 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the schema registry."""
+
+import json
+import os
+import sys
+import types
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science import agent
+from data_science.sub_agents.bigquery import backends, schema_registry, tools
+
+DATA_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "data_science", "utils", "data"
+)
+
+
+class TestSchemaRegistry(unittest.TestCase):
+    """Test cases for SchemaRegistry and schema resolution."""
+
+    def setUp(self):
+        # The catalog and settings read the dataset from the environment.
+        self._env = mock.patch.dict(
+            os.environ,
+            {
+                "BQ_PROJECT_ID": "local-project",
+                "BQ_DATASET_ID": "forecasting_sticker_sales",
+                "BQ_DATASET_CATALOG": "",
+            },
+        )
+        self._env.start()
+        self._saved = (tools.bq_client, tools.database_settings, tools.catalog)
+        tools.bq_client = backends.LocalBigQueryClient(
+            project="local-project",
+            data_dir=DATA_DIR,
+            default_dataset="forecasting_sticker_sales",
+        )
+        tools.database_settings = None
+        tools.catalog = None
+
+    def tearDown(self):
+        tools.bq_client, tools.database_settings, tools.catalog = self._saved
+        self._env.stop()
+
+    def test_registry_keeps_recent_versions(self):
+        registry = schema_registry.SchemaRegistry(max_versions=2)
+        first = registry.register("CREATE TABLE a")
+        self.assertEqual(registry.register("CREATE TABLE a"), first)
+        registry.register("CREATE TABLE b")
+        registry.register("CREATE TABLE c")
+        self.assertIsNone(registry.get(first))
+        self.assertEqual(len(registry), 2)
+
+    def test_session_state_only_references_schema(self):
+        context = types.SimpleNamespace(state={})
+        agent.setup_before_agent_call(context)
+        ddl_schema = tools.get_ddl_schema(context.state["database_settings"])
+        self.assertIn("`num_sold` INTEGER", ddl_schema)
+        self.assertNotIn("num_sold", json.dumps(context.state))
+
+    def test_unknown_fingerprint_resolves_current_schema(self):
+        current = tools.get_ddl_schema(tools.get_database_settings())
+        self.assertEqual(
+            tools.get_ddl_schema({"schema_fingerprint": "0000000000000000"}),
+            current,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the semantic SQL cache."""
+
+import os
+import sys
+import tempfile
+import unittest
+import zlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery import semantic_cache
+from data_science.utils.vector_index import VectorIndex
+
+
+def bag_of_words_embedding(text: str, dims: int = 64) -> list[float]:
+    """Deterministic stand-in for an embedding model."""
+    vector = [0.0] * dims
+    for word in text.lower().replace("?", "").split():
+        vector[zlib.crc32(word.encode()) % dims] += 1.0
+    return vector
+
+
+class TestSemanticSqlCache(unittest.TestCase):
+    """Test cases for SemanticSqlCache."""
+
+    def setUp(self):
+        self.cache = semantic_cache.SemanticSqlCache(
+            embed_fn=bag_of_words_embedding,
+            direct_threshold=0.95,
+            candidate_threshold=0.6,
+        )
+        self.schema = semantic_cache.schema_hash("CREATE TABLE t (a INT64);")
+        self.cache.add(
+            "top countries by total sales",
+            "SELECT country FROM t",
+            self.schema,
+        )
+
+    def test_direct_hit_for_same_question(self):
+        hit = self.cache.lookup("Top countries by total sales?", self.schema)
+        self.assertEqual(hit["mode"], semantic_cache.DIRECT)
+        self.assertEqual(hit["sql"], "SELECT country FROM t")
+
+    def test_candidate_hit_for_paraphrase(self):
+        hit = self.cache.lookup("top countries by sales", self.schema)
+        self.assertEqual(hit["mode"], semantic_cache.CANDIDATE)
+
+    def test_miss_for_other_schema_or_question(self):
+        other_schema = semantic_cache.schema_hash("CREATE TABLE u (b INT64);")
+        self.assertIsNone(
+            self.cache.lookup("top countries by total sales", other_schema)
+        )
+        self.assertIsNone(self.cache.lookup("how many stores exist", self.schema))
+        self.assertEqual(self.cache.stats()["misses"], 2)
+
+    def test_looked_up_embedding_is_kept(self):
+        self.assertIsNone(self.cache.cached_embedding("how many stores exist"))
+        self.cache.lookup("how many stores exist", self.schema)
+        self.assertEqual(
+            self.cache.cached_embedding("How many stores  exist"),
+            bag_of_words_embedding("how many stores exist"),
+        )
+
+    def test_failing_direct_hits_are_evicted(self):
+        for _ in range(semantic_cache.MAX_ENTRY_FAILURES):
+            hit = self.cache.lookup("top countries by total sales", self.schema)
+            self.cache.record_outcome(hit, valid=False)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.stats()["direct_hit_precision"], 0.0)
+
+    def test_persists_to_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.npz")
+            cache = semantic_cache.SemanticSqlCache(
+                embed_fn=bag_of_words_embedding, index_path=path
+            )
+            cache.add("total sales per store", "SELECT 1", self.schema)
+            # Saved in the background, not in the tool call.
+            self.assertFalse(os.path.exists(path))
+            cache.flush()
+            reloaded = semantic_cache.SemanticSqlCache(
+                embed_fn=bag_of_words_embedding, index_path=path
+            )
+            hit = reloaded.lookup("total sales per store", self.schema)
+            self.assertEqual(hit["sql"], "SELECT 1")
+
+    def test_index_grows_and_evicts_oldest(self):
+        index = VectorIndex(max_entries=20)
+        ids = [index.add([1.0, i], {"i": i}) for i in range(50)]
+        ids += index.add_many(
+            [[1.0, i] for i in range(50, 60)], [{"i": i} for i in range(50, 60)]
+        )
+        self.assertEqual(len(index), 20)
+        self.assertEqual([p["i"] for _, p in index.entries()], list(range(40, 60)))
+        self.assertIsNone(index.get(ids[39]))
+        index.remove(ids[45])
+        self.assertEqual(index.search([1.0, 59.0])[0][2], {"i": 59})
+        self.assertEqual(len(index.search([1.0, 0.0], k=100)), 19)
+
+
+if __name__ == "__main__":
+    unittest.main()
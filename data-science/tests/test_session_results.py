@@ -0,0 +1,104 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the registry of a session's earlier query results."""
+
+import os
+import sys
+import types
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery import backends, session_results, tools
+from data_science.sub_agents.bigquery.chase_sql.sql_postprocessor import (
+    sql_translator,
+)
+
+DATA_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "data_science", "utils", "data"
+)
+TOTALS_SQL = (
+    "SELECT country, SUM(num_sold) AS total"
+    " FROM `local-project.forecasting_sticker_sales.test`"
+    " GROUP BY country ORDER BY total DESC"
+)
+
+
+class TestSessionResults(unittest.TestCase):
+    """Test cases for recording and rendering session results."""
+
+    def setUp(self):
+        self.client = backends.LocalBigQueryClient(
+            project="local-project",
+            data_dir=DATA_DIR,
+            default_dataset="forecasting_sticker_sales",
+        )
+        self._previous_client = tools.bq_client
+        tools.bq_client = self.client
+        self.tool_context = types.SimpleNamespace(
+            state={"nl2sql_question": "Total stickers sold by country?"}
+        )
+
+    def tearDown(self):
+        tools.bq_client = self._previous_client
+
+    def test_follow_up_queries_the_earlier_result(self):
+        tools.run_bigquery_validation(TOTALS_SQL, self.tool_context)
+        totals = self.tool_context.state["query_result"]
+        (entry,) = session_results.results(self.tool_context.state)
+        self.assertTrue(entry["table"].startswith("local-project._local_results."))
+        self.assertEqual(entry["question"], "Total stickers sold by country?")
+        self.assertEqual(entry["num_rows"], len(totals))
+        self.assertNotIn("rows", entry)
+        follow_up = tools.run_bigquery_validation(
+            f"SELECT country FROM `{entry['table']}` WHERE total > 0"
+            " ORDER BY total DESC LIMIT 1",
+            self.tool_context,
+        )
+        self.assertEqual(follow_up["query_result"], f"country\n{totals[0]['country']}")
+        self.assertTrue(
+            session_results.references(
+                self.tool_context.state, f"SELECT * FROM `{entry['table']}`"
+            )
+        )
+
+    def test_truncated_results_are_not_recorded(self):
+        tools.run_bigquery_validation(
+            "SELECT id FROM `local-project.forecasting_sticker_sales.test`",
+            self.tool_context,
+        )
+        self.assertEqual(session_results.results(self.tool_context.state), [])
+        for _ in range(session_results.MAX_SESSION_RESULTS + 1):
+            tools.run_bigquery_validation(TOTALS_SQL, self.tool_context)
+        self.assertEqual(
+            len(session_results.results(self.tool_context.state)),
+            session_results.MAX_SESSION_RESULTS,
+        )
+
+    def test_rendered_results_parse_as_schema(self):
+        tools.run_bigquery_validation(TOTALS_SQL, self.tool_context)
+        (entry,) = session_results.results(self.tool_context.state)
+        ddl = session_results.render(self.tool_context.state)
+        self.assertIn('rows of "Total stickers sold by country?"', ddl)
+        self.assertEqual(
+            sql_translator.SqlTranslator.extract_schema_from_ddls(ddl),
+            [(entry["table"], [("country", "STRING"), ("total", "INTEGER")])],
+        )
+        compact = session_results.render(self.tool_context.state, "compact")
+        self.assertIn(f"`{entry['table']}`(country:STRING, total:INTEGER)", compact)
+
+
+if __name__ == "__main__":
+    unittest.main()
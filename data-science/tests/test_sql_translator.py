@@ -0,0 +1,98 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the output dialect fast path of SqlTranslator."""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery.chase_sql.sql_postprocessor import (
+    sql_translator,
+)
+
+DDL = """CREATE OR REPLACE TABLE `p.d.sales` (
+  `id` INTEGER,
+  `country` STRING,
+  `num_sold` INTEGER
+);
+
+"""
+
+
+class FakeModel:
+    """Stands in for `GeminiModel`, answering corrections with fixed SQL."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def call_parallel(self, prompts, parser_func=None, **kwargs):
+        del kwargs  # Unused.
+        self.prompts.extend(prompts)
+        return [parser_func("```sql\nSELECT country FROM `p.d.sales`\n```")]
+
+
+class TestSqlTranslator(unittest.TestCase):
+    """Test cases for SqlTranslator.translate."""
+
+    def setUp(self):
+        sql_translator.reset_stats()
+        self.model = FakeModel()
+        self.translator = sql_translator.SqlTranslator(
+            model=self.model,
+            process_input_errors=True,
+            process_tool_output_errors=True,
+        )
+
+    def test_googlesql_is_returned_unchanged(self):
+        sql = (
+            "SELECT country, SAFE_DIVIDE(SUM(num_sold), COUNT(*)) AS avg_sold\n"
+            "FROM `p.d.sales` GROUP BY country "
+            "QUALIFY ROW_NUMBER() OVER (ORDER BY avg_sold DESC) = 1"
+        )
+        self.assertEqual(
+            self.translator.translate(sql, db="d", catalog="p", ddl_schema=DDL), sql
+        )
+        self.assertEqual(
+            sql_translator.stats(),
+            {"translations": 1, "output_dialect": 1, "correction_passes_skipped": 1},
+        )
+
+    def test_sqlite_double_quotes_are_translated(self):
+        sql = 'SELECT "country" FROM `p.d.sales` WHERE "num_sold" > 3'
+        translated = self.translator.translate(
+            sql, db="d", catalog="p", ddl_schema=DDL
+        )
+        self.assertNotIn('"', translated)
+        self.assertIn("num_sold", translated)
+        stats = sql_translator.stats()
+        self.assertNotIn("output_dialect", stats)
+        self.assertEqual(stats["correction_passes"], 1)
+        self.assertEqual(self.model.prompts, [])
+
+    def test_unknown_column_is_corrected(self):
+        sql = "SELECT region FROM `p.d.sales`"
+        translated = self.translator.translate(
+            sql, db="d", catalog="p", ddl_schema=DDL
+        )
+        self.assertIn("country", translated)
+        self.assertNotIn("region", translated)
+        self.assertEqual(len(self.model.prompts), 1)
+        self.assertEqual(sql_translator.stats()["correction_calls"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for streamed CHASE-SQL generation."""
+
+import os
+import sys
+import types
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery.chase_sql import llm_utils
+from data_science.sub_agents.bigquery.chase_sql.chase_db_tools import (
+    parse_response,
+)
+
+RESPONSE = (
+    "**Question**: How many rows?\n\nPseudo SQL: SELECT COUNT(*)\n\n"
+    "**Final Optimized SQL Query:**\n```sql\nSELECT COUNT(*) FROM `p.d.t`\n```\n"
+    "This query counts the rows of the table."
+)
+
+
+class StreamingModel:
+    """Stands in for `GenerativeModel`, streaming RESPONSE in small chunks."""
+
+    def __init__(self):
+        self.chunks_sent = 0
+        self.closed = False
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        del prompt, kwargs  # Unused.
+        if not stream:
+            return types.SimpleNamespace(text=RESPONSE)
+        return self._stream()
+
+    def _stream(self):
+        try:
+            for start in range(0, len(RESPONSE), 5):
+                self.chunks_sent += 1
+                yield types.SimpleNamespace(text=RESPONSE[start : start + 5])
+        finally:
+            self.closed = True
+
+
+class TestStreamingSql(unittest.TestCase):
+    """Test cases for SqlBlockParser and streamed `GeminiModel.call`."""
+
+    def test_parser_handles_fences_split_across_chunks(self):
+        for size in (1, 2, 3, 7, len(RESPONSE)):
+            parser = llm_utils.SqlBlockParser()
+            chunks = [RESPONSE[i : i + size] for i in range(0, len(RESPONSE), size)]
+            fed = 0
+            for chunk in chunks:
+                fed += 1
+                if parser.feed(chunk):
+                    break
+            self.assertTrue(parser.complete)
+            self.assertTrue(parser.response().endswith("`p.d.t`\n```"))
+            self.assertEqual(
+                parse_response(parser.response()), parse_response(RESPONSE)
+            )
+            if size < 7:
+                self.assertLess(fed, len(chunks))
+
+    def test_incomplete_block_keeps_whole_response(self):
+        parser = llm_utils.SqlBlockParser()
+        self.assertFalse(parser.feed("Reasoning only, ```sql\nSELECT 1"))
+        self.assertEqual(parse_response(parser.response()), "SELECT 1")
+
+    def test_streamed_call_stops_at_sql_block(self):
+        model = llm_utils.GeminiModel()
+        model.model = StreamingModel()
+        sql = model.call("prompt", parse_response, stop_at_sql_block=True)
+        self.assertEqual(sql, "SELECT COUNT(*) FROM `p.d.t`")
+        self.assertEqual(sql, model.call("prompt", parse_response))
+        self.assertTrue(model.model.closed)
+        self.assertLess(model.model.chunks_sent * 5, len(RESPONSE) - 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
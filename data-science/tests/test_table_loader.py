@@ -0,0 +1,173 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the Parquet-based CSV table loader."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+from google.api_core import exceptions
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery import backends
+from data_science.utils.table_loader import TableLoader, TableSpec
+
+
+class FailingClient:
+    """Wraps a client and fails the load of one part."""
+
+    def __init__(self, client, fail_part):
+        self.project = client.project
+        self._client = client
+        self._fail_part = fail_part
+
+    def load_table_from_file(self, file_obj, destination, job_config, job_id):
+        if job_id.endswith(f"_{self._fail_part:05d}"):
+            raise ConnectionError("connection reset")
+        return self._client.load_table_from_file(
+            file_obj, destination, job_config=job_config, job_id=job_id
+        )
+
+
+class FailedJob:
+    """A load job that ran and failed."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.error_result = {"reason": "invalid", "message": "bad row"}
+
+    def done(self):
+        return True
+
+    def result(self):
+        raise exceptions.BadRequest(self.error_result["message"])
+
+
+class FailedJobClient(FailingClient):
+    """Wraps a client whose load job of one part runs and fails."""
+
+    def load_table_from_file(self, file_obj, destination, job_config, job_id):
+        if job_id.endswith(f"_{self._fail_part:05d}"):
+            # Registered like any job, so its ID cannot be used again.
+            jobs = self._client._jobs  # pylint: disable=protected-access
+            jobs[job_id] = FailedJob(job_id)
+            return jobs[job_id]
+        return super().load_table_from_file(
+            file_obj, destination, job_config, job_id
+        )
+
+
+class TestTableLoader(unittest.TestCase):
+    """Test cases for TableLoader."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.directory.name, "sales.csv")
+        with open(self.csv_path, "w", encoding="utf-8") as f:
+            f.write("id,amount,day,flag,note\n")
+            for i in range(300):
+                # `amount` only turns fractional, and `note` textual, late in
+                # the file, where sampling-based autodetection would miss it.
+                amount = f"{i}.5" if i == 299 else str(i)
+                note = "n/a" if i == 298 else ("" if i % 2 else str(i))
+                f.write(f"{i},{amount},2024-01-{i % 28 + 1:02d},true,{note}\n")
+        self.client = backends.LocalBigQueryClient("p")
+        self.staging = os.path.join(self.directory.name, "staging")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _count(self, table="sales"):
+        job = self.client.query(f"SELECT COUNT(*) AS n FROM d.{table}")
+        return list(job.result())[0]["n"]
+
+    def test_schema_is_inferred_from_every_part(self):
+        stats = TableLoader(self.client, self.staging, part_bytes=512).load(
+            TableSpec(self.csv_path, "d", "sales")
+        )
+        self.assertGreater(stats["parts"], 5)
+        self.assertEqual(
+            stats["schema"],
+            {
+                "id": "INT64",
+                "amount": "FLOAT64",
+                "day": "DATE",
+                "flag": "BOOL",
+                "note": "STRING",
+            },
+        )
+        self.assertEqual(stats["rows"], 300)
+        self.assertEqual(self._count(), 300)
+
+    def test_interrupted_load_resumes_without_duplicates(self):
+        spec = TableSpec(self.csv_path, "d", "sales")
+        with self.assertRaises(ConnectionError):
+            TableLoader(
+                FailingClient(self.client, fail_part=3), self.staging, part_bytes=512
+            ).load(spec)
+        self.assertLess(self._count(), 300)
+
+        stats = TableLoader(self.client, self.staging, part_bytes=512).load(spec)
+        self.assertEqual(stats["parts_skipped"], 3)
+        self.assertEqual(self._count(), 300)
+
+    def test_failed_job_is_retried_under_a_new_id(self):
+        spec = TableSpec(self.csv_path, "d", "sales")
+        with self.assertRaises(exceptions.BadRequest):
+            TableLoader(
+                FailedJobClient(self.client, fail_part=3), self.staging, part_bytes=512
+            ).load(spec)
+
+        stats = TableLoader(self.client, self.staging, part_bytes=512).load(spec)
+        self.assertEqual(stats["parts_skipped"], 3)
+        self.assertEqual(self._count(), 300)
+        jobs = self.client._jobs  # pylint: disable=protected-access
+        self.assertEqual(len([job_id for job_id in jobs if "_00003_" in job_id]), 1)
+
+    def test_completed_load_is_not_resumed(self):
+        spec = TableSpec(self.csv_path, "d", "sales")
+        TableLoader(self.client, self.staging, part_bytes=512).load(spec)
+        self.assertEqual(os.listdir(self.staging), [])
+        # E.g. the dataset was dropped, or the script points at a new project.
+        self.client = backends.LocalBigQueryClient("p")
+        stats = TableLoader(self.client, self.staging, part_bytes=512).load(spec)
+        self.assertEqual(stats["parts_skipped"], 0)
+        self.assertEqual(self._count(), 300)
+
+    def test_manifest_is_kept_per_project(self):
+        spec = TableSpec(self.csv_path, "d", "sales")
+        with self.assertRaises(ConnectionError):
+            TableLoader(
+                FailingClient(self.client, fail_part=3), self.staging, part_bytes=512
+            ).load(spec)
+        self.client = backends.LocalBigQueryClient("other")
+        stats = TableLoader(self.client, self.staging, part_bytes=512).load(spec)
+        self.assertEqual(stats["parts_skipped"], 0)
+        self.assertEqual(self._count(), 300)
+
+    def test_load_many(self):
+        specs = [
+            TableSpec(self.csv_path, "d", "sales"),
+            TableSpec(self.csv_path, "d", "sales_copy"),
+        ]
+        stats = TableLoader(self.client, self.staging).load_many(specs)
+        self.assertEqual([s["table"] for s in stats], ["d.sales", "d.sales_copy"])
+        self.assertEqual(self._count("sales_copy"), 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
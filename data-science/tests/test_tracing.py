@@ -0,0 +1,88 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the tracing helpers and the JSONL span export."""
+
+import json
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery import backends, tools
+from data_science.utils import tracing
+
+DATA_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "data_science", "utils", "data"
+)
+
+
+class TestTracing(unittest.TestCase):
+    """Test cases for the JSONL span export."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.trace_dir = tempfile.TemporaryDirectory()
+        cls.trace_file = os.path.join(cls.trace_dir.name, "spans.jsonl")
+        tracing.configure_jsonl_export(cls.trace_file)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.trace_dir.cleanup()
+
+    def _spans(self, name):
+        tracing.flush()
+        with open(self.trace_file, encoding="utf-8") as f:
+            spans = [json.loads(line) for line in f]
+        return [s for s in spans if s["name"] == name]
+
+    def test_traced_keeps_signature(self):
+        self.assertEqual(
+            tools.run_bigquery_validation.__name__, "run_bigquery_validation"
+        )
+        self.assertIn("Validates", tools.run_bigquery_validation.__doc__)
+
+    def test_validation_span_is_exported(self):
+        previous_client = tools.bq_client
+        tools.bq_client = backends.LocalBigQueryClient(
+            project="local-project",
+            data_dir=DATA_DIR,
+            default_dataset="forecasting_sticker_sales",
+        )
+        try:
+            tools.run_bigquery_validation(
+                "SELECT country FROM `forecasting_sticker_sales.test` LIMIT 2",
+                types.SimpleNamespace(state={}),
+            )
+        finally:
+            tools.bq_client = previous_client
+        attributes = self._spans("run_bigquery_validation")[-1]["attributes"]
+        self.assertTrue(attributes["sql.valid"])
+        self.assertEqual(attributes["bq.row_count"], 2)
+        self.assertIn("latency_ms", attributes)
+
+    def test_llm_usage_falls_back_to_estimate(self):
+        response = types.SimpleNamespace(usage_metadata=None, text="abcdefgh")
+        with tracing.span("test.llm") as current_span:
+            tracing.set_llm_usage(current_span, response, prompt="a" * 40)
+        attributes = self._spans("test.llm")[-1]["attributes"]
+        self.assertEqual(attributes["llm.tokens_in"], 10)
+        self.assertEqual(attributes["llm.tokens_out"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()